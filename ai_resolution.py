@@ -1,4 +1,50 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+from collections import deque
+
+import httpx
 from google import genai
+from google.genai import errors, types
+
+import instrumentation
+from resolution_cache import ResolutionCache
+
+
+MODEL = "gemini-2.0-flash"
+
+PROMPT_TEMPLATE = """You are a conflict resolution expert analyzing a workplace conversation using the Thomas-Kilmann Conflict Mode Instrument (TKI).
+            Here is the conversation analysis:
+            {conversation_summary}
+
+            Based on the TKI styles and tension/assertiveness scores:
+
+            1. Suggest 1 or 2 specific, actionable resolution strategies that consider each person's conflict style
+            2. Recommend how each person could adjust their approach for better outcomes
+            Keep your response concise, practical, and focused on de-escalation."""
+
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 4
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+
+# Prompt size limit in estimated tokens; older turns are summarized per person to stay within it
+PROMPT_TOKEN_BUDGET = int(os.environ['TKI_PROMPT_TOKEN_BUDGET']) if os.environ.get('TKI_PROMPT_TOKEN_BUDGET') else 8000
+
+# Turns always quoted verbatim, even when they alone exceed the budget
+MIN_RECENT_TURNS = 4
+
+# Rough size of a token in English text; avoids a tokenizer round trip to the API
+CHARS_PER_TOKEN = 4
+
+# HTTP statuses worth retrying: timeouts, rate limiting and server-side failures
+TRANSIENT_STATUS_CODES = frozenset([408, 429, 500, 502, 503, 504])
+
+# One service per API key, shared by the synchronous helpers
+_services = {}
+
 
 def generate_resolution(conversation_analysis, api_key):
     """
@@ -7,38 +53,368 @@ def generate_resolution(conversation_analysis, api_key):
     Args:
         conversation_analysis: List of dicts with person, text, tension, assertiveness, style
         api_key: Google API key
-        
+    
     Returns:
         str: AI-generated resolution suggestions
     """
-    try:
-        client = genai.Client(api_key=api_key)
+    return generate_resolutions([conversation_analysis], api_key)[0]
+
+
+def generate_resolutions(conversation_analyses, api_key, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """
+    Generate resolution suggestions for several conversations with overlapping API calls.
+    
+    Args:
+        conversation_analyses: List of conversation analyses (see generate_resolution)
+        api_key: Google API key
+        max_concurrency: Maximum number of requests in flight
+    
+    Returns:
+        list: Resolution text (or error message) for each conversation, in input order
+    """
+    service = _services.get(api_key)
+    if service is None:
+        service = _services[api_key] = ResolutionService(api_key, cache=ResolutionCache())
+    service.max_concurrency = max_concurrency
+    
+    results = asyncio.run(service.resolve_batch(conversation_analyses))
+    return [
+        f"Error generating resolution: {result}\n\nPlease ensure you have set your GOOGLE_API_KEY environment variable or pass it directly."
+        if isinstance(result, Exception) else result
+        for result in results
+    ]
+
+
+def build_prompt(conversation_analysis, template=PROMPT_TEMPLATE, token_budget=None):
+    """
+    Build the resolution prompt for an analyzed conversation.
+    
+    Args:
+        conversation_analysis: List of dicts with person, text, tension, assertiveness, style
+        template: Prompt template with a {conversation_summary} field
+        token_budget: Estimated token limit (see PromptBuilder); None quotes every turn
+    
+    Returns:
+        str: Prompt text
+    """
+    builder = PromptBuilder(template, token_budget)
+    builder.extend(conversation_analysis)
+    return builder.prompt()
+
+
+def estimate_tokens(text):
+    """
+    Args:
+        text: Prompt text
+    
+    Returns:
+        int: Approximate token count (CHARS_PER_TOKEN characters per token)
+    """
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def resolution_key(conversation_analysis, model=MODEL, template=PROMPT_TEMPLATE, token_budget=None,
+                   min_recent_turns=MIN_RECENT_TURNS):
+    """
+    Fingerprint the parts of an analysis that reach the prompt.
+    
+    Re-analyzing a conversation to the same scores and styles gives the
+    same key; changing any turn, the template, the model or the token
+    budget (or, under a budget, the number of turns always quoted) gives a
+    new one.
+    
+    Args:
+        conversation_analysis: List of dicts with person, text, tension, assertiveness, style
+        model: Gemini model name
+        template: Prompt template
+        token_budget: Prompt token budget (None for unlimited)
+        min_recent_turns: Turns quoted verbatim under the budget (see PromptBuilder)
+    
+    Returns:
+        str: Hex digest
+    """
+    turns = [
+        [turn['person'], turn['text'], turn['tension'], turn['assertiveness'], turn['style']]
+        for turn in conversation_analysis
+    ]
+    fields = {'model': model, 'template': template, 'turns': turns}
+    if token_budget is not None:
+        fields['token_budget'] = token_budget
+        if min_recent_turns != MIN_RECENT_TURNS:
+            fields['min_recent_turns'] = min_recent_turns
+    encoded = json.dumps(fields, sort_keys=True, default=float)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class PromptBuilder:
+    """
+    Incrementally maintained resolution prompt with a token budget.
+    
+    Turns are appended one at a time and rendered once. While the prompt
+    is over token_budget, the oldest quoted turn is folded into running
+    per-person statistics (turn count, tension and assertiveness averages
+    and maxima, style counts), so recent turns stay verbatim and older ones
+    shrink to one line per person. Appending a turn costs the same however
+    long the conversation is; prompt() only joins the quoted turns. Without
+    a budget, or while everything fits, the prompt is exactly the
+    all-verbatim one.
+    """
+
+    def __init__(self, template=PROMPT_TEMPLATE, token_budget=None, min_recent_turns=MIN_RECENT_TURNS):
+        """
+        Args:
+            template: Prompt template with a {conversation_summary} field
+            token_budget: Estimated token limit for the whole prompt (None for unlimited)
+            min_recent_turns: Turns kept verbatim even if they alone exceed the budget
+        """
+        self.template = template
+        self.token_budget = token_budget
+        self.min_recent_turns = min_recent_turns
+        self.turns = 0
+        self.summarized = 0
+        self._template_tokens = estimate_tokens(template.format(conversation_summary=''))
+        # (person, tension, assertiveness, style, rendered text, tokens) of every quoted turn
+        self._recent = deque()
+        self._recent_tokens = 0
+        self._people = {}
+        self._summary = ''
+        self._summary_tokens = 0
+        self._prompt = None
+
+    def append(self, turn):
+        """
+        Add the next turn of the conversation.
         
-        # Build conversation summary for prompt
-        conversation_summary = ""
-        for i, turn in enumerate(conversation_analysis, 1):
-            conversation_summary += f"Turn {i} - {turn['person']}:\n"
-            conversation_summary += f"  Text: \"{turn['text']}\"\n"
-            conversation_summary += f"  Tension: {turn['tension']}, Assertiveness: {turn['assertiveness']}\n"
-            conversation_summary += f"  TKI Style: {turn['style']}\n\n"
+        Args:
+            turn: Dict with person, text, tension, assertiveness and style
+        """
+        self.turns += 1
+        text = (
+            f"Turn {self.turns} - {turn['person']}:\n"
+            f"  Text: \"{turn['text']}\"\n"
+            f"  Tension: {turn['tension']}, Assertiveness: {turn['assertiveness']}\n"
+            f"  TKI Style: {turn['style']}\n\n"
+        )
+        tokens = estimate_tokens(text)
+        self._recent.append((turn['person'], turn['tension'], turn['assertiveness'], turn['style'], text, tokens))
+        self._recent_tokens += tokens
+        self._prompt = None
         
-        # Create prompt
-        prompt = f"""You are a conflict resolution expert analyzing a workplace conversation using the Thomas-Kilmann Conflict Mode Instrument (TKI).
-            Here is the conversation analysis:
-            {conversation_summary}
+        if self.token_budget is None:
+            return
+        while len(self._recent) > self.min_recent_turns and self.tokens() > self.token_budget:
+            self._fold(self._recent.popleft())
+            self._render_summary()
 
-            Based on the TKI styles and tension/assertiveness scores:
+    def extend(self, turns):
+        for turn in turns:
+            self.append(turn)
 
-            1. Suggest 1 or 2 specific, actionable resolution strategies that consider each person's conflict style
-            2. Recommend how each person could adjust their approach for better outcomes
-            Keep your response concise, practical, and focused on de-escalation."""
+    def tokens(self):
+        """
+        Returns:
+            int: Estimated tokens of the current prompt
+        """
+        return self._template_tokens + self._summary_tokens + self._recent_tokens
 
-        # Generate response
-        response = client.models.generate_content(
-            model="gemini-2.0-flash", 
-            contents=prompt
-        )
-        return response.text
+    def prompt(self):
+        """
+        Returns:
+            str: Prompt text for the turns added so far
+        """
+        if self._prompt is None:
+            quoted = ''.join(turn[4] for turn in self._recent)
+            self._prompt = self.template.format(conversation_summary=self._summary + quoted)
+        return self._prompt
+
+    def _fold(self, turn):
+        person, tension, assertiveness, style, _, tokens = turn
+        self._recent_tokens -= tokens
+        self.summarized += 1
+        stats = self._people.get(person)
+        if stats is None:
+            stats = self._people[person] = {
+                'turns': 0, 'tension': 0.0, 'max_tension': tension,
+                'assertiveness': 0.0, 'max_assertiveness': assertiveness, 'styles': {}
+            }
+        stats['turns'] += 1
+        stats['tension'] += tension
+        stats['max_tension'] = max(stats['max_tension'], tension)
+        stats['assertiveness'] += assertiveness
+        stats['max_assertiveness'] = max(stats['max_assertiveness'], assertiveness)
+        stats['styles'][style] = stats['styles'].get(style, 0) + 1
+
+    def _render_summary(self):
+        """One line per person for every summarized turn, in order of first appearance."""
+        lines = [f"Turns 1-{self.summarized} (summarized per person):\n"]
+        for person, stats in self._people.items():
+            count = stats['turns']
+            styles = sorted(stats['styles'].items(), key=lambda item: -item[1])
+            lines.append(
+                f"  {person}: {count} turns, tension avg {stats['tension'] / count:.2f} "
+                f"(max {stats['max_tension']:.2f}), assertiveness avg {stats['assertiveness'] / count:.2f} "
+                f"(max {stats['max_assertiveness']:.2f}); styles: "
+                + ", ".join(f"{label.split(' (')[0]} x{n}" for label, n in styles) + "\n"
+            )
+        self._summary = ''.join(lines) + "\n"
+        self._summary_tokens = estimate_tokens(self._summary)
+
+
+class ResolutionService:
+    """
+    Asynchronous Gemini client for resolution suggestions.
+    
+    One genai client is created on first use and reused for every request
+    made from the same event loop; its connection pool belongs to that
+    loop, so a new loop (each asyncio.run) gets a new client.
+    At most max_concurrency requests are in flight, transient failures
+    (rate limiting, 5xx, timeouts, dropped connections) are retried with
+    jittered exponential backoff, and responses are cached by
+    resolution_key so identical conversations, including concurrent
+    duplicates within a batch, call the API once. Prompts are built by
+    PromptBuilder within token_budget. Pass base_url to point the client at
+    a local stub server.
+    """
+
+    def __init__(self, api_key, model=MODEL, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 max_retries=DEFAULT_MAX_RETRIES, cache=None, base_url=None, template=PROMPT_TEMPLATE,
+                 token_budget=PROMPT_TOKEN_BUDGET):
+        """
+        Args:
+            api_key: Google API key
+            model: Gemini model name
+            max_concurrency: Maximum number of requests in flight
+            max_retries: Retries after the first attempt for transient errors
+            cache: Optional ResolutionCache for responses
+            base_url: Override for the Gemini API endpoint
+            template: Prompt template with a {conversation_summary} field
+            token_budget: Estimated prompt token limit (None quotes every turn)
+        """
+        self.api_key = api_key
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.cache = cache
+        self.base_url = base_url
+        self.template = template
+        self.token_budget = token_budget
+        self._client = None
+        self._loop = None
+        self._semaphore = None
+        self._inflight = {}
+
+    @property
+    def client(self):
+        if self._client is None:
+            http_options = types.HttpOptions(base_url=self.base_url) if self.base_url else None
+            self._client = genai.Client(api_key=self.api_key, http_options=http_options)
+        return self._client
+
+    async def resolve(self, conversation_analysis, builder=None):
+        """
+        Generate (or fetch from cache) resolution suggestions for one conversation.
+        
+        Args:
+            conversation_analysis: List of dicts with person, text, tension, assertiveness, style
+            builder: Optional PromptBuilder already fed these turns, e.g. one kept
+                up to date as a live conversation grows; its prompt is used as is,
+                and its template and budget (not the service's) key the cache
         
-    except Exception as e:
-        return f"Error generating resolution: {e}\n\nPlease ensure you have set your GOOGLE_API_KEY environment variable or pass it directly."
\ No newline at end of file
+        Returns:
+            str: AI-generated resolution suggestions
+        
+        Raises:
+            google.genai.errors.APIError or a network error once retries are exhausted
+        """
+        self._bind_loop()
+        if builder is None:
+            key = resolution_key(conversation_analysis, self.model, self.template, self.token_budget)
+        else:
+            key = resolution_key(
+                conversation_analysis, self.model, builder.template, builder.token_budget, builder.min_recent_turns
+            )
+        if self.cache is not None:
+            text = self.cache.get(key)
+            if text is not None:
+                instrumentation.increment('resolution_cache.hit')
+                return text
+            instrumentation.increment('resolution_cache.miss')
+        
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._generate(self._build_prompt(conversation_analysis, builder)))
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(key, None))
+            text = await pending
+            if self.cache is not None:
+                self.cache.put(key, text)
+            return text
+        return await asyncio.shield(pending)
+
+    async def resolve_batch(self, conversation_analyses):
+        """
+        Resolve several conversations concurrently.
+        
+        Args:
+            conversation_analyses: List of conversation analyses
+        
+        Returns:
+            list: Resolution text for each conversation in input order, or the
+            exception that conversation failed with
+        """
+        return await asyncio.gather(
+            *[self.resolve(analysis) for analysis in conversation_analyses],
+            return_exceptions=True
+        )
+
+    def _build_prompt(self, conversation_analysis, builder):
+        """Build (or take from the builder) the prompt, reporting its size and build time."""
+        with instrumentation.stage('prompt'):
+            if builder is None:
+                builder = PromptBuilder(self.template, self.token_budget)
+                builder.extend(conversation_analysis)
+            prompt = builder.prompt()
+        instrumentation.emit(
+            'prompt',
+            tokens=builder.tokens(),
+            chars=len(prompt),
+            turns=builder.turns,
+            summarized_turns=builder.summarized
+        )
+        return prompt
+
+    async def _generate(self, prompt):
+        """Call the API under the concurrency limit, retrying transient failures."""
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    with instrumentation.stage('llm'):
+                        response = await self.client.aio.models.generate_content(
+                            model=self.model,
+                            contents=prompt
+                        )
+                return response.text
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_transient(e):
+                    raise
+                delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt) * random.uniform(0.5, 1.0)
+                attempt += 1
+                instrumentation.increment('llm_retries')
+                instrumentation.emit('llm_retry', attempt=attempt, delay=delay, error=str(e))
+                await asyncio.sleep(delay)
+
+    def _bind_loop(self):
+        # Semaphores, futures and the client's connections belong to one event loop; start fresh under a new one
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._client = None
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._inflight = {}
+
+
+def _is_transient(error):
+    if isinstance(error, errors.APIError):
+        return error.code in TRANSIENT_STATUS_CODES
+    return isinstance(error, (httpx.TransportError, ConnectionError, asyncio.TimeoutError))
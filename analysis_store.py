@@ -0,0 +1,343 @@
+import argparse
+import json
+import numbers
+import os
+import sqlite3
+import time
+
+from feature_cache import DEFAULT_CACHE_DIR
+from tki_mapper import STYLE_LABELS
+
+
+DEFAULT_STORE_PATH = os.environ.get('TKI_STORE_PATH', os.path.join(DEFAULT_CACHE_DIR, 'analysis.sqlite3'))
+
+_STYLE_CODES = {label: code for code, label in enumerate(STYLE_LABELS)}
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS styles (
+        code INTEGER PRIMARY KEY,
+        label TEXT NOT NULL UNIQUE
+    );
+    CREATE TABLE IF NOT EXISTS conversations (
+        id INTEGER PRIMARY KEY,
+        external_id TEXT NOT NULL UNIQUE,
+        recorded_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS conversations_recorded_at ON conversations (recorded_at);
+    CREATE TABLE IF NOT EXISTS turns (
+        id INTEGER PRIMARY KEY,
+        conversation_id INTEGER NOT NULL REFERENCES conversations (id) ON DELETE CASCADE,
+        turn_index INTEGER NOT NULL,
+        speaker TEXT NOT NULL,
+        text TEXT NOT NULL,
+        tension REAL NOT NULL,
+        assertiveness REAL NOT NULL,
+        style_code INTEGER NOT NULL REFERENCES styles (code),
+        recorded_at REAL NOT NULL,
+        features TEXT,
+        audio_skipped INTEGER NOT NULL DEFAULT 0,
+        UNIQUE (conversation_id, turn_index)
+    );
+    CREATE INDEX IF NOT EXISTS turns_speaker ON turns (speaker, recorded_at);
+    CREATE INDEX IF NOT EXISTS turns_style ON turns (style_code, recorded_at);
+    CREATE INDEX IF NOT EXISTS turns_recorded_at ON turns (recorded_at);
+    CREATE INDEX IF NOT EXISTS turns_tension ON turns (tension);
+    CREATE INDEX IF NOT EXISTS turns_assertiveness ON turns (assertiveness);
+"""
+
+
+class AnalysisStore:
+    """
+    SQLite store of analyzed conversations for queries across conversations.
+    
+    Each turn keeps its speaker, text, fused scores, TKI style code (see
+    tki_mapper.STYLE_LABELS, mirrored in the styles table), whether the
+    cascade skipped its audio (the scores are then estimates) and
+    optionally the text/prosody features behind the scores. Turns are indexed by
+    speaker, style, time and score, so dashboards can aggregate stored
+    results without touching audio. Storing a conversation again under the
+    same id replaces it, which keeps re-runs and resumed batches idempotent.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: Database file (default: TKI_STORE_PATH or ~/.cache/tki/analysis.sqlite3)
+        """
+        self.path = path or DEFAULT_STORE_PATH
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30)
+            self._conn.execute("PRAGMA foreign_keys = ON")
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.executescript(_SCHEMA)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(turns)")}
+            with self._conn:
+                if 'audio_skipped' not in columns:
+                    # Stores created before the column existed
+                    self._conn.execute("ALTER TABLE turns ADD COLUMN audio_skipped INTEGER NOT NULL DEFAULT 0")
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO styles (code, label) VALUES (?, ?)",
+                    list(enumerate(STYLE_LABELS))
+                )
+        return self._conn
+
+    def add_conversation(self, conversation_id, results, recorded_at=None):
+        """
+        Store one analyzed conversation.
+        
+        Args:
+            conversation_id: External identifier of the conversation
+            results: Per-turn dicts as returned by pipeline.analyze_conversation,
+                optionally with 'features'
+            recorded_at: Unix time of the conversation (default: now)
+        """
+        self.add_conversations([(conversation_id, results, recorded_at)])
+
+    def add_conversations(self, conversations):
+        """
+        Bulk insert analyzed conversations in one transaction.
+        
+        Args:
+            conversations: Iterable of (conversation_id, results, recorded_at) tuples;
+                recorded_at may be None for now
+        
+        Returns:
+            int: Number of turns stored
+        """
+        turn_rows = []
+        with self.conn:
+            for conversation_id, results, recorded_at in conversations:
+                recorded_at = time.time() if recorded_at is None else recorded_at
+                self.conn.execute("DELETE FROM conversations WHERE external_id = ?", (str(conversation_id),))
+                row_id = self.conn.execute(
+                    "INSERT INTO conversations (external_id, recorded_at) VALUES (?, ?)",
+                    (str(conversation_id), recorded_at)
+                ).lastrowid
+                for i, result in enumerate(results, 1):
+                    features = result.get('features')
+                    turn_rows.append((
+                        row_id, i, result['person'], result['text'],
+                        float(result['tension']), float(result['assertiveness']),
+                        _STYLE_CODES[result['style']], recorded_at,
+                        None if features is None else json.dumps(features),
+                        int(bool(result.get('audio_skipped')))
+                    ))
+            self.conn.executemany(
+                "INSERT INTO turns (conversation_id, turn_index, speaker, text, tension, assertiveness, "
+                "style_code, recorded_at, features, audio_skipped) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                turn_rows
+            )
+        return len(turn_rows)
+
+    def import_jsonl(self, path, recorded_at=None, batch_size=500):
+        """
+        Load per-turn records written by batch.py.
+        
+        Args:
+            path: JSONL file of batch records
+            recorded_at: Unix time of conversations whose records carry none (default: now)
+            batch_size: Conversations per transaction
+        
+        Returns:
+            int: Number of turns stored
+        """
+        stored = 0
+        pending = []
+        current_id, current_turns = None, []
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record['conversation_id'] != current_id and current_turns:
+                    pending.append((current_id, current_turns, current_turns[0].get('recorded_at', recorded_at)))
+                    current_turns = []
+                current_id = record['conversation_id']
+                current_turns.append(record)
+                if len(pending) >= batch_size:
+                    stored += self.add_conversations(pending)
+                    pending = []
+        if current_turns:
+            pending.append((current_id, current_turns, current_turns[0].get('recorded_at', recorded_at)))
+        if pending:
+            stored += self.add_conversations(pending)
+        return stored
+
+    def find_turns(self, speaker=None, style=None, since=None, until=None, min_tension=None,
+                   max_tension=None, min_assertiveness=None, max_assertiveness=None, limit=100):
+        """
+        Look up stored turns.
+        
+        Args:
+            speaker: Only this speaker
+            style: Only this style (label or code)
+            since: Only turns recorded at or after this Unix time
+            until: Only turns recorded before this Unix time
+            min_tension, max_tension: Inclusive tension range
+            min_assertiveness, max_assertiveness: Inclusive assertiveness range
+            limit: Maximum number of turns returned
+        
+        Returns:
+            list: Dicts with conversation_id, turn, person, text, tension,
+            assertiveness, style, recorded_at, features and audio_skipped
+        """
+        where, params = _filters(speaker, style, since, until)
+        for column, operator, value in [
+            ('t.tension', '>=', min_tension), ('t.tension', '<=', max_tension),
+            ('t.assertiveness', '>=', min_assertiveness), ('t.assertiveness', '<=', max_assertiveness)
+        ]:
+            if value is not None:
+                where.append(f"{column} {operator} ?")
+                params.append(value)
+        rows = self.conn.execute(
+            "SELECT c.external_id, t.turn_index, t.speaker, t.text, t.tension, t.assertiveness, "
+            "s.label, t.recorded_at, t.features, t.audio_skipped "
+            "FROM turns t JOIN conversations c ON c.id = t.conversation_id JOIN styles s ON s.code = t.style_code"
+            f"{_where_clause(where)} ORDER BY t.recorded_at, c.external_id, t.turn_index LIMIT ?",
+            params + [limit]
+        ).fetchall()
+        return [
+            {
+                'conversation_id': row[0],
+                'turn': row[1],
+                'person': row[2],
+                'text': row[3],
+                'tension': row[4],
+                'assertiveness': row[5],
+                'style': row[6],
+                'recorded_at': row[7],
+                'features': None if row[8] is None else json.loads(row[8]),
+                'audio_skipped': bool(row[9])
+            }
+            for row in rows
+        ]
+
+    def style_distribution(self, speaker=None, since=None, until=None):
+        """
+        Count turns per style for each speaker.
+        
+        Args:
+            speaker: Only this speaker
+            since: Only turns recorded at or after this Unix time
+            until: Only turns recorded before this Unix time
+        
+        Returns:
+            dict: {speaker: {style label: turn count}}
+        """
+        where, params = _filters(speaker, None, since, until)
+        distribution = {}
+        for person, label, count in self.conn.execute(
+            "SELECT t.speaker, s.label, COUNT(*) FROM turns t JOIN styles s ON s.code = t.style_code"
+            f"{_where_clause(where)} GROUP BY t.speaker, t.style_code ORDER BY t.speaker, t.style_code",
+            params
+        ):
+            distribution.setdefault(person, {})[label] = count
+        return distribution
+
+    def weekly_averages(self, speaker=None, since=None, until=None):
+        """
+        Average scores per calendar week (weeks start on Monday, UTC).
+        
+        Args:
+            speaker: Only this speaker
+            since: Only turns recorded at or after this Unix time
+            until: Only turns recorded before this Unix time
+        
+        Returns:
+            list: Dicts with week (date of its Monday), turns, tension and assertiveness
+        """
+        where, params = _filters(speaker, None, since, until)
+        week = "date(t.recorded_at, 'unixepoch', 'weekday 0', '-6 days')"
+        rows = self.conn.execute(
+            f"SELECT {week} AS week, COUNT(*), AVG(t.tension), AVG(t.assertiveness) FROM turns t"
+            f"{_where_clause(where)} GROUP BY week ORDER BY week",
+            params
+        ).fetchall()
+        return [
+            {'week': row[0], 'turns': row[1], 'tension': row[2], 'assertiveness': row[3]}
+            for row in rows
+        ]
+
+    def stats(self):
+        """
+        Returns:
+            dict: path, conversations and turns
+        """
+        conversations = self.conn.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+        turns = self.conn.execute("SELECT COUNT(*) FROM turns").fetchone()[0]
+        return {'path': self.path, 'conversations': conversations, 'turns': turns}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        return state
+
+
+def _filters(speaker, style, since, until):
+    where, params = [], []
+    if speaker is not None:
+        where.append("t.speaker = ?")
+        params.append(speaker)
+    if style is not None:
+        where.append("t.style_code = ?")
+        params.append(int(style) if isinstance(style, numbers.Integral) else _STYLE_CODES[style])
+    if since is not None:
+        where.append("t.recorded_at >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("t.recorded_at < ?")
+        params.append(until)
+    return where, params
+
+
+def _where_clause(where):
+    return " WHERE " + " AND ".join(where) if where else ""
+
+
+def main():
+    """Command line entry point to load batch results and run aggregate queries."""
+    parser = argparse.ArgumentParser(description="Store and query analyzed conversations.")
+    parser.add_argument('--db', default=None, help="Database file (default: TKI_STORE_PATH or ~/.cache/tki/analysis.sqlite3)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    import_parser = subparsers.add_parser('import', help="Load a batch.py JSONL output file")
+    import_parser.add_argument('jsonl')
+    styles_parser = subparsers.add_parser('styles', help="Style distribution per speaker")
+    styles_parser.add_argument('--speaker', default=None)
+    weekly_parser = subparsers.add_parser('weekly', help="Average tension and assertiveness per week")
+    weekly_parser.add_argument('--speaker', default=None)
+    subparsers.add_parser('stats', help="Number of stored conversations and turns")
+    args = parser.parse_args()
+    
+    store = AnalysisStore(args.db)
+    if args.command == 'import':
+        print(f"Stored {store.import_jsonl(args.jsonl)} turns from {args.jsonl}")
+    elif args.command == 'styles':
+        for person, counts in store.style_distribution(args.speaker).items():
+            total = sum(counts.values())
+            print(f"{person} ({total} turns)")
+            for label, count in counts.items():
+                print(f"  {label:<48}{count:>7}  {count / total:6.1%}")
+    elif args.command == 'weekly':
+        print(f"{'week of':<12}{'turns':>8}{'tension':>10}{'assert.':>10}")
+        for row in store.weekly_averages(args.speaker):
+            print(f"{row['week']:<12}{row['turns']:>8}{row['tension']:>10.3f}{row['assertiveness']:>10.3f}")
+    else:
+        stats = store.stats()
+        print(f"Store: {stats['path']}")
+        print(f"  Conversations: {stats['conversations']}, turns: {stats['turns']}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
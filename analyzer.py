@@ -1,26 +1,186 @@
-from audio_analyzer import analyze_prosody
+import os
+
+import instrumentation
 from text_analyzer import analyze_sentiment
+from tki_mapper import styles_in_range
+
+
+# Prosody scores used when a turn has no audio, as analyze_prosody(None) returns
+NO_AUDIO_SCORES = (0.0, 0.5)
+
+# Fusion weights of the text and audio scores
+TEXT_WEIGHT = 0.4
+AUDIO_WEIGHT = 0.6
+
+# Range of prosody scores as ((tension low, high), (assertiveness low, high))
+FULL_AUDIO_BOUNDS = ((0.0, 1.0), (0.0, 1.0))
+
 
+def _parse_bounds(value):
+    t_low, t_high, a_low, a_high = (float(part) for part in value.split(','))
+    return (t_low, t_high), (a_low, a_high)
 
-def compute_tension_and_assertiveness(text, audio_path):
+
+# Audio bounds the cascade assumes, as "t_low,t_high,a_low,a_high" (see calibrate_audio_bounds).
+# There is no calibrated default: over the full range the audio can always change the style, so
+# the cascade never skips until TKI_CASCADE_BOUNDS is set (benchmark.py --cascade suggests values).
+CASCADE_AUDIO_BOUNDS = (
+    _parse_bounds(os.environ['TKI_CASCADE_BOUNDS']) if os.environ.get('TKI_CASCADE_BOUNDS') else FULL_AUDIO_BOUNDS
+)
+
+
+def compute_tension_and_assertiveness(text, audio_path, cache=None, text_only=False, audio_bounds=None,
+                                      return_skipped=False):
     """
     Computes final tension and assertiveness scores by fusing audio and text analysis.
     
+    With audio_bounds the scoring cascades: the text is scored first, and
+    the audio is only analyzed if some prosody score inside the bounds could
+    change the fused TKI style. A skipped turn is fused with the middle of
+    the bounds, so its style is the one every score in the bounds gives,
+    while its tension and assertiveness are estimates.
+    
     Args:
         text: Text string to analyze
-        audio_path: Path to audio file
-        
+        audio_path: Path to audio file, or a decoded (y, sr) or (y, sr, native_sr) signal
+        cache: Optional FeatureCache for prosody features
+        text_only: Ignore audio_path and never load the audio stack (librosa)
+        audio_bounds: Prosody scores the cascade assumes possible, as
+            ((tension low, high), (assertiveness low, high)); None always analyzes the audio
+        return_skipped: Also return whether the cascade skipped the audio
+    
     Returns:
-        tuple: (tension, assertiveness) scores between 0 and 1
+        tuple: (tension, assertiveness) scores between 0 and 1, or
+        (tension, assertiveness, audio_skipped) with return_skipped
     """
-    print(f"  Analyzing: '{text[:60]}...'")
+    instrumentation.emit('analyzing', text=text)
     
     text_tension, text_assertiveness = analyze_sentiment(text)
-    audio_tension, audio_assertiveness = analyze_prosody(audio_path)
+    style = None
+    if audio_bounds is not None and not text_only and audio_path is not None:
+        style = cascade_style(text_tension, text_assertiveness, audio_bounds)
+        instrumentation.increment('cascade.skipped' if style is not None else 'cascade.analyzed')
+    
+    if text_only or audio_path is None:
+        audio_tension, audio_assertiveness = NO_AUDIO_SCORES
+    elif style is not None:
+        (t_low, t_high), (a_low, a_high) = audio_bounds
+        audio_tension, audio_assertiveness = (t_low + t_high) / 2, (a_low + a_high) / 2
+        instrumentation.emit('cascade_skip', style=style)
+    else:
+        # Imported on first use so text-only runs never pay for librosa
+        from audio_analyzer import analyze_prosody
+        audio_tension, audio_assertiveness = analyze_prosody(audio_path, cache=cache)
     
-    final_tension = (0.4 * text_tension) + (0.6 * audio_tension)
-    final_assertiveness = (0.4 * text_assertiveness) + (0.6 * audio_assertiveness)
+    with instrumentation.stage('fusion'):
+        final_tension = (TEXT_WEIGHT * text_tension) + (AUDIO_WEIGHT * audio_tension)
+        final_assertiveness = (TEXT_WEIGHT * text_assertiveness) + (AUDIO_WEIGHT * audio_assertiveness)
     
-    print(f"    [FINAL] Tension: {final_tension:.3f}, Assertiveness: {final_assertiveness:.3f}\n")
+    instrumentation.emit('fusion', tension=final_tension, assertiveness=final_assertiveness)
+    
+    if return_skipped:
+        return round(final_tension, 2), round(final_assertiveness, 2), style is not None
+    return round(final_tension, 2), round(final_assertiveness, 2)
+
+
+def fuse_scores(text_tension, text_assertiveness, audio_tension, audio_assertiveness,
+                text_weight=TEXT_WEIGHT, audio_weight=AUDIO_WEIGHT, decimals=2):
+    """
+    Vectorized fusion of many turns' text and audio scores.
+    
+    Args:
+        text_tension: Array of text tension scores
+        text_assertiveness: Array of text assertiveness scores
+        audio_tension: Array of audio tension scores
+        audio_assertiveness: Array of audio assertiveness scores
+        text_weight: Weight of the text scores
+        audio_weight: Weight of the audio scores
+        decimals: Round the fused scores like compute_tension_and_assertiveness (None keeps full precision)
+    
+    Returns:
+        tuple: (tension, assertiveness) float64 arrays
+    """
+    import numpy as np
+    
+    with instrumentation.stage('fusion'):
+        tension = (
+            text_weight * np.asarray(text_tension, dtype=np.float64)
+            + audio_weight * np.asarray(audio_tension, dtype=np.float64)
+        )
+        assertiveness = (
+            text_weight * np.asarray(text_assertiveness, dtype=np.float64)
+            + audio_weight * np.asarray(audio_assertiveness, dtype=np.float64)
+        )
+        if decimals is not None:
+            tension = _round_like_builtin(tension, decimals)
+            assertiveness = _round_like_builtin(assertiveness, decimals)
+    return tension, assertiveness
+
+
+def _round_like_builtin(values, decimals):
+    """
+    np.round with the results of round() for every element.
+    
+    np.round scales by 10 ** decimals before rounding, which can push a
+    value just below a half over it (0.9949999999999999 becomes 1.0, where
+    round() gives 0.99). Values that close to a tie are rounded again with
+    round(), which rounds the exact binary value.
+    """
+    import numpy as np
+    
+    rounded = np.round(values, decimals)
+    scaled = values * 10.0 ** decimals
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for index in np.flatnonzero(near_tie):
+        rounded.flat[index] = round(float(values.flat[index]), decimals)
+    return rounded
+
+
+def cascade_style(text_tension, text_assertiveness, audio_bounds=FULL_AUDIO_BOUNDS):
+    """
+    The fused TKI style if the text scores settle it for every prosody score in audio_bounds.
+    
+    Fusion and rounding are monotone in the audio scores, so the fused
+    scores of the bound corners enclose every outcome; the style is settled
+    when styles_in_range finds a single style over that rectangle. Over the
+    full [0, 1] range the audio weight always leaves the style open, so the
+    cascade only skips audio with narrower, calibrated bounds.
+    
+    Args:
+        text_tension: Text tension score
+        text_assertiveness: Text assertiveness score
+        audio_bounds: ((tension low, high), (assertiveness low, high)) prosody scores
+    
+    Returns:
+        str or None: Style description, or None if the audio could change it
+    """
+    (t_low, t_high), (a_low, a_high) = audio_bounds
+    tension_range = (
+        round(TEXT_WEIGHT * text_tension + AUDIO_WEIGHT * t_low, 2),
+        round(TEXT_WEIGHT * text_tension + AUDIO_WEIGHT * t_high, 2)
+    )
+    assertiveness_range = (
+        round(TEXT_WEIGHT * text_assertiveness + AUDIO_WEIGHT * a_low, 2),
+        round(TEXT_WEIGHT * text_assertiveness + AUDIO_WEIGHT * a_high, 2)
+    )
+    styles = styles_in_range(tension_range, assertiveness_range)
+    return styles.pop() if len(styles) == 1 else None
+
+
+def calibrate_audio_bounds(audio_scores, coverage=0.98):
+    """
+    Cascade bounds covering the central share of observed prosody scores.
+    
+    Args:
+        audio_scores: List of (tension, assertiveness) prosody scores
+        coverage: Share of each score's values inside its bounds (1.0 takes min and max)
+    
+    Returns:
+        tuple: ((tension low, high), (assertiveness low, high))
+    """
+    import numpy as np
     
-    return round(final_tension, 2), round(final_assertiveness, 2)
\ No newline at end of file
+    scores = np.asarray(audio_scores, dtype=np.float64).reshape(-1, 2)
+    tail = (1.0 - coverage) / 2
+    low, high = np.quantile(scores, [tail, 1.0 - tail], axis=0)
+    return (float(low[0]), float(high[0])), (float(low[1]), float(high[1]))
@@ -1,13 +1,52 @@
+import os
+
 import librosa
 import numpy as np
+import scipy.fft
+import soundfile as sf
+
+import instrumentation
+from audio_loader import DecodedAudioCache, load_audio
+
+
+N_FFT = 2048
+HOP_LENGTH = 512
+ZCR_THRESHOLD = 1e-10
+
+# Recordings longer than this are analyzed block-wise so memory stays bounded
+BLOCKWISE_MIN_SECONDS = 600
+
+# Bump whenever feature extraction changes so cached features are invalidated
+FEATURE_VERSION = 2
+
+# Rate audio is resampled to while decoding (None analyzes at the native rate).
+# This changes scores. Frames are rescaled to span the same time as at the native rate (see
+# frame_lengths), but tension still moves by up to about 0.07 at 16000, and the spectral centroid
+# loses everything above sr / 2, which can flip the assertiveness of wideband recordings
+# (1 of 48 files in benchmark.py --drift-sr 16000 --profile full changes style).
+ANALYSIS_SR = int(os.environ['TKI_ANALYSIS_SR']) if os.environ.get('TKI_ANALYSIS_SR') else None
+
+# Pitch estimator: 'piptrack' (librosa, every frame) or 'yin' (pitch_tracker, energy-gated frames only).
+# The two measure pitch differently, so scores are only comparable within one backend.
+PITCH_BACKENDS = ('piptrack', 'yin')
+PITCH_BACKEND = os.environ.get('TKI_PITCH_BACKEND') or 'piptrack'
+
+# Decoded signals are kept here when TKI_DECODE_CACHE_DIR is set
+_decode_cache = None
 
 
-def analyze_prosody(audio_path):
+def analyze_prosody(audio_path, cache=None):
     """
     Analyze audio prosody to determine tension and assertiveness.
     
     Args:
-        audio_path: Path to audio file
+        audio_path: Path to audio file, or an already decoded (y, sr) signal
+            such as one turn of a longer recording (never cached). A signal
+            resampled from its recording can be given as (y, sr, native_sr)
+            to get the frame sizes the file itself would be analyzed with
+            (see frame_lengths)
+        cache: Optional FeatureCache; decoded features are reused when the
+            file content and analysis parameters are unchanged
         
     Returns:
         tuple: (tension, assertiveness) scores between 0 and 1
@@ -16,109 +55,409 @@ def analyze_prosody(audio_path):
         return 0.0, 0.5
     
     try:
-        y, sr = librosa.load(audio_path, sr=None)
-        
-        # 1. Pitch analysis
-        pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-        pitch_values = []
-        for t in range(pitches.shape[1]):
-            index = magnitudes[:, t].argmax()
-            pitch = pitches[index, t]
-            if pitch > 0:
-                pitch_values.append(pitch)
-        pitch_values = np.array(pitch_values)
-        
-        if len(pitch_values) > 0:
-            pitch_std = np.std(pitch_values)
-        else:
-            pitch_std = 0
-        
-        # 2. RMS Energy frame-by-frame
-        rms = librosa.feature.rms(y=y)[0]
-        energy_mean = np.mean(rms)
-        energy_std = np.std(rms)
-        
-        # 3. Detect pauses/silence
-        energy_threshold = energy_mean * 0.4
-        low_energy_frames = np.sum(rms < energy_threshold)
-        silence_ratio = low_energy_frames / len(rms)
-        
-        # 4. Speech continuity
-        speech_frames = np.sum(rms > energy_mean * 0.2)
-        speech_ratio = speech_frames / len(rms)
-        
-        # 5. Speaking rate
-        zcr = np.mean(librosa.feature.zero_crossing_rate(y))
-        
-        # 6. Spectral features
-        spectral_centroid = np.mean(librosa.feature.spectral_centroid(y=y, sr=sr))
-        
-        # 7. Sustained energy
-        high_energy_threshold = energy_mean * 1.5
-        sustained_energy_frames = 0
-        current_streak = 0
-        for val in rms:
-            if val > high_energy_threshold:
-                current_streak += 1
-            else:
-                sustained_energy_frames = max(sustained_energy_frames, current_streak)
-                current_streak = 0
-        sustained_energy_ratio = sustained_energy_frames / len(rms)
-        
-        # Calculate assertiveness
-        energy_score = min(energy_mean / 0.08, 1.0)
-        sustained_score = min(sustained_energy_ratio / 0.3, 1.0)
-        
-        assertiveness = (
-            0.40 * energy_score +
-            0.30 * sustained_score +
-            0.20 * speech_ratio +
-            0.10 * (1 - silence_ratio)
+        if isinstance(audio_path, tuple):
+            y, sr, native_sr = audio_path if len(audio_path) == 3 else (*audio_path, None)
+            return score_prosody(extract_prosody_features(y, sr, None, *frame_lengths(sr, native_sr)))
+        
+        features = None
+        if cache is not None:
+            key = cache.key_for(audio_path, analysis_params())
+            features = cache.get(key)
+            instrumentation.increment('feature_cache.miss' if features is None else 'feature_cache.hit')
+        
+        if features is None:
+            features = extract_file_features(audio_path, ANALYSIS_SR)
+            if cache is not None:
+                cache.put(key, features)
+        
+        return score_prosody(features)
+        
+    except Exception as e:
+        instrumentation.increment('audio_errors')
+        instrumentation.emit('audio_error', path=None if isinstance(audio_path, tuple) else audio_path, error=str(e))
+        return 0.0, 0.5
+
+
+def extract_file_features(audio_path, sr=None, pitch_backend=None):
+    """
+    Decode a file and extract its prosody features, switching to block-wise
+    analysis for long recordings.
+    
+    Args:
+        audio_path: Path to audio file
+        sr: Analysis sampling rate applied while decoding (None keeps the native rate)
+        pitch_backend: One of PITCH_BACKENDS (default: PITCH_BACKEND), for either path
+        
+    Returns:
+        dict: Same keys as extract_prosody_features
+    """
+    try:
+        info = sf.info(audio_path)
+        duration, native_sr = info.duration, info.samplerate
+    except RuntimeError:
+        # Not readable by soundfile; librosa falls back to its other decoders
+        duration = 0
+        native_sr = librosa.get_samplerate(audio_path) if sr is not None else None
+    n_fft, hop_length = frame_lengths(sr, native_sr)
+    
+    if duration > BLOCKWISE_MIN_SECONDS:
+        from block_analyzer import extract_prosody_features_blockwise
+        return extract_prosody_features_blockwise(
+            audio_path, sr=sr, pitch_backend=pitch_backend, n_fft=n_fft, hop_length=hop_length
         )
+    
+    with instrumentation.stage('decode'):
+        y, sr = load_audio(audio_path, sr=sr, decode_cache=_get_decode_cache())
+    return extract_prosody_features(y, sr, pitch_backend, n_fft, hop_length)
+
+
+def frame_lengths(sr, native_sr):
+    """
+    Frame and hop size for analysis at sr of audio recorded at native_sr.
+    
+    N_FFT and HOP_LENGTH are in samples at the native rate; resampled audio
+    gets proportionally shorter (or longer) frames covering about the same
+    time, so spectral and energy statistics hardly depend on the analysis rate.
+    
+    Args:
+        sr: Analysis sampling rate (None analyzes at the native rate)
+        native_sr: Sampling rate of the recording
         
-        # Penalize stuttering/pauses
-        if silence_ratio > 0.3:
-            assertiveness *= 0.5
+    Returns:
+        tuple: (n_fft, hop_length)
+    """
+    if sr is None or native_sr is None or sr == native_sr:
+        return N_FFT, HOP_LENGTH
+    scale = sr / native_sr
+    # Rounded up to a length with only small prime factors; an FFT of prime length is several times slower
+    n_fft = scipy.fft.next_fast_len(max(int(round(N_FFT * scale)), 16), real=True)
+    return n_fft, max(int(round(HOP_LENGTH * scale)), 1)
+
+
+def _get_decode_cache():
+    global _decode_cache
+    if _decode_cache is None and os.environ.get('TKI_DECODE_CACHE_DIR'):
+        _decode_cache = DecodedAudioCache(os.environ['TKI_DECODE_CACHE_DIR'])
+    return _decode_cache
+
+
+def analysis_params():
+    """
+    Parameters that determine the extracted features, used to key cached results.
+    
+    Returns:
+        dict: Analysis parameters
+    """
+    return {
+        'sr': ANALYSIS_SR,
+        'n_fft': N_FFT,
+        'hop_length': HOP_LENGTH,
+        'pitch_backend': PITCH_BACKEND,
+        'version': FEATURE_VERSION
+    }
+
+
+def extract_prosody_features(y, sr, pitch_backend=None, n_fft=N_FFT, hop_length=HOP_LENGTH):
+    """
+    Reduce a signal to the prosody statistics used for scoring.
+    
+    Args:
+        y: Audio time series
+        sr: Sampling rate of y
+        pitch_backend: One of PITCH_BACKENDS (default: PITCH_BACKEND, set by TKI_PITCH_BACKEND)
+        n_fft: Frame length / FFT size
+        hop_length: Number of samples between frames
+        
+    Returns:
+        dict: pitch_std, energy_mean, energy_std, silence_ratio, speech_ratio,
+        zcr, spectral_centroid and sustained_energy_ratio
+    """
+    pitch_backend = check_pitch_backend(pitch_backend)
+    frame_features = compute_frame_features(y, sr, n_fft, hop_length, pitch=pitch_backend == 'piptrack')
+    if pitch_backend == 'yin':
+        from pitch_tracker import yin_pitch_values
+        pitch_values = yin_pitch_values(y, sr, frame_features['rms'], hop_length)
+    else:
+        pitch_track = dominant_pitch_track(frame_features['pitches'], frame_features['magnitudes'])
+        pitch_values = pitch_track[pitch_track > 0]
+    
+    return summarize_prosody(
+        pitch_values,
+        frame_features['rms'],
+        frame_features['zcr'],
+        frame_features['spectral_centroid']
+    )
+
+
+def check_pitch_backend(pitch_backend=None):
+    """
+    Args:
+        pitch_backend: Backend name, or None for PITCH_BACKEND
         
-        # Calculate tension
-        pitch_var_score = min(pitch_std / 50.0, 1.0)
-        energy_var_score = min(energy_std / 0.05, 1.0)
+    Returns:
+        str: The backend to use
         
-        weighted_pitch_var = pitch_var_score * min(energy_score * 1.5, 1.0)
-        weighted_energy_var = energy_var_score * min(energy_score * 1.5, 1.0)
+    Raises:
+        ValueError: If the name is not one of PITCH_BACKENDS
+    """
+    pitch_backend = pitch_backend or PITCH_BACKEND
+    if pitch_backend not in PITCH_BACKENDS:
+        raise ValueError(f"Unknown pitch backend {pitch_backend!r}; expected one of {', '.join(PITCH_BACKENDS)}")
+    return pitch_backend
+
+
+def summarize_prosody(pitch_values, rms, zcr, spectral_centroid):
+    """
+    Reduce per-frame features to the prosody statistics used for scoring.
+    
+    Args:
+        pitch_values: Dominant pitch of each voiced frame
+        rms: Per-frame RMS energy
+        zcr: Per-frame zero crossing rate
+        spectral_centroid: Per-frame spectral centroid
         
-        tension = (
-            0.20 * energy_score +
-            0.30 * weighted_pitch_var +
-            0.30 * weighted_energy_var +
-            0.10 * min(zcr / 0.15, 1.0) +
-            0.10 * min(spectral_centroid / 3000.0, 1.0)
+    Returns:
+        dict: pitch_std, energy_mean, energy_std, silence_ratio, speech_ratio,
+        zcr, spectral_centroid and sustained_energy_ratio
+    """
+    # 1. Pitch analysis
+    if len(pitch_values) > 0:
+        pitch_std = np.std(pitch_values)
+    else:
+        pitch_std = 0
+    
+    # 2. RMS Energy frame-by-frame
+    energy_mean = np.mean(rms)
+    energy_std = np.std(rms)
+    
+    # 3. Detect pauses/silence
+    energy_threshold = energy_mean * 0.4
+    low_energy_frames = np.sum(rms < energy_threshold)
+    silence_ratio = low_energy_frames / len(rms)
+    
+    # 4. Speech continuity
+    speech_frames = np.sum(rms > energy_mean * 0.2)
+    speech_ratio = speech_frames / len(rms)
+    
+    # 5. Speaking rate
+    zcr = np.mean(zcr)
+    
+    # 6. Spectral features
+    spectral_centroid = np.mean(spectral_centroid)
+    
+    # 7. Sustained energy
+    high_energy_threshold = energy_mean * 1.5
+    sustained_energy_frames = _longest_terminated_run(rms > high_energy_threshold)
+    sustained_energy_ratio = sustained_energy_frames / len(rms)
+    
+    return {
+        'pitch_std': pitch_std,
+        'energy_mean': energy_mean,
+        'energy_std': energy_std,
+        'silence_ratio': silence_ratio,
+        'speech_ratio': speech_ratio,
+        'zcr': zcr,
+        'spectral_centroid': spectral_centroid,
+        'sustained_energy_ratio': sustained_energy_ratio
+    }
+
+
+def score_prosody(features, debug=True):
+    """
+    Compute tension and assertiveness from extracted prosody features.
+    
+    Args:
+        features: Dict returned by extract_prosody_features
+        debug: Emit the intermediate prosody values as a 'prosody' event
+        
+    Returns:
+        tuple: (tension, assertiveness) scores between 0 and 1
+    """
+    pitch_std = features['pitch_std']
+    energy_mean = features['energy_mean']
+    energy_std = features['energy_std']
+    silence_ratio = features['silence_ratio']
+    speech_ratio = features['speech_ratio']
+    zcr = features['zcr']
+    spectral_centroid = features['spectral_centroid']
+    sustained_energy_ratio = features['sustained_energy_ratio']
+    energy_threshold = energy_mean * 0.4
+    
+    # Calculate assertiveness
+    energy_score = min(energy_mean / 0.08, 1.0)
+    sustained_score = min(sustained_energy_ratio / 0.3, 1.0)
+    
+    assertiveness = (
+        0.40 * energy_score +
+        0.30 * sustained_score +
+        0.20 * speech_ratio +
+        0.10 * (1 - silence_ratio)
+    )
+    
+    # Penalize stuttering/pauses
+    if silence_ratio > 0.3:
+        assertiveness *= 0.5
+    
+    # Calculate tension
+    pitch_var_score = min(pitch_std / 50.0, 1.0)
+    energy_var_score = min(energy_std / 0.05, 1.0)
+    
+    weighted_pitch_var = pitch_var_score * min(energy_score * 1.5, 1.0)
+    weighted_energy_var = energy_var_score * min(energy_score * 1.5, 1.0)
+    
+    tension = (
+        0.20 * energy_score +
+        0.30 * weighted_pitch_var +
+        0.30 * weighted_energy_var +
+        0.10 * min(zcr / 0.15, 1.0) +
+        0.10 * min(spectral_centroid / 3000.0, 1.0)
+    )
+    
+    if debug:
+        instrumentation.emit(
+            'prosody',
+            pitch_std=pitch_std,
+            energy_mean=energy_mean,
+            energy_std=energy_std,
+            silence_ratio=silence_ratio,
+            energy_threshold=energy_threshold,
+            speech_ratio=speech_ratio,
+            sustained_energy_ratio=sustained_energy_ratio,
+            zcr=zcr,
+            spectral_centroid=spectral_centroid,
+            weighted_pitch_var=weighted_pitch_var,
+            weighted_energy_var=weighted_energy_var,
+            tension=tension,
+            assertiveness=assertiveness
         )
+    
+    return tension, assertiveness
+
+
+def compute_frame_features(y, sr, n_fft=N_FFT, hop_length=HOP_LENGTH, pitch=True):
+    """
+    Frame and transform a signal once and derive every per-frame feature from it.
+    
+    The centered frames feed both the RMS/ZCR computations and a single
+    magnitude STFT, which is then shared by pitch tracking and the spectral
+    centroid. Values match the individual librosa feature calls.
+    
+    Args:
+        y: Audio time series
+        sr: Sampling rate of y
+        n_fft: Frame length / FFT size
+        hop_length: Number of samples between frames
+        pitch: Run piptrack; without it 'pitches' and 'magnitudes' are left out
         
-        _print_debug_info(pitch_std, energy_mean, energy_std, 
-                         silence_ratio, energy_threshold, 
-                         speech_ratio, sustained_energy_ratio, 
-                         weighted_pitch_var, weighted_energy_var, 
-                         tension, assertiveness)
+    Returns:
+        dict: 'pitches' and 'magnitudes' (bins x frames), plus per-frame
+        'rms', 'zcr' and 'spectral_centroid' arrays
+    """
+    padded = np.pad(y, n_fft // 2, mode='constant')
+    frames = librosa.util.frame(padded, frame_length=n_fft, hop_length=hop_length)
+    
+    frame_features = compute_spectral_features(frames, sr, pitch=pitch)
+    frame_features['zcr'] = _zero_crossing_rate(y, frames.shape[1], n_fft, hop_length)
+    return frame_features
+
+
+def compute_spectral_features(frames, sr, pitch=True):
+    """
+    Per-frame features that only depend on the samples inside each frame.
+    
+    Every column is processed independently, so frames can be fed in any
+    grouping (a whole clip, a block, or a live chunk) with identical results.
+    
+    Args:
+        frames: Framed audio (frame_length x frames)
+        sr: Sampling rate
+        pitch: Run piptrack; without it 'pitches' and 'magnitudes' are left out
         
-        return tension, assertiveness
+    Returns:
+        dict: 'pitches' and 'magnitudes' (bins x frames), plus per-frame
+        'rms' and 'spectral_centroid' arrays
+    """
+    n_fft = frames.shape[0]
+    with instrumentation.stage('stft'):
+        S = np.abs(_stft_frames(frames, n_fft, librosa.util.dtype_r2c(frames.dtype)))
+    features = {}
+    if pitch:
+        with instrumentation.stage('pitch'):
+            features['pitches'], features['magnitudes'] = librosa.piptrack(S=S, sr=sr, n_fft=n_fft)
+    with instrumentation.stage('centroid'):
+        features['spectral_centroid'] = librosa.feature.spectral_centroid(S=S, sr=sr, n_fft=n_fft)[0]
+    
+    with instrumentation.stage('energy'):
+        features['rms'] = np.sqrt(np.mean(librosa.util.abs2(frames), axis=0))
+    
+    return features
+
+
+def _stft_frames(frames, n_fft, dtype):
+    """Hann-windowed real FFT of pre-framed audio, computed in memory-bounded column blocks."""
+    fft = librosa.get_fftlib()
+    window = librosa.filters.get_window('hann', n_fft, fftbins=True)[:, np.newaxis]
+    stft_matrix = np.zeros((1 + n_fft // 2, frames.shape[1]), dtype=dtype, order='F')
+    
+    n_columns = max(int(librosa.util.MAX_MEM_BLOCK // (n_fft * frames.itemsize)), 1)
+    for start in range(0, frames.shape[1], n_columns):
+        stop = min(start + n_columns, frames.shape[1])
+        stft_matrix[:, start:stop] = fft.rfft(window * frames[:, start:stop], axis=0)
+    return stft_matrix
+
+
+def _zero_crossing_rate(y, n_frames, frame_length, hop_length):
+    """
+    Per-frame zero crossing rate from one pass over the signal.
+    
+    Matches librosa.feature.zero_crossing_rate: edge padding never adds a
+    crossing, so crossings are counted once on the raw signal and summed per
+    frame through a cumulative sum.
+    """
+    negative = np.signbit(y) & (np.abs(y) > ZCR_THRESHOLD)
+    crossings = negative[1:] != negative[:-1]
+    
+    pad = frame_length // 2
+    cumulative = np.zeros(len(crossings) + 2 * pad + 1, dtype=np.int64)
+    np.cumsum(crossings, out=cumulative[pad + 1:pad + 1 + len(crossings)])
+    cumulative[pad + 1 + len(crossings):] = cumulative[pad + len(crossings)]
+    
+    starts = np.arange(n_frames) * hop_length
+    return (cumulative[starts + frame_length - 1] - cumulative[starts]) / frame_length
+
+
+def dominant_pitch_track(pitches, magnitudes):
+    """
+    Pitch of the strongest bin in every frame.
+    
+    Args:
+        pitches: Pitch matrix from piptrack (bins x frames)
+        magnitudes: Magnitude matrix from piptrack (bins x frames)
         
-    except Exception as e:
-        print(f"Audio error: {e}")
-        return 0.0, 0.5
+    Returns:
+        np.ndarray: Dominant pitch per frame, 0 for unvoiced frames
+    """
+    index = magnitudes.argmax(axis=0)
+    return pitches[index, np.arange(pitches.shape[1])]
 
 
-def _print_debug_info(pitch_std, energy_mean, energy_std, 
-                     silence_ratio, energy_threshold, 
-                     speech_ratio, sustained_energy_ratio, 
-                     weighted_pitch_var, weighted_energy_var, 
-                     tension, assertiveness):
-    """Print detailed prosody analysis debug information."""
-    print(f"    [Prosody Debug]")
-    print(f"      Pitch:std: {pitch_std:.1f}")
-    print(f"      Energy: mean={energy_mean:.4f}, std={energy_std:.4f}")
-    print(f"      Silence ratio: {silence_ratio:.3f} (threshold: {energy_threshold:.4f})")
-    print(f"      Speech ratio: {speech_ratio:.3f}")
-    print(f"      Sustained energy ratio: {sustained_energy_ratio:.3f}")
-    print(f"      Weighted variance - Pitch: {weighted_pitch_var:.3f}, Energy: {weighted_energy_var:.3f}")
-    print(f"    [Prosody] Tension: {tension:.3f}, Assertiveness: {assertiveness:.3f}")
\ No newline at end of file
+def _longest_terminated_run(mask):
+    """
+    Length of the longest run of True values that is followed by a False value.
+    
+    A run still open at the final frame is not counted, matching the original
+    streak loop which only recorded a streak once it was broken.
+    
+    Args:
+        mask: Boolean array, one value per frame
+        
+    Returns:
+        int: Longest terminated run length (0 if there is none)
+    """
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    terminated = ends < len(mask)
+    if not terminated.any():
+        return 0
+    return int(np.max(ends[terminated] - starts[terminated]))
@@ -0,0 +1,247 @@
+import glob
+import hashlib
+import os
+import struct
+
+import numpy as np
+
+
+DEFAULT_DECODE_CACHE_DIR = os.environ.get('TKI_DECODE_CACHE_DIR')
+DEFAULT_DECODE_CACHE_BYTES = 1024 * 1024 * 1024
+
+# WAVE format tags
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# (format tag, bits per sample) -> (sample dtype, scale to [-1, 1)); what libsndfile does for float reads
+_WAV_SAMPLE_TYPES = {
+    (_WAVE_FORMAT_PCM, 16): ('<i2', 1.0 / 0x8000),
+    (_WAVE_FORMAT_PCM, 32): ('<i4', 1.0 / 0x80000000),
+    (_WAVE_FORMAT_IEEE_FLOAT, 32): ('<f4', None)
+}
+
+# Frames converted to float at a time, bounding the temporary memory of the fast path
+_CONVERT_FRAMES = 1 << 20
+
+
+def load_audio(audio_path, sr=None, decode_cache=None):
+    """
+    Decode an audio file to mono float32, as librosa.load(audio_path, sr=sr) does.
+    
+    16/32-bit PCM and 32-bit float WAV files are memory-mapped and converted
+    directly, giving the same samples as librosa without its generic
+    decoding path; everything else goes through librosa.load. Resampling
+    (when sr is given) uses librosa's default resampler either way.
+    
+    Args:
+        audio_path: Path to audio file
+        sr: Target sampling rate (None keeps the native rate)
+        decode_cache: Optional DecodedAudioCache holding previously decoded signals
+    
+    Returns:
+        tuple: (y, sr) mono float32 samples and their sampling rate
+    """
+    requested_sr = sr
+    if decode_cache is not None:
+        cached = decode_cache.get(audio_path, requested_sr)
+        if cached is not None:
+            return cached
+    
+    y, native_sr = read_wav(audio_path) or (None, None)
+    if y is None:
+        import librosa
+        y, native_sr = librosa.load(audio_path, sr=None)
+    
+    if sr is not None and sr != native_sr:
+        import librosa
+        y = librosa.resample(y, orig_sr=native_sr, target_sr=sr)
+    else:
+        sr = native_sr
+    
+    if decode_cache is not None:
+        decode_cache.put(audio_path, requested_sr, y, sr)
+    return y, sr
+
+
+def native_sample_rate(audio_path):
+    """
+    Sampling rate an audio file was recorded at, read from its header where possible.
+    
+    Args:
+        audio_path: Path to audio file
+    
+    Returns:
+        int: Native sampling rate
+    """
+    import soundfile as sf
+    try:
+        return sf.info(audio_path).samplerate
+    except RuntimeError:
+        # Not readable by soundfile; librosa falls back to its other decoders
+        import librosa
+        return librosa.get_samplerate(audio_path)
+
+
+def read_wav(audio_path):
+    """
+    Read a PCM or float WAV file through a memory map and mix it to mono float32.
+    
+    Args:
+        audio_path: Path to audio file
+    
+    Returns:
+        tuple or None: (y, sr), or None if the file is not a WAV layout handled here
+    """
+    layout = _wav_layout(audio_path)
+    if layout is None:
+        return None
+    offset, frames, channels, dtype, scale, sr = layout
+    
+    y = np.empty(frames, dtype=np.float32)
+    if frames == 0:
+        return y, sr
+    samples = np.memmap(audio_path, dtype=dtype, mode='r', offset=offset, shape=(frames, channels))
+    for start in range(0, frames, _CONVERT_FRAMES):
+        block = samples[start:start + _CONVERT_FRAMES].astype(np.float32)
+        if scale is not None:
+            block *= np.float32(scale)
+        # Same reduction as librosa.to_mono, so the samples are bit-identical
+        y[start:start + len(block)] = block[:, 0] if channels == 1 else block.mean(axis=1, dtype=np.float32)
+    del samples
+    return y, sr
+
+
+def _wav_layout(audio_path):
+    """Parse RIFF chunks up to the data chunk; None for anything the fast path does not handle."""
+    with open(audio_path, 'rb') as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            return None
+        
+        fmt = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, size = chunk[:4], struct.unpack('<I', chunk[4:])[0]
+            if chunk_id == b'fmt ':
+                fmt = f.read(size)
+                if len(fmt) < 16:
+                    return None
+            elif chunk_id == b'data':
+                if fmt is None:
+                    return None
+                offset = f.tell()
+                break
+            else:
+                f.seek(size, os.SEEK_CUR)
+            # Chunks are padded to an even size
+            if size % 2:
+                f.seek(1, os.SEEK_CUR)
+        file_size = os.fstat(f.fileno()).st_size
+    
+    format_tag, channels, sr, _, block_align, bits = struct.unpack('<HHIIHH', fmt[:16])
+    if format_tag == _WAVE_FORMAT_EXTENSIBLE:
+        if len(fmt) < 26:
+            return None
+        format_tag = struct.unpack('<H', fmt[24:26])[0]
+    sample_type = _WAV_SAMPLE_TYPES.get((format_tag, bits))
+    if sample_type is None or channels == 0 or block_align != channels * bits // 8:
+        return None
+    
+    # Writers that stream WAV data may leave the data size unset; use what is there
+    frames = min(size, file_size - offset) // block_align
+    dtype, scale = sample_type
+    return offset, frames, channels, dtype, scale, sr
+
+
+class DecodedAudioCache:
+    """
+    Directory of decoded mono float32 signals stored as .npy files.
+    
+    Entries are keyed by path, size, modification time and target rate,
+    and are memory-mapped on a hit, so re-analyzing a clip with different
+    feature settings skips decoding and resampling. The least recently
+    used files are removed once the directory exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_DECODE_CACHE_DIR, max_bytes=DEFAULT_DECODE_CACHE_BYTES):
+        """
+        Args:
+            cache_dir: Directory for decoded signals (default: TKI_DECODE_CACHE_DIR)
+            max_bytes: Upper bound on the total size of cached signals
+        """
+        if cache_dir is None:
+            raise ValueError("DecodedAudioCache needs a cache_dir or TKI_DECODE_CACHE_DIR")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, audio_path, sr):
+        """
+        Args:
+            audio_path: Path to audio file
+            sr: Requested sampling rate (None for native)
+        
+        Returns:
+            tuple or None: (y, sr) with y a read-only memory map, or None on a miss
+        """
+        for path in glob.glob(os.path.join(self.cache_dir, self._key(audio_path, sr) + '-*.npy')):
+            try:
+                os.utime(path)
+                y = np.load(path, mmap_mode='r')
+            except OSError:
+                # Evicted by another process since the glob
+                continue
+            stored_sr = int(os.path.basename(path)[:-len('.npy')].rsplit('-', 1)[1])
+            return y, stored_sr
+        return None
+
+    def put(self, audio_path, sr, y, actual_sr):
+        """
+        Args:
+            audio_path: Path to audio file
+            sr: Requested sampling rate (None for native)
+            y: Decoded mono float32 samples
+            actual_sr: Sampling rate of y
+        """
+        path = os.path.join(self.cache_dir, f"{self._key(audio_path, sr)}-{actual_sr}.npy")
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.save(f, np.asarray(y, dtype=np.float32))
+        os.replace(temp_path, path)
+        self._evict()
+
+    def clear(self):
+        for path in glob.glob(os.path.join(self.cache_dir, '*.npy')):
+            _remove_if_present(path)
+
+    def _key(self, audio_path, sr):
+        stat = os.stat(audio_path)
+        identity = f"{os.path.abspath(audio_path)}:{stat.st_size}:{stat.st_mtime_ns}:{sr}"
+        return hashlib.sha256(identity.encode()).hexdigest()
+
+    def _evict(self):
+        """Drop least recently used signals until the directory fits max_bytes."""
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, '*.npy')):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Other workers share the directory and may have removed it already
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            _remove_if_present(path)
+            total -= size
+
+
+def _remove_if_present(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,317 @@
+import argparse
+import json
+import os
+from collections import deque
+from datetime import datetime, timezone
+from itertools import islice
+
+import instrumentation
+from analyzer import CASCADE_AUDIO_BOUNDS, FULL_AUDIO_BOUNDS
+from feature_cache import FeatureCache
+from pipeline import _process_pool, analyze_turn
+
+
+DEFAULT_WINDOW = 8
+DEFAULT_CHECKPOINT_EVERY = 1
+MANIFEST_NAME = 'manifest.jsonl'
+
+
+def iter_conversations(source):
+    """
+    Stream conversations from a JSONL file or a directory manifest.
+    
+    Each line holds one conversation, either {"id": ..., "turns": [...]} or a
+    bare list of turns (identified by its line number). A conversation
+    object may also give "recorded_at", as Unix time or an ISO 8601 string
+    (UTC unless it has an offset). Turns have 'person', 'text' and
+    optionally 'audio'; relative audio paths are resolved against the
+    directory of the JSONL file. A directory is read through its
+    manifest.jsonl.
+    
+    Args:
+        source: Path to a .jsonl file or to a directory containing manifest.jsonl
+    
+    Yields:
+        tuple: (conversation_id, turns, recorded_at), recorded_at as Unix time or None
+    """
+    path = os.path.join(source, MANIFEST_NAME) if os.path.isdir(source) else source
+    base_dir = os.path.dirname(os.path.abspath(path))
+    
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: invalid JSON: {e}")
+            
+            recorded_at = None
+            if isinstance(entry, list):
+                conversation_id, turns = str(line_number), entry
+            else:
+                conversation_id, turns = str(entry.get('id', line_number)), entry['turns']
+                try:
+                    recorded_at = _parse_time(entry.get('recorded_at'))
+                except (TypeError, ValueError) as e:
+                    raise ValueError(f"{path}:{line_number}: invalid recorded_at: {e}")
+            yield conversation_id, [_normalize_turn(turn, base_dir) for turn in turns], recorded_at
+
+
+def analyze_conversation_records(conversation_id, turns, cache=None, text_only=False, audio_bounds=None,
+                                 recorded_at=None):
+    """
+    Analyze one conversation into per-turn output records.
+    
+    Args:
+        conversation_id: Identifier written with every record
+        turns: List of dicts with 'person', 'text', and 'audio' keys
+        cache: Optional FeatureCache so unchanged audio is not decoded again
+        text_only: Score the text alone, without loading the audio stack
+        audio_bounds: Cascade bounds; skip the audio when the text settles the style
+        recorded_at: Unix time of the conversation, written with every record when given
+    
+    Returns:
+        list: One dict per turn with conversation_id, turn, person, text,
+        tension, assertiveness, style, audio_skipped, recorded_at (if
+        given) and the text/prosody features behind them
+    """
+    capture = _FeatureCapture()
+    previous = instrumentation.get_sink()
+    instrumentation.configure(capture if previous is None else instrumentation.MultiSink(previous, capture))
+    try:
+        records = []
+        for i, turn in enumerate(turns, 1):
+            capture.reset()
+            result = analyze_turn(turn, cache=cache, text_only=text_only, audio_bounds=audio_bounds)
+            record = {'conversation_id': conversation_id, 'turn': i, **result}
+            if recorded_at is not None:
+                record['recorded_at'] = recorded_at
+            record['features'] = capture.features()
+            records.append(record)
+        return records
+    finally:
+        instrumentation.configure(previous)
+
+
+def run_batch(source, output_path, workers=None, window=DEFAULT_WINDOW, cache=None,
+              text_only=False, restart=False, checkpoint_every=DEFAULT_CHECKPOINT_EVERY, store=None,
+              audio_bounds=None):
+    """
+    Analyze a stream of conversations into a JSONL file, resuming an interrupted run.
+    
+    Conversations are analyzed at most `window` at a time and written in input
+    order as they complete. After every `checkpoint_every` conversations the
+    output is flushed to disk and a checkpoint (output_path + '.checkpoint')
+    records how many conversations and output bytes are complete. A later run
+    with the same arguments drops anything written after the last checkpoint
+    and continues from the next conversation.
+    
+    Args:
+        source: JSONL file or directory manifest (see iter_conversations)
+        output_path: JSONL file receiving one record per turn
+        workers: Number of worker processes; None or 1 analyzes serially
+        window: Maximum number of conversations in flight
+        cache: Optional FeatureCache so unchanged audio is not decoded again
+        text_only: Score the text alone, without loading the audio stack
+        restart: Ignore an existing checkpoint and start over
+        checkpoint_every: Conversations between checkpoints
+        store: Optional AnalysisStore that also receives every conversation,
+            written in bulk at each checkpoint
+        audio_bounds: Cascade bounds; skip the audio when the text settles the style
+    
+    Returns:
+        dict: resumed_from, conversations and turns analyzed by this run
+    """
+    checkpoint_path = output_path + '.checkpoint'
+    settings = {'source': os.path.abspath(source), 'text_only': text_only}
+    if audio_bounds is not None:
+        settings['audio_bounds'] = [list(bounds) for bounds in audio_bounds]
+    checkpoint = None if restart else _load_checkpoint(checkpoint_path)
+    if checkpoint is not None and checkpoint['settings'] != settings:
+        raise ValueError(
+            f"{checkpoint_path} was written for {checkpoint['settings']}; "
+            f"pass --restart to discard it and start over"
+        )
+    completed = checkpoint['completed'] if checkpoint else 0
+    
+    # Drop records written after the last checkpoint, they will be analyzed again
+    with open(output_path, 'a+b') as f:
+        f.truncate(checkpoint['output_bytes'] if checkpoint else 0)
+    
+    conversations = islice(iter_conversations(source), completed, None)
+    
+    summary = {'resumed_from': completed, 'conversations': 0, 'turns': 0}
+    unstored = []
+    pool = _process_pool(workers, cache) if workers is not None and workers > 1 else None
+    try:
+        with open(output_path, 'ab') as output:
+            for records in _analyze_in_order(conversations, pool, window, cache, text_only, audio_bounds):
+                for record in records:
+                    output.write((json.dumps(record) + '\n').encode('utf-8'))
+                completed += 1
+                summary['conversations'] += 1
+                summary['turns'] += len(records)
+                instrumentation.increment('batch_conversations')
+                if store is not None and records:
+                    unstored.append((records[0]['conversation_id'], records, records[0].get('recorded_at')))
+                if summary['conversations'] % checkpoint_every == 0:
+                    unstored = _store_conversations(store, unstored)
+                    _save_checkpoint(checkpoint_path, output, completed, settings)
+            unstored = _store_conversations(store, unstored)
+            _save_checkpoint(checkpoint_path, output, completed, settings)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return summary
+
+
+def _analyze_in_order(conversations, pool, window, cache, text_only, audio_bounds):
+    """Yield each conversation's records in input order with at most `window` in flight."""
+    if pool is None:
+        for conversation_id, turns, recorded_at in conversations:
+            yield analyze_conversation_records(
+                conversation_id, turns, cache=cache, text_only=text_only, audio_bounds=audio_bounds,
+                recorded_at=recorded_at
+            )
+        return
+    
+    in_flight = deque()
+    for conversation_id, turns, recorded_at in conversations:
+        if len(in_flight) >= window:
+            yield in_flight.popleft().result()
+        in_flight.append(pool.submit(
+            _analyze_records_in_worker, conversation_id, turns, text_only, audio_bounds, recorded_at
+        ))
+    while in_flight:
+        yield in_flight.popleft().result()
+
+
+def _analyze_records_in_worker(conversation_id, turns, text_only, audio_bounds, recorded_at):
+    import pipeline
+    return analyze_conversation_records(
+        conversation_id, turns, cache=pipeline._worker_cache, text_only=text_only, audio_bounds=audio_bounds,
+        recorded_at=recorded_at
+    )
+
+
+def _normalize_turn(turn, base_dir):
+    audio = turn.get('audio')
+    if audio and not os.path.isabs(audio):
+        audio = os.path.join(base_dir, audio)
+    return {'person': turn['person'], 'text': turn['text'], 'audio': audio or None}
+
+
+def _parse_time(value):
+    """Unix time from a number or an ISO 8601 string; None stays None."""
+    if value is None or (isinstance(value, (int, float)) and not isinstance(value, bool)):
+        return value
+    if not isinstance(value, str):
+        raise TypeError(f"expected Unix time or an ISO 8601 string, got {value!r}")
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _store_conversations(store, conversations):
+    # Stored conversations are replaced by id, so re-storing after a resume is harmless
+    if store is not None and conversations:
+        store.add_conversations(conversations)
+    return []
+
+
+def _load_checkpoint(checkpoint_path):
+    if not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_checkpoint(checkpoint_path, output, completed, settings):
+    """Make the output durable, then atomically record how much of it is complete."""
+    output.flush()
+    os.fsync(output.fileno())
+    temp_path = checkpoint_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'completed': completed, 'output_bytes': output.tell(), 'settings': settings}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, checkpoint_path)
+
+
+class _FeatureCapture:
+    """Instrumentation sink keeping the text and prosody features of the current turn."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.text = None
+        self.prosody = None
+
+    def handle(self, event):
+        if event['type'] != 'event' or event['name'] not in ('sentiment', 'prosody'):
+            return
+        values = {
+            field: value.item() if hasattr(value, 'item') else value
+            for field, value in event.items() if field not in ('type', 'name', 't')
+        }
+        if event['name'] == 'sentiment':
+            self.text = values
+        else:
+            self.prosody = values
+
+    def features(self):
+        return {'text': self.text, 'prosody': self.prosody}
+
+
+def main():
+    """Command line entry point for batch analysis of JSONL conversations."""
+    parser = argparse.ArgumentParser(description="Analyze conversations from JSONL into per-turn JSONL results.")
+    parser.add_argument('input', help="JSONL file of conversations, or a directory containing manifest.jsonl")
+    parser.add_argument('output', help="JSONL file receiving one record per turn")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: analyze serially)")
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW, help="Conversations in flight at once")
+    parser.add_argument('--checkpoint-every', type=int, default=DEFAULT_CHECKPOINT_EVERY,
+                        help="Conversations between checkpoints")
+    parser.add_argument('--text-only', action='store_true', help="Score the text alone, skipping audio")
+    parser.add_argument('--cascade', action='store_true',
+                        help="Skip audio analysis of turns whose text settles the style within TKI_CASCADE_BOUNDS "
+                             "(required; there are no default bounds)")
+    parser.add_argument('--no-cache', action='store_true', help="Do not use the prosody feature cache")
+    parser.add_argument('--restart', action='store_true', help="Ignore an existing checkpoint and start over")
+    parser.add_argument('--store', default=None, help="Also write results to this analysis store database")
+    args = parser.parse_args()
+    if args.cascade and CASCADE_AUDIO_BOUNDS == FULL_AUDIO_BOUNDS:
+        parser.error("--cascade needs calibrated TKI_CASCADE_BOUNDS (see benchmark.py --cascade); "
+                     "over the full score range no turn can be skipped")
+    
+    cache = None if args.no_cache or args.text_only else FeatureCache()
+    store = None
+    if args.store:
+        from analysis_store import AnalysisStore
+        store = AnalysisStore(args.store)
+    summary = run_batch(
+        args.input, args.output,
+        workers=args.workers,
+        window=max(args.window, 1),
+        cache=cache,
+        text_only=args.text_only,
+        restart=args.restart,
+        checkpoint_every=max(args.checkpoint_every, 1),
+        store=store,
+        audio_bounds=CASCADE_AUDIO_BOUNDS if args.cascade else None
+    )
+    if cache is not None:
+        cache.close()
+    if store is not None:
+        store.close()
+    
+    if summary['resumed_from']:
+        print(f"Resumed after {summary['resumed_from']} completed conversations")
+    print(f"Analyzed {summary['conversations']} conversations ({summary['turns']} turns) into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,640 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import instrumentation
+from instrumentation import _distribution
+
+
+DEFAULT_SEED = 1234
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+
+# Shares of the observed prosody scores the calibrated cascade bounds cover
+CASCADE_COVERAGES = (1.0, 0.98, 0.9)
+
+# Synthetic audio corpora: (duration seconds, sample rate, silence ratio)
+PROFILES = {
+    'quick': {
+        'audio': [(2, 16000, 0.1), (5, 22050, 0.3), (10, 44100, 0.6)],
+        'transcripts': 200,
+        'conversations': 2,
+        'style_pairs': 20000
+    },
+    'full': {
+        'audio': [
+            (duration, sr, silence)
+            for duration in (2, 10, 30, 120)
+            for sr in (16000, 22050, 44100, 48000)
+            for silence in (0.1, 0.3, 0.6)
+        ],
+        'transcripts': 2000,
+        'conversations': 8,
+        'style_pairs': 200000
+    }
+}
+
+# Utterance building blocks drawn from the keyword families the text analyzer scores
+_OPENERS = [
+    "Look,", "Honestly,", "Okay,", "I understand,", "Listen,", "Sorry,", "Well,", "Right now",
+    "We need to talk.", "Thanks for waiting.", "I appreciate that,", "No."
+]
+_CLAUSES = [
+    "this is completely unacceptable", "let's work together on a solution", "can we discuss it later",
+    "I'm busy right now", "we've postponed this twice already", "that works for me",
+    "you never listen to what I say", "maybe we could find a compromise", "I disagree with that plan",
+    "I need a refund for my order", "sounds good, I agree", "whatever you think is fine",
+    "we have to schedule a time today", "I'm not sure this is the right approach",
+    "you must fix this immediately", "how about we split the difference", "I feel frustrated about the delay",
+    "perfect, thank you so much"
+]
+_CLOSERS = [".", "!", "?", "...", ". Please.", ", okay?", "!!", ". Thanks."]
+
+
+def synthesize_speech(duration, sr, silence_ratio, seed=DEFAULT_SEED, return_pitch=False):
+    """
+    Generate speech-like audio: voiced syllables with a wandering pitch and
+    harmonics, separated by pauses, over a low noise floor.
+    
+    Args:
+        duration: Length in seconds
+        sr: Sampling rate
+        silence_ratio: Approximate fraction of the signal that is pause
+        seed: Random seed
+        return_pitch: Also return the fundamental frequency of every sample
+    
+    Returns:
+        np.ndarray: float32 mono samples, or (samples, pitch) with pitch 0 in pauses
+    """
+    rng = np.random.default_rng(seed)
+    n = int(duration * sr)
+    y = rng.normal(0.0, 0.002, n).astype(np.float32)
+    pitch = np.zeros(n)
+    
+    position = 0
+    while position < n:
+        # Syllable groups of 0.2-0.8 s followed by pauses sized to hit silence_ratio on average
+        voiced = int(rng.uniform(0.2, 0.8) * sr)
+        pause = int(voiced * silence_ratio / max(1.0 - silence_ratio, 1e-3) * rng.uniform(0.5, 1.5))
+        stop = min(position + voiced, n)
+        t = np.arange(stop - position) / sr
+        
+        f0 = rng.uniform(90, 260) * (1 + 0.15 * np.sin(2 * np.pi * rng.uniform(0.5, 3) * t))
+        phase = 2 * np.pi * np.cumsum(f0) / sr
+        voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+        envelope = np.sin(np.pi * t * rng.uniform(3, 6)) ** 2 * rng.uniform(0.05, 0.4)
+        y[position:stop] += (voice * envelope).astype(np.float32)
+        pitch[position:stop] = f0
+        position = stop + pause
+    return (y, pitch) if return_pitch else y
+
+
+def synthesize_transcripts(count, seed=DEFAULT_SEED):
+    """
+    Generate conversational utterances mixing compliance, collaboration,
+    avoidance and assertive phrasing.
+    
+    Args:
+        count: Number of utterances
+        seed: Random seed
+    
+    Returns:
+        list: Utterance strings
+    """
+    rng = random.Random(seed)
+    transcripts = []
+    for _ in range(count):
+        clauses = rng.sample(_CLAUSES, rng.randint(1, 3))
+        transcripts.append(f"{rng.choice(_OPENERS)} {', and '.join(clauses)}{rng.choice(_CLOSERS)}")
+    return transcripts
+
+
+def write_audio_corpus(directory, specs, seed=DEFAULT_SEED):
+    """
+    Write one WAV file per (duration, sr, silence_ratio) spec.
+    
+    Args:
+        directory: Output directory
+        specs: List of (duration, sr, silence_ratio) tuples
+        seed: Random seed
+    
+    Returns:
+        list: (path, spec) pairs
+    """
+    import soundfile as sf
+    
+    corpus = []
+    for i, (duration, sr, silence_ratio) in enumerate(specs):
+        path = os.path.join(directory, f"speech_{duration}s_{sr}hz_{int(silence_ratio * 100)}pct.wav")
+        if not os.path.exists(path):
+            sf.write(path, synthesize_speech(duration, sr, silence_ratio, seed + i), sr, subtype='PCM_16')
+        corpus.append((path, (duration, sr, silence_ratio)))
+    return corpus
+
+
+def measure(func, items, memory=True):
+    """
+    Time func on every item, then run once more under tracemalloc for peak memory.
+    
+    Args:
+        func: Callable taking one item
+        items: List of inputs
+        memory: Whether to measure peak traced memory
+    
+    Returns:
+        dict: items, throughput (items/s), latency distribution (s) and peak_mib
+    """
+    latencies = []
+    start = time.perf_counter()
+    for item in items:
+        item_start = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - item_start)
+    elapsed = time.perf_counter() - start
+    
+    peak = None
+    if memory:
+        tracemalloc.start()
+        for item in items:
+            func(item)
+        peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+    
+    return {
+        'items': len(items),
+        'throughput': len(items) / elapsed if elapsed > 0 else float('inf'),
+        'latency': _distribution(latencies),
+        'peak_mib': peak
+    }
+
+
+def run_benchmarks(profile='quick', seed=DEFAULT_SEED, corpus_dir=None, memory=True):
+    """
+    Benchmark each pipeline stage on synthetic corpora.
+    
+    Args:
+        profile: 'quick' or 'full' (see PROFILES)
+        seed: Random seed for the corpora
+        corpus_dir: Keep generated audio here (default: a temporary directory)
+        memory: Whether to measure peak memory
+    
+    Returns:
+        dict: 'environment' and per-benchmark 'results'
+    """
+    from analyzer import compute_tension_and_assertiveness
+    from audio_analyzer import analyze_prosody
+    from pipeline import analyze_conversation
+    import text_analyzer
+    from tki_mapper import map_tki_style
+    
+    settings = PROFILES[profile]
+    previous_sink = instrumentation.configure(None)
+    temp_dir = None
+    if corpus_dir is None:
+        temp_dir = tempfile.TemporaryDirectory()
+        corpus_dir = temp_dir.name
+    os.makedirs(corpus_dir, exist_ok=True)
+    
+    try:
+        audio = write_audio_corpus(corpus_dir, settings['audio'], seed)
+        audio_paths = [path for path, _ in audio]
+        transcripts = synthesize_transcripts(settings['transcripts'], seed)
+        turns = [
+            {'person': 'AB'[i % 2], 'text': transcripts[i % len(transcripts)], 'audio': path}
+            for i, path in enumerate(audio_paths)
+        ]
+        conversations = [turns[i::settings['conversations']] for i in range(settings['conversations'])]
+        rng = random.Random(seed)
+        style_pairs = [(rng.random(), rng.random()) for _ in range(settings['style_pairs'])]
+
+        def sentiment(text):
+            # Score every utterance from scratch rather than from the memo
+            text_analyzer._sentiment_memo.clear()
+            text_analyzer.analyze_sentiment(text)
+        
+        # Load lazily imported models and the audio stack before timing anything
+        text_analyzer.analyze_sentiment(transcripts[0])
+        analyze_prosody(audio_paths[0])
+        
+        results = {
+            'analyze_prosody': measure(analyze_prosody, audio_paths, memory),
+            'analyze_sentiment': measure(sentiment, transcripts, memory),
+            'compute_tension_and_assertiveness': measure(
+                lambda turn: compute_tension_and_assertiveness(turn['text'], turn['audio']), turns, memory
+            ),
+            'map_tki_style': measure(lambda pair: map_tki_style(*pair), style_pairs, memory=False),
+            'pipeline': measure(analyze_conversation, conversations, memory)
+        }
+        # Per-second-of-audio throughput makes prosody results comparable across profiles
+        audio_seconds = sum(spec[0] for _, spec in audio)
+        results['analyze_prosody']['audio_seconds_per_second'] = (
+            audio_seconds * results['analyze_prosody']['throughput'] / len(audio_paths)
+        )
+    finally:
+        instrumentation.configure(previous_sink)
+        if temp_dir is not None:
+            temp_dir.cleanup()
+    
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'profile': profile,
+            'seed': seed
+        },
+        'results': results
+    }
+
+
+def compare_to_baseline(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Flag benchmarks that got slower or hungrier than the baseline.
+    
+    Args:
+        report: Output of run_benchmarks
+        baseline: A previously saved report
+        threshold: Allowed relative change (0.2 = 20%)
+    
+    Returns:
+        list: (benchmark, metric, baseline value, current value) for each regression
+    """
+    regressions = []
+    for name, current in report['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        for metric, now, before in [
+            ('p50 latency', current['latency']['p50'], previous['latency']['p50']),
+            ('p99 latency', current['latency']['p99'], previous['latency']['p99']),
+            ('peak memory', current['peak_mib'], previous['peak_mib'])
+        ]:
+            if now is not None and before is not None and now > before * (1 + threshold):
+                regressions.append((name, metric, before, now))
+        if current['throughput'] < previous['throughput'] / (1 + threshold):
+            regressions.append((name, 'throughput', previous['throughput'], current['throughput']))
+    return regressions
+
+
+def measure_sample_rate_drift(profile='quick', analysis_sr=16000, seed=DEFAULT_SEED, corpus_dir=None):
+    """
+    Compare prosody scores and extraction time at a reduced analysis rate with full-rate analysis.
+    
+    Args:
+        profile: 'quick' or 'full' (see PROFILES)
+        analysis_sr: Reduced analysis sampling rate
+        seed: Random seed for the corpus
+        corpus_dir: Keep generated audio here (default: a temporary directory)
+    
+    Returns:
+        list: Per-file dicts with spec, full-rate and reduced-rate scores, their
+        absolute differences, whether the TKI style changed, and both timings
+    """
+    from audio_analyzer import extract_file_features, score_prosody
+    from tki_mapper import map_tki_style
+    
+    temp_dir = None
+    if corpus_dir is None:
+        temp_dir = tempfile.TemporaryDirectory()
+        corpus_dir = temp_dir.name
+    os.makedirs(corpus_dir, exist_ok=True)
+    
+    rows = []
+    try:
+        corpus = write_audio_corpus(corpus_dir, PROFILES[profile]['audio'], seed)
+        # Load the audio stack before timing anything
+        extract_file_features(corpus[0][0], analysis_sr)
+        for path, spec in corpus:
+            scores = {}
+            timings = {}
+            for label, sr in (('full', None), ('reduced', analysis_sr)):
+                start = time.perf_counter()
+                features = extract_file_features(path, sr)
+                timings[label] = time.perf_counter() - start
+                scores[label] = score_prosody(features, debug=False)
+            # Styles of the prosody scores alone, the worst case for the fused style
+            rows.append({
+                'spec': spec,
+                'full': scores['full'],
+                'reduced': scores['reduced'],
+                'tension_drift': abs(scores['reduced'][0] - scores['full'][0]),
+                'assertiveness_drift': abs(scores['reduced'][1] - scores['full'][1]),
+                'style_changed': map_tki_style(*scores['full']) != map_tki_style(*scores['reduced']),
+                'full_seconds': timings['full'],
+                'reduced_seconds': timings['reduced']
+            })
+    finally:
+        if temp_dir is not None:
+            temp_dir.cleanup()
+    return rows
+
+
+def measure_cascade(profile='quick', seed=DEFAULT_SEED, corpus_dir=None, coverages=CASCADE_COVERAGES):
+    """
+    Skip rate, style agreement and time saved by the cascade scorer.
+    
+    Every synthetic transcript is paired with every corpus file. The full
+    styles come from fusing each pair's text and prosody scores; the cascade
+    is evaluated with the full [0, 1] bounds, the TKI_CASCADE_BOUNDS setting
+    and bounds calibrated on the corpus's own prosody scores at each
+    coverage. Coverage 1.0 is in-sample, so its agreement is 100% by
+    construction; lower coverages show what scores outside the bounds cost.
+    
+    Args:
+        profile: 'quick' or 'full' (see PROFILES)
+        seed: Random seed for the corpora
+        corpus_dir: Keep generated audio here (default: a temporary directory)
+        coverages: Coverages passed to calibrate_audio_bounds
+    
+    Returns:
+        list: Per-bounds dicts with label, bounds, pairs, skip_rate, agreement and speedup
+    """
+    from analyzer import (
+        CASCADE_AUDIO_BOUNDS, FULL_AUDIO_BOUNDS, calibrate_audio_bounds, cascade_style, fuse_scores
+    )
+    from audio_analyzer import analyze_prosody
+    import text_analyzer
+    from tki_mapper import STYLE_LABELS, map_tki_styles
+    
+    settings = PROFILES[profile]
+    previous_sink = instrumentation.configure(None)
+    temp_dir = None
+    if corpus_dir is None:
+        temp_dir = tempfile.TemporaryDirectory()
+        corpus_dir = temp_dir.name
+    os.makedirs(corpus_dir, exist_ok=True)
+    
+    try:
+        audio_paths = [path for path, _ in write_audio_corpus(corpus_dir, settings['audio'], seed)]
+        transcripts = synthesize_transcripts(settings['transcripts'], seed)
+        analyze_prosody(audio_paths[0])
+        
+        text_scores = []
+        start = time.perf_counter()
+        for text in transcripts:
+            text_analyzer._sentiment_memo.clear()
+            text_scores.append(text_analyzer.analyze_sentiment(text))
+        text_seconds = (time.perf_counter() - start) / len(transcripts)
+        
+        audio_scores = []
+        audio_seconds = []
+        for path in audio_paths:
+            start = time.perf_counter()
+            audio_scores.append(analyze_prosody(path))
+            audio_seconds.append(time.perf_counter() - start)
+    finally:
+        instrumentation.configure(previous_sink)
+        if temp_dir is not None:
+            temp_dir.cleanup()
+    
+    # Full styles of every (transcript, file) pair, transcripts along the rows
+    text = np.repeat(np.asarray(text_scores), len(audio_scores), axis=0)
+    audio = np.tile(np.asarray(audio_scores), (len(text_scores), 1))
+    tension, assertiveness = fuse_scores(text[:, 0], text[:, 1], audio[:, 0], audio[:, 1])
+    full_styles = np.asarray(STYLE_LABELS)[map_tki_styles(tension, assertiveness)].reshape(len(text_scores), -1)
+    
+    candidates = [('full range', FULL_AUDIO_BOUNDS)]
+    if CASCADE_AUDIO_BOUNDS != FULL_AUDIO_BOUNDS:
+        candidates.append(('TKI_CASCADE_BOUNDS', CASCADE_AUDIO_BOUNDS))
+    candidates.extend(
+        (f"calibrated {coverage:.0%}", calibrate_audio_bounds(audio_scores, coverage)) for coverage in coverages
+    )
+    
+    rows = []
+    full_time = len(transcripts) * (len(audio_paths) * text_seconds + sum(audio_seconds))
+    for label, bounds in candidates:
+        decided = [cascade_style(tension, assertiveness, bounds) for tension, assertiveness in text_scores]
+        skipped = sum(len(audio_paths) for style in decided if style is not None)
+        agreeing = sum(
+            len(audio_paths) if style is None else int(np.sum(full_styles[i] == style))
+            for i, style in enumerate(decided)
+        )
+        cascade_time = full_time - sum(audio_seconds) * sum(style is not None for style in decided)
+        pairs = full_styles.size
+        rows.append({
+            'label': label,
+            'bounds': bounds,
+            'pairs': pairs,
+            'skip_rate': skipped / pairs,
+            'agreement': agreeing / pairs,
+            'speedup': full_time / cascade_time
+        })
+    return rows
+
+
+def format_cascade(rows):
+    """
+    Returns:
+        str: Table of cascade bounds, skip rate, style agreement and estimated speedup
+    """
+    lines = [f"{'bounds':<20}{'tension':>14}{'assertiveness':>16}{'skipped':>10}{'agree':>9}{'speedup':>9}"]
+    for row in rows:
+        (t_low, t_high), (a_low, a_high) = row['bounds']
+        lines.append(
+            f"{row['label']:<20}{f'{t_low:.3f}-{t_high:.3f}':>14}{f'{a_low:.3f}-{a_high:.3f}':>16}"
+            f"{row['skip_rate']:>10.1%}{row['agreement']:>9.1%}{row['speedup']:>8.2f}x"
+        )
+    lines.append(f"{rows[0]['pairs']} transcript/audio pairs; TKI_CASCADE_BOUNDS takes 't_low,t_high,a_low,a_high'")
+    return "\n".join(lines)
+
+
+def measure_pitch_backends(profile='quick', seed=DEFAULT_SEED, memory=True):
+    """
+    Compare the pitch backends on synthetic speech with a known pitch contour.
+    
+    The reference pitch_std is the spread of the true fundamental over the
+    voiced frames that pass the energy gate of the YIN backend, i.e. what a
+    perfect tracker would report. Audio is synthesized in memory, so timings
+    cover feature extraction only.
+    
+    Args:
+        profile: 'quick' or 'full' (see PROFILES)
+        seed: Random seed for the corpus
+        memory: Whether to measure peak memory
+    
+    Returns:
+        list: Per-signal dicts with spec, true pitch_std, and per backend its
+        pitch_std, prosody scores, seconds and peak_mib
+    """
+    from audio_analyzer import (
+        HOP_LENGTH, PITCH_BACKENDS, compute_frame_features, extract_prosody_features, score_prosody
+    )
+    from pitch_tracker import ENERGY_GATE_RATIO
+    
+    previous_sink = instrumentation.configure(None)
+    rows = []
+    try:
+        for i, spec in enumerate(PROFILES[profile]['audio']):
+            duration, sr, silence_ratio = spec
+            y, pitch = synthesize_speech(duration, sr, silence_ratio, seed + i, return_pitch=True)
+            row = {'spec': spec}
+            for backend in PITCH_BACKENDS:
+                # The first call also loads anything the backend imports lazily
+                features = extract_prosody_features(y, sr, backend)
+                start = time.perf_counter()
+                extract_prosody_features(y, sr, backend)
+                seconds = time.perf_counter() - start
+                peak_mib = None
+                if memory:
+                    tracemalloc.start()
+                    extract_prosody_features(y, sr, backend)
+                    peak_mib = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+                    tracemalloc.stop()
+                row[backend] = {
+                    'pitch_std': float(features['pitch_std']),
+                    'scores': tuple(float(score) for score in score_prosody(features, debug=False)),
+                    'seconds': seconds,
+                    'peak_mib': peak_mib
+                }
+            
+            rms = compute_frame_features(y, sr, pitch=False)['rms']
+            centers = np.minimum(np.arange(len(rms)) * HOP_LENGTH, len(y) - 1)
+            true_pitch = pitch[centers][(pitch[centers] > 0) & (rms >= rms.mean() * ENERGY_GATE_RATIO)]
+            row['true_pitch_std'] = float(np.std(true_pitch)) if len(true_pitch) else 0.0
+            rows.append(row)
+    finally:
+        instrumentation.configure(previous_sink)
+    return rows
+
+
+def format_pitch(rows):
+    """
+    Returns:
+        str: Table of pitch_std against the true value, prosody tension and time per backend
+    """
+    lines = [
+        f"{'audio (s, Hz, silence)':<26}{'true std':>9}{'piptrack':>10}{'yin':>8}"
+        f"{'tension p/y':>14}{'piptrack ms':>13}{'yin ms':>9}{'MiB p/y':>13}"
+    ]
+    for row in rows:
+        duration, sr, silence = row['spec']
+        piptrack, yin = row['piptrack'], row['yin']
+        tension = f"{piptrack['scores'][0]:.2f}/{yin['scores'][0]:.2f}"
+        memory = f"{piptrack['peak_mib']:.0f}/{yin['peak_mib']:.0f}" if piptrack['peak_mib'] is not None else '-'
+        lines.append(
+            f"{f'{duration}s {sr} {silence:.0%}':<26}{row['true_pitch_std']:>9.1f}{piptrack['pitch_std']:>10.1f}"
+            f"{yin['pitch_std']:>8.1f}{tension:>14}"
+            f"{piptrack['seconds'] * 1000:>13.1f}{yin['seconds'] * 1000:>9.1f}{memory:>13}"
+        )
+    errors = {
+        backend: np.mean([abs(row[backend]['pitch_std'] - row['true_pitch_std']) for row in rows])
+        for backend in ('piptrack', 'yin')
+    }
+    speedup = sum(row['piptrack']['seconds'] for row in rows) / sum(row['yin']['seconds'] for row in rows)
+    lines.append(
+        f"mean |pitch_std error|: piptrack {errors['piptrack']:.1f} Hz, yin {errors['yin']:.1f} Hz; "
+        f"yin extraction {speedup:.2f}x faster overall"
+    )
+    return "\n".join(lines)
+
+
+def format_drift(rows, analysis_sr):
+    """
+    Returns:
+        str: Table of per-file score drift and speedup at the reduced rate
+    """
+    lines = [f"{'audio (s, Hz, silence)':<26}{'d tension':>11}{'d assert':>10}{'style':>8}{'speedup':>9}"]
+    for row in rows:
+        duration, sr, silence = row['spec']
+        lines.append(
+            f"{f'{duration}s {sr} {silence:.0%}':<26}{row['tension_drift']:>11.4f}{row['assertiveness_drift']:>10.4f}"
+            f"{'CHANGED' if row['style_changed'] else 'same':>8}{row['full_seconds'] / row['reduced_seconds']:>8.2f}x"
+        )
+    lines.append(
+        f"max drift at {analysis_sr} Hz: tension {max(row['tension_drift'] for row in rows):.4f}, "
+        f"assertiveness {max(row['assertiveness_drift'] for row in rows):.4f}; "
+        f"{sum(row['style_changed'] for row in rows)} of {len(rows)} styles changed"
+    )
+    return "\n".join(lines)
+
+
+def format_report(report):
+    """
+    Returns:
+        str: Table of throughput, latency percentiles and peak memory
+    """
+    lines = [f"{'benchmark':<36}{'items':>7}{'items/s':>11}{'p50 ms':>10}{'p99 ms':>10}{'peak MiB':>10}"]
+    for name, result in report['results'].items():
+        peak = f"{result['peak_mib']:>10.1f}" if result['peak_mib'] is not None else f"{'-':>10}"
+        lines.append(
+            f"{name:<36}{result['items']:>7}{result['throughput']:>11.1f}"
+            f"{result['latency']['p50'] * 1000:>10.3f}{result['latency']['p99'] * 1000:>10.3f}{peak}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    """Run the benchmark suite, optionally saving or comparing against a baseline."""
+    parser = argparse.ArgumentParser(description="Benchmark the TKI analysis pipeline on synthetic corpora.")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='quick')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--corpus-dir', default=None, help="Keep the generated audio corpus in this directory")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the peak memory passes")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline report to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown flagged as a regression")
+    parser.add_argument('--output', default=None, help="Also write the full report as JSON")
+    parser.add_argument('--drift-sr', type=int, default=None,
+                        help="Only report prosody score drift of this analysis rate against full-rate analysis")
+    parser.add_argument('--pitch', action='store_true',
+                        help="Only compare the piptrack and yin pitch backends against a known pitch contour")
+    parser.add_argument('--cascade', action='store_true',
+                        help="Only report skip rate and style agreement of the cascade scorer")
+    args = parser.parse_args()
+    
+    if args.pitch:
+        print(format_pitch(measure_pitch_backends(args.profile, args.seed, memory=not args.no_memory)))
+        return
+    
+    if args.cascade:
+        print(format_cascade(measure_cascade(args.profile, args.seed, args.corpus_dir)))
+        return
+    
+    if args.drift_sr:
+        rows = measure_sample_rate_drift(args.profile, args.drift_sr, args.seed, args.corpus_dir)
+        print(format_drift(rows, args.drift_sr))
+        return
+    
+    report = run_benchmarks(args.profile, args.seed, args.corpus_dir, memory=not args.no_memory)
+    print(format_report(report))
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved baseline to {args.baseline}")
+        return
+    
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline['environment']['profile'] != args.profile:
+        print(f"\nBaseline was recorded with the '{baseline['environment']['profile']}' profile; not comparing")
+        return
+    
+    regressions = compare_to_baseline(report, baseline, args.threshold)
+    if not regressions:
+        print(f"\nNo regressions against {args.baseline} (threshold {args.threshold:.0%})")
+        return
+    print(f"\nREGRESSIONS against {args.baseline} (threshold {args.threshold:.0%}):")
+    for name, metric, before, now in regressions:
+        print(f"  {name}: {metric} {before:.6g} -> {now:.6g}")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
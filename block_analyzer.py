@@ -0,0 +1,232 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import librosa
+import numpy as np
+import soundfile as sf
+
+from audio_analyzer import HOP_LENGTH, N_FFT, extract_prosody_features, score_prosody
+from stream_analyzer import StreamingProsodyAnalyzer
+
+
+DEFAULT_BLOCK_SECONDS = 10.0
+
+# Number of spilled energy values read back at a time
+_SPILL_READ_FRAMES = 1 << 16
+
+
+class BlockProsodyAnalyzer(StreamingProsodyAnalyzer):
+    """
+    Prosody analysis whose memory use does not grow with recording length.
+    
+    Frames are produced exactly as in StreamingProsodyAnalyzer, but instead
+    of keeping every per-frame value, pitch, energy, ZCR and centroid are
+    folded into running moments. The only per-frame values needed after the
+    fact (energy, for the silence, speech and sustained-energy measures that
+    are relative to the final mean) are spilled to a temporary file and
+    read back in fixed-size pieces.
+    """
+
+    def __init__(self, sr, channels=1, **kwargs):
+        # Per-frame values go to the running moments and the spill file, not a window
+        super().__init__(sr, window_seconds=None, channels=channels, **kwargs)
+        self._pitch_moments = _RunningMoments()
+        self._energy_moments = _RunningMoments()
+        self._zcr_moments = _RunningMoments()
+        self._centroid_moments = _RunningMoments()
+        self._energy_spill = tempfile.TemporaryFile()
+
+    def features(self):
+        """
+        Prosody statistics of everything analyzed so far.
+        
+        Returns:
+            dict or None: Same keys as extract_prosody_features, or None before the first frame
+        """
+        if self.n_frames == 0:
+            return None
+        
+        energy_mean = self._energy_moments.mean
+        energy_threshold = energy_mean * 0.4
+        speech_threshold = energy_mean * 0.2
+        high_energy_threshold = energy_mean * 1.5
+        
+        low_energy_frames = 0
+        speech_frames = 0
+        runs = _TerminatedRuns()
+        self._energy_spill.flush()
+        self._energy_spill.seek(0)
+        while True:
+            rms = np.fromfile(self._energy_spill, dtype=np.float32, count=_SPILL_READ_FRAMES)
+            if len(rms) == 0:
+                break
+            low_energy_frames += np.sum(rms < energy_threshold)
+            speech_frames += np.sum(rms > speech_threshold)
+            runs.update(rms > high_energy_threshold)
+        self._energy_spill.seek(0, os.SEEK_END)
+        
+        return {
+            'pitch_std': self._pitch_moments.std if self._pitch_moments.count > 0 else 0,
+            'energy_mean': energy_mean,
+            'energy_std': self._energy_moments.std,
+            'silence_ratio': low_energy_frames / self.n_frames,
+            'speech_ratio': speech_frames / self.n_frames,
+            'zcr': self._zcr_moments.mean,
+            'spectral_centroid': self._centroid_moments.mean,
+            'sustained_energy_ratio': runs.longest / self.n_frames
+        }
+
+    def release(self):
+        """Delete the temporary energy spill file."""
+        self._energy_spill.close()
+
+    def _record(self, rms, pitch_track, zcr, spectral_centroid):
+        self._pitch_moments.update(pitch_track[pitch_track > 0])
+        self._energy_moments.update(rms)
+        self._zcr_moments.update(zcr)
+        self._centroid_moments.update(spectral_centroid)
+        self._energy_spill.write(rms.astype(np.float32).tobytes())
+
+
+class _RunningMoments:
+    """Count, mean and sum of squared deviations, merged batch by batch (Chan et al.)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        n = len(values)
+        if n == 0:
+            return
+        values = np.asarray(values, dtype=np.float64)
+        batch_mean = np.mean(values)
+        batch_m2 = np.sum((values - batch_mean) ** 2)
+        
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += batch_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.m2 / self.count)) if self.count else 0.0
+
+
+class _TerminatedRuns:
+    """Longest run of True values followed by a False value, tracked across pieces."""
+
+    def __init__(self):
+        self.longest = 0
+        self._open_run = 0
+
+    def update(self, mask):
+        if len(mask) == 0:
+            return
+        breaks = np.flatnonzero(~mask)
+        if len(breaks) == 0:
+            self._open_run += len(mask)
+            return
+        # Run lengths ending at each break, the first one continuing the open run
+        run_ends = np.diff(np.concatenate(([-1], breaks))) - 1
+        run_ends[0] += self._open_run
+        self.longest = max(self.longest, int(run_ends.max()))
+        self._open_run = len(mask) - 1 - breaks[-1]
+
+
+def extract_prosody_features_blockwise(audio_path, block_seconds=DEFAULT_BLOCK_SECONDS, sr=None, pitch_backend=None,
+                                       n_fft=N_FFT, hop_length=HOP_LENGTH):
+    """
+    Extract prosody features while decoding and analyzing one block at a time.
+    
+    Args:
+        audio_path: Path to audio file
+        block_seconds: Length of each decoded block
+        sr: Analysis sampling rate; blocks are resampled on the fly (None keeps the native rate)
+        pitch_backend: One of PITCH_BACKENDS (default: PITCH_BACKEND, set by TKI_PITCH_BACKEND)
+        n_fft: Frame length / FFT size at the analysis rate
+        hop_length: Number of samples between frames at the analysis rate
+    
+    Returns:
+        dict: Same keys as extract_prosody_features
+    """
+    info = sf.info(audio_path)
+    resampler = None
+    if sr is not None and sr != info.samplerate:
+        import soxr
+        resampler = soxr.ResampleStream(info.samplerate, sr, 1, dtype='float32', quality='HQ')
+    analyzer = BlockProsodyAnalyzer(
+        sr or info.samplerate, pitch_backend=pitch_backend, n_fft=n_fft, hop_length=hop_length
+    )
+    try:
+        blocksize = max(int(block_seconds * info.samplerate), 1)
+        blocks = sf.blocks(audio_path, blocksize=blocksize, dtype='float32', always_2d=True)
+        for block in blocks:
+            if resampler is not None:
+                mono = block.mean(axis=1, dtype=np.float32) if block.shape[1] > 1 else block[:, 0]
+                block = resampler.resample_chunk(np.ascontiguousarray(mono))
+            analyzer.push(block)
+        if resampler is not None:
+            analyzer.push(resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True))
+        analyzer.close()
+        return analyzer.features()
+    finally:
+        analyzer.release()
+
+
+def analyze_prosody_blockwise(audio_path, block_seconds=DEFAULT_BLOCK_SECONDS, sr=None):
+    """
+    Analyze audio prosody with memory use independent of recording length.
+    
+    Args:
+        audio_path: Path to audio file
+        block_seconds: Length of each decoded block
+        sr: Analysis sampling rate (None keeps the native rate)
+    
+    Returns:
+        tuple: (tension, assertiveness) scores between 0 and 1
+    """
+    return score_prosody(extract_prosody_features_blockwise(audio_path, block_seconds, sr))
+
+
+def _measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    features = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return features, elapsed, peak
+
+
+def main():
+    """Compare peak memory of whole-file and block-wise analysis on audio files."""
+    parser = argparse.ArgumentParser(description="Peak memory of whole-file vs block-wise prosody analysis.")
+    parser.add_argument('audio', nargs='+')
+    parser.add_argument('--block-seconds', type=float, default=DEFAULT_BLOCK_SECONDS)
+    args = parser.parse_args()
+    
+    for audio_path in args.audio:
+        duration = sf.info(audio_path).duration
+        print(f"{audio_path} ({duration:.1f} s)")
+
+        def whole_file():
+            y, sr = librosa.load(audio_path, sr=None)
+            return extract_prosody_features(y, sr)
+        
+        for label, func in [
+            ('whole-file', whole_file),
+            ('block-wise', lambda: extract_prosody_features_blockwise(audio_path, args.block_seconds))
+        ]:
+            features, elapsed, peak = _measure(func)
+            print(f"  {label:<10}  peak: {peak / 1024 / 1024:8.1f} MiB  time: {elapsed:6.2f} s  "
+                  f"score: {score_prosody(features, debug=False)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+import hashlib
+import os
+
+import instrumentation
+from pipeline import analyze_turn
+
+
+# Weight of the newest turn in each speaker's moving tension average
+TENSION_EWMA_ALPHA = 0.3
+
+# Defaults of ConversationSession.materially_changed
+MATERIAL_TENSION_CHANGE = 0.1
+MAX_UNRESOLVED_TURNS = 10
+
+
+class ConversationSession:
+    """
+    A conversation analyzed turn by turn as it grows.
+    
+    Every turn is fingerprinted by person, text and audio (path, size and
+    modification time, or the samples of a decoded signal), and only turns
+    whose fingerprint is new are analyzed; a resent history costs one hash
+    per turn. Per-speaker statistics (running tension mean, moving average
+    and least-squares slope, style counts and style transitions) are
+    updated in O(1) per appended turn and rebuilt only when an earlier turn
+    changes. materially_changed() compares the speakers' styles and moving
+    tension with the state at the last resolution, so a chat integration
+    can skip resolution calls for turns that change nothing of substance.
+    """
+
+    def __init__(self, cache=None, text_only=False, audio_bounds=None):
+        """
+        Args:
+            cache: Optional FeatureCache so unchanged audio is not decoded again
+            text_only: Score the text alone, without loading the audio stack
+            audio_bounds: Cascade bounds; skip the audio when the text settles the style
+        """
+        self.cache = cache
+        self.text_only = text_only
+        self.audio_bounds = audio_bounds
+        self.results = []
+        self.speakers = {}
+        self.resolution = None
+        # Per speaker: sums of turn number, tension, their product and turn number squared
+        self._slope_sums = {}
+        self._fingerprints = []
+        self._history_changed = False
+        self._resolved_turns = 0
+        self._resolved_state = {}
+        self._builder = None
+        self._builder_settings = None
+
+    def append(self, turn):
+        """
+        Analyze one new turn at the end of the conversation.
+        
+        Args:
+            turn: Dict with 'person', 'text', and 'audio' keys
+        
+        Returns:
+            dict: The turn's analysis (person, text, tension, assertiveness, style)
+        """
+        result = self._analyze(len(self.results) + 1, turn)
+        self.results.append(result)
+        self._fingerprints.append(turn_fingerprint(turn))
+        self._record(result)
+        if self._builder is not None:
+            self._builder.append(result)
+        return result
+
+    def update(self, turns):
+        """
+        Bring the session in line with the full current list of turns.
+        
+        Turns whose fingerprint matches the stored one at the same position
+        keep their analysis; changed turns are analyzed again, new turns are
+        appended, and turns beyond the new length are dropped. Changing or
+        dropping an earlier turn rebuilds the speaker statistics.
+        
+        Args:
+            turns: List of dicts with 'person', 'text', and 'audio' keys
+        
+        Returns:
+            list: Analysis of every turn, in turn order
+        """
+        rebuild = len(turns) < len(self.results)
+        del self.results[len(turns):]
+        del self._fingerprints[len(turns):]
+        
+        for i, turn in enumerate(turns):
+            fingerprint = turn_fingerprint(turn)
+            if i < len(self.results):
+                if fingerprint == self._fingerprints[i]:
+                    instrumentation.increment('session.turns_reused')
+                    continue
+                self.results[i] = self._analyze(i + 1, turn)
+                self._fingerprints[i] = fingerprint
+                rebuild = True
+            else:
+                if rebuild:
+                    self._rebuild()
+                    rebuild = False
+                self.append(turn)
+        
+        if rebuild:
+            self._rebuild()
+        return self.results
+
+    def materially_changed(self, tension_change=MATERIAL_TENSION_CHANGE, max_unresolved_turns=MAX_UNRESOLVED_TURNS):
+        """
+        Whether the conversation changed enough since the last resolution to ask for a new one.
+        
+        True when nothing was resolved yet, an earlier turn was edited or
+        removed, a speaker joined, any speaker's latest style differs, any
+        speaker's moving tension average moved by at least tension_change,
+        or max_unresolved_turns turns were added. Costs O(speakers).
+        
+        Args:
+            tension_change: Smallest moving tension change that counts
+            max_unresolved_turns: New turns after which a resolution is due anyway
+        
+        Returns:
+            bool
+        """
+        if self.resolution is None or self._history_changed:
+            return True
+        if len(self.results) - self._resolved_turns >= max_unresolved_turns:
+            return True
+        for person, stats in self.speakers.items():
+            resolved = self._resolved_state.get(person)
+            if resolved is None or stats['last_style'] != resolved[0]:
+                return True
+            if abs(stats['tension_ewma'] - resolved[1]) >= tension_change:
+                return True
+        return False
+
+    def mark_resolved(self, resolution):
+        """
+        Record a resolution for the current state; materially_changed() compares against it.
+        
+        Args:
+            resolution: Resolution text
+        """
+        self.resolution = resolution
+        self._history_changed = False
+        self._resolved_turns = len(self.results)
+        self._resolved_state = {
+            person: (stats['last_style'], stats['tension_ewma']) for person, stats in self.speakers.items()
+        }
+
+    async def resolve(self, service, force=False):
+        """
+        Resolution for the conversation so far, calling the API only after a material change.
+        
+        The prompt comes from a PromptBuilder kept up to date as turns are
+        appended, so it is not rebuilt from the whole history.
+        
+        Args:
+            service: ai_resolution.ResolutionService
+            force: Ask for a new resolution even without a material change
+        
+        Returns:
+            str: Resolution text
+        """
+        if not force and not self.materially_changed():
+            instrumentation.increment('session.resolution_reused')
+            return self.resolution
+        resolution = await service.resolve(self.results, builder=self.prompt_builder(service.template, service.token_budget))
+        self.mark_resolved(resolution)
+        return resolution
+
+    def prompt_builder(self, template, token_budget):
+        """
+        Args:
+            template: Prompt template with a {conversation_summary} field
+            token_budget: Estimated prompt token limit (None quotes every turn)
+        
+        Returns:
+            ai_resolution.PromptBuilder: Fed every turn so far and kept up to date by append
+        """
+        if self._builder is None or self._builder_settings != (template, token_budget):
+            # Imported on first use; the Gemini SDK is slow to load
+            from ai_resolution import PromptBuilder
+            self._builder = PromptBuilder(template, token_budget)
+            self._builder.extend(self.results)
+            self._builder_settings = (template, token_budget)
+        return self._builder
+
+    def _analyze(self, index, turn):
+        instrumentation.emit('turn_start', index=index, person=turn['person'])
+        result = analyze_turn(turn, cache=self.cache, text_only=self.text_only, audio_bounds=self.audio_bounds)
+        instrumentation.emit('turn', index=index, **result)
+        instrumentation.increment('session.turns_analyzed')
+        return result
+
+    def _record(self, result):
+        """Fold one turn into its speaker's running statistics."""
+        stats = self.speakers.get(result['person'])
+        if stats is None:
+            stats = self.speakers[result['person']] = {
+                'turns': 0,
+                'tension_mean': 0.0,
+                'tension_ewma': result['tension'],
+                'tension_slope': 0.0,
+                'assertiveness_mean': 0.0,
+                'last_style': None,
+                'styles': {},
+                'transitions': {}
+            }
+            self._slope_sums[result['person']] = [0.0, 0.0, 0.0, 0.0]
+        n = stats['turns'] = stats['turns'] + 1
+        tension = result['tension']
+        stats['tension_mean'] += (tension - stats['tension_mean']) / n
+        stats['assertiveness_mean'] += (result['assertiveness'] - stats['assertiveness_mean']) / n
+        if n > 1:
+            stats['tension_ewma'] += TENSION_EWMA_ALPHA * (tension - stats['tension_ewma'])
+        
+        # Least-squares slope of tension against the speaker's turn number, from running sums
+        sums = self._slope_sums[result['person']]
+        sums[0] += n
+        sums[1] += tension
+        sums[2] += n * tension
+        sums[3] += n * n
+        spread = n * sums[3] - sums[0] ** 2
+        stats['tension_slope'] = (n * sums[2] - sums[0] * sums[1]) / spread if spread else 0.0
+        
+        style = result['style']
+        stats['styles'][style] = stats['styles'].get(style, 0) + 1
+        if stats['last_style'] is not None:
+            transition = (stats['last_style'], style)
+            stats['transitions'][transition] = stats['transitions'].get(transition, 0) + 1
+        stats['last_style'] = style
+
+    def _rebuild(self):
+        """Recompute speaker statistics and the prompt after an earlier turn changed."""
+        self.speakers = {}
+        self._slope_sums = {}
+        for result in self.results:
+            self._record(result)
+        self._builder = None
+        self._history_changed = True
+
+
+def turn_fingerprint(turn):
+    """
+    Identify a turn's analysis inputs without reading its audio file.
+    
+    Args:
+        turn: Dict with 'person', 'text', and 'audio' keys
+    
+    Returns:
+        str: Hex digest of the person, text and audio identity
+    """
+    digest = hashlib.sha256()
+    digest.update(turn['person'].encode('utf-8') + b'\0' + turn['text'].encode('utf-8') + b'\0')
+    audio = turn.get('audio')
+    if isinstance(audio, tuple):
+        # Sampling rate, and the native rate of a resampled signal
+        rates = ':'.join(str(rate) for rate in audio[1:])
+        digest.update(f"signal:{rates}:".encode() + audio[0].tobytes())
+    elif audio is not None:
+        try:
+            stat = os.stat(audio)
+            digest.update(f"file:{os.path.abspath(audio)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        except OSError:
+            digest.update(f"missing:{audio}".encode())
+    return digest.hexdigest()
@@ -0,0 +1,192 @@
+import argparse
+import hashlib
+import json
+import os
+
+from sqlite_lru import SQLiteLRUCache
+
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'TKI_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'tki')
+)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Remembered file digests; the oldest are forgotten first, costing a re-hash if the file comes back
+DEFAULT_MAX_FILES = 100000
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class FeatureCache(SQLiteLRUCache):
+    """
+    Persistent, content-addressed cache of extracted prosody features.
+    
+    Entries are keyed by a hash of the audio file content plus the analysis
+    parameters, so renamed or copied files still hit and any change to the
+    audio or to the extraction settings misses. Only the feature statistics
+    are stored, which keeps re-scoring after a weight or threshold change
+    free of any audio decoding. The least recently used entries are evicted
+    once the stored features exceed max_bytes, and the digests of files
+    hashed longest ago once more than max_files are remembered.
+    """
+
+    FILENAME = 'features.sqlite3'
+    TABLE = 'features'
+    VALUE_COLUMN = 'data'
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            digest TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, max_files=DEFAULT_MAX_FILES):
+        """
+        Args:
+            cache_dir: Directory holding the cache database (default: TKI_CACHE_DIR or ~/.cache/tki)
+            max_bytes: Upper bound on the size of stored feature entries
+            max_files: Upper bound on the number of remembered file digests
+        """
+        super().__init__(cache_dir or DEFAULT_CACHE_DIR, max_bytes)
+        self.max_files = max_files
+
+    def key_for(self, audio_path, params):
+        """
+        Build the cache key for an audio file analyzed with the given parameters.
+        
+        Args:
+            audio_path: Path to audio file
+            params: Dict of analysis parameters affecting the features
+        
+        Returns:
+            str: Hex digest identifying the (content, parameters) pair
+        """
+        content_digest = self._content_digest(audio_path)
+        encoded_params = json.dumps(params, sort_keys=True)
+        return hashlib.sha256(f"{content_digest}:{encoded_params}".encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Look up cached features.
+        
+        Args:
+            key: Key from key_for
+        
+        Returns:
+            dict or None: Features exactly as they were stored, or None on a miss
+        """
+        data = self._lookup(key)
+        return None if data is None else _decode_features(data)
+
+    def put(self, key, features):
+        """
+        Store features and evict old entries if the cache grew past max_bytes.
+        
+        Args:
+            key: Key from key_for
+            features: Dict of scalar feature values
+        """
+        data = _encode_features(features)
+        self._store(key, data, len(data))
+
+    def stats(self):
+        """
+        Summarize cache contents.
+        
+        Returns:
+            dict: path, entries, bytes, max_bytes, known_files and max_files
+        """
+        entries, total = self._totals()
+        known_files = self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        return {
+            'path': self.path,
+            'entries': entries,
+            'bytes': total,
+            'max_bytes': self.max_bytes,
+            'known_files': known_files,
+            'max_files': self.max_files
+        }
+
+    def clear(self):
+        """
+        Remove every cached entry.
+        
+        Returns:
+            int: Number of feature entries removed
+        """
+        removed = self._clear()
+        with self.conn:
+            self.conn.execute("DELETE FROM files")
+        return removed
+
+    def _content_digest(self, audio_path):
+        """Hash file content, reusing the stored digest while size and mtime are unchanged."""
+        path = os.path.abspath(audio_path)
+        stat = os.stat(path)
+        row = self.conn.execute("SELECT size, mtime_ns, digest FROM files WHERE path = ?", (path,)).fetchone()
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+        
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        digest = digest.hexdigest()
+        
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, digest)
+            )
+            # A replaced row gets a new rowid, so rowid order is the order files were last hashed
+            excess = self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0] - self.max_files
+            if excess > 0:
+                self.conn.execute(
+                    "DELETE FROM files WHERE rowid IN (SELECT rowid FROM files ORDER BY rowid LIMIT ?)",
+                    (excess,)
+                )
+        return digest
+
+
+def _encode_features(features):
+    """Serialize features with their dtypes so cached values score identically to fresh ones."""
+    import numpy as np
+    
+    return json.dumps({
+        name: [value.item() if hasattr(value, 'item') else value, np.asarray(value).dtype.str]
+        for name, value in features.items()
+    }, sort_keys=True)
+
+
+def _decode_features(data):
+    import numpy as np
+    
+    return {
+        name: np.dtype(dtype).type(value)
+        for name, (value, dtype) in json.loads(data).items()
+    }
+
+
+def main():
+    """Command line entry point to inspect or clear the feature cache."""
+    parser = argparse.ArgumentParser(description="Inspect or clear the prosody feature cache.")
+    parser.add_argument('command', choices=['stats', 'clear'])
+    parser.add_argument('--dir', default=None, help="Cache directory (default: TKI_CACHE_DIR or ~/.cache/tki)")
+    args = parser.parse_args()
+    
+    cache = FeatureCache(args.dir)
+    if args.command == 'stats':
+        stats = cache.stats()
+        print(f"Cache: {stats['path']}")
+        print(f"  Entries: {stats['entries']} ({stats['known_files']} audio files hashed)")
+        print(f"  Size: {stats['bytes'] / 1024:.1f} KiB of {stats['max_bytes'] / 1024 / 1024:.0f} MiB")
+    else:
+        removed = cache.clear()
+        print(f"Removed {removed} cached feature entries from {cache.path}")
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
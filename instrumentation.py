@@ -0,0 +1,318 @@
+import json
+import numbers
+import sys
+import time
+from collections import deque
+
+
+# Active sink; None disables instrumentation
+_sink = None
+
+
+def configure(sink):
+    """
+    Route instrumentation to a sink.
+    
+    Args:
+        sink: Object with a handle(event) method, or None to disable instrumentation
+    
+    Returns:
+        The previously configured sink
+    """
+    global _sink
+    previous = _sink
+    _sink = None if isinstance(sink, NullSink) else sink
+    return previous
+
+
+def get_sink():
+    return _sink
+
+
+def enabled():
+    return _sink is not None
+
+
+def stage(name):
+    """
+    Time a pipeline stage.
+    
+    Usage: with stage('pitch'): ...
+    
+    Args:
+        name: Stage name (decode, stft, pitch, energy, sentiment, keyword, fusion, llm, ...)
+    
+    Returns:
+        Context manager emitting a timer event on exit (a shared no-op when disabled)
+    """
+    if _sink is None:
+        return _NULL_TIMER
+    return _StageTimer(name)
+
+
+def increment(name, value=1):
+    """
+    Add to a counter.
+    
+    Args:
+        name: Counter name
+        value: Amount to add
+    """
+    if _sink is not None:
+        _sink.handle({'type': 'counter', 'name': name, 'value': value, 't': time.time()})
+
+
+def emit(name, **fields):
+    """
+    Emit a named event carrying intermediate values.
+    
+    Args:
+        name: Event name (analyzing, sentiment, prosody, fusion, turn, ...)
+        **fields: Event values
+    """
+    if _sink is not None:
+        event = {'type': 'event', 'name': name, 't': time.time()}
+        event.update(fields)
+        _sink.handle(event)
+
+
+def replay(events):
+    """
+    Hand events recorded elsewhere, e.g. by an EventBuffer in a worker process, to the active sink.
+    
+    Args:
+        events: List of event dicts, in the order they were recorded
+    """
+    if _sink is not None:
+        for event in events:
+            _sink.handle(event)
+
+
+class _StageTimer:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        if _sink is not None:
+            _sink.handle({'type': 'timer', 'name': self.name, 'seconds': seconds, 't': time.time()})
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class NullSink:
+    """Discards everything; configuring it disables instrumentation entirely."""
+
+    def handle(self, event):
+        pass
+
+
+class EventBuffer:
+    """Keeps events in a list, to be sent to another process and replayed there."""
+
+    def __init__(self):
+        self.events = []
+
+    def handle(self, event):
+        self.events.append(event)
+
+
+class JsonLinesSink:
+    """Writes one JSON object per event to a file path or an open text stream."""
+
+    def __init__(self, target):
+        """
+        Args:
+            target: File path (appended to) or a writable text stream
+        """
+        if isinstance(target, str):
+            self.path = target
+            self._stream = None
+        else:
+            self.path = None
+            self._stream = target
+
+    def handle(self, event):
+        if self._stream is None:
+            self._stream = open(self.path, 'a', buffering=1, encoding='utf-8')
+        self._stream.write(json.dumps(event, default=_to_json) + '\n')
+
+    def close(self):
+        if self.path is not None and self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def __getstate__(self):
+        # Worker processes reopen the file; open streams cannot be pickled
+        state = self.__dict__.copy()
+        if self.path is not None:
+            state['_stream'] = None
+        return state
+
+
+class MetricsAggregator:
+    """
+    Keeps timers, counters and numeric event values in memory and reports percentiles.
+    """
+
+    def __init__(self, window=None):
+        """
+        Args:
+            window: Keep only the most recent samples per timer and value (None keeps
+                everything); bounds memory in long running processes. Counters are
+                always totals.
+        """
+        self.window = window
+        self.timers = {}
+        self.counters = {}
+        self.values = {}
+
+    def handle(self, event):
+        kind = event['type']
+        if kind == 'timer':
+            self._samples(self.timers, event['name']).append(event['seconds'])
+        elif kind == 'counter':
+            self.counters[event['name']] = self.counters.get(event['name'], 0) + event['value']
+        else:
+            for field, value in event.items():
+                if field not in ('type', 'name', 't') and _is_number(value):
+                    self._samples(self.values, f"{event['name']}.{field}").append(float(value))
+
+    def _samples(self, series, name):
+        samples = series.get(name)
+        if samples is None:
+            samples = series[name] = [] if self.window is None else deque(maxlen=self.window)
+        return samples
+
+    def summary(self):
+        """
+        Returns:
+            dict: 'timers' and 'values' (per name: count, total, mean, p50, p90, p99, max)
+            and 'counters' (per name: total)
+        """
+        return {
+            'timers': {name: _distribution(samples) for name, samples in self.timers.items()},
+            'counters': dict(self.counters),
+            'values': {name: _distribution(samples) for name, samples in self.values.items()}
+        }
+
+    def report(self):
+        """
+        Returns:
+            str: Human readable table of stage timings and counters
+        """
+        summary = self.summary()
+        lines = [f"{'stage':<20}{'count':>8}{'total s':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for name, stats in sorted(summary['timers'].items()):
+            lines.append(
+                f"{name:<20}{stats['count']:>8}{stats['total']:>10.3f}"
+                f"{stats['p50'] * 1000:>10.2f}{stats['p90'] * 1000:>10.2f}"
+                f"{stats['p99'] * 1000:>10.2f}{stats['max'] * 1000:>10.2f}"
+            )
+        for name, total in sorted(summary['counters'].items()):
+            lines.append(f"{name:<20}{total:>8}")
+        return "\n".join(lines)
+
+
+class ConsoleSink:
+    """Renders analysis events as the human readable debug output on stdout."""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def handle(self, event):
+        if event['type'] != 'event':
+            return
+        render = _CONSOLE_FORMATS.get(event['name'])
+        if render is not None:
+            print(render(event), file=self.stream or sys.stdout)
+
+
+class MultiSink:
+    """Forwards every event to several sinks."""
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def handle(self, event):
+        for sink in self.sinks:
+            sink.handle(event)
+
+
+_CONSOLE_FORMATS = {
+    'turn_start': lambda e: f"Turn {e['index']}: {e['person']}",
+    'analyzing': lambda e: f"  Analyzing: '{e['text'][:60]}...'",
+    'sentiment': lambda e: "\n".join([
+        f"    [Sentiment]",
+        f"      Polarity: {e['polarity']:.2f}, Subjectivity: {e['subjectivity']:.2f}",
+        f"    [Compliance] Score: {e['compliance']:.3f}, [Avoidance] Score: {e['avoidance']:.3f}, [Collaboration] Score: {e['collaboration']:.3f}",
+        f"    [Text] Tension: {e['tension']:.3f}, Assertiveness: {e['assertiveness']:.3f}"
+    ]),
+    'prosody': lambda e: "\n".join([
+        f"    [Prosody Debug]",
+        f"      Pitch:std: {e['pitch_std']:.1f}",
+        f"      Energy: mean={e['energy_mean']:.4f}, std={e['energy_std']:.4f}",
+        f"      Silence ratio: {e['silence_ratio']:.3f} (threshold: {e['energy_threshold']:.4f})",
+        f"      Speech ratio: {e['speech_ratio']:.3f}",
+        f"      Sustained energy ratio: {e['sustained_energy_ratio']:.3f}",
+        f"      Weighted variance - Pitch: {e['weighted_pitch_var']:.3f}, Energy: {e['weighted_energy_var']:.3f}",
+        f"    [Prosody] Tension: {e['tension']:.3f}, Assertiveness: {e['assertiveness']:.3f}"
+    ]),
+    'audio_error': lambda e: f"Audio error: {e['error']}",
+    'cascade_skip': lambda e: f"    [Cascade] Audio skipped, text settles the style: {e['style']}",
+    'fusion': lambda e: f"    [FINAL] Tension: {e['tension']:.3f}, Assertiveness: {e['assertiveness']:.3f}\n",
+    'turn': lambda e: "\n".join([
+        f"→ TENSION: {e['tension']}, ASSERTIVENESS: {e['assertiveness']}"
+        + (" (estimated, audio skipped)" if e.get('audio_skipped') else ""),
+        f"→ TKI STYLE: {e['style']}",
+        "-" * 70
+    ])
+}
+
+
+def _distribution(samples):
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        'count': len(ordered),
+        'total': total,
+        'mean': total / len(ordered),
+        'p50': _percentile(ordered, 50),
+        'p90': _percentile(ordered, 90),
+        'p99': _percentile(ordered, 99),
+        'max': ordered[-1]
+    }
+
+
+def _percentile(ordered, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(int(-(-percent * len(ordered) // 100)), 1)
+    return ordered[rank - 1]
+
+
+def _is_number(value):
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+def _to_json(value):
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
@@ -0,0 +1,177 @@
+import numpy as np
+from textblob.en import sentiment as pattern_sentiment
+from textblob._text import EMOTICONS, PUNCTUATION
+
+
+class LexiconSentiment:
+    """
+    Batch polarity/subjectivity scoring that reproduces TextBlob's pattern analyzer.
+    
+    The pattern lexicon is flattened into arrays indexed by word id. Texts
+    whose tokens contain no negation, modifier, exclamation mark or
+    emoticon (the only things that make pattern's scoring order-dependent)
+    are scored together with one gather and two bincounts. The remaining
+    texts go through a direct port of pattern's sequential assessment using
+    the same flat lookups. Both paths give exactly TextBlob's values.
+    """
+
+    def __init__(self, lexicon=pattern_sentiment):
+        """
+        Args:
+            lexicon: Pattern Sentiment lexicon (default: the one TextBlob uses)
+        """
+        len(lexicon)  # Loads the lazily populated lexicon
+        self._tokenizer = lexicon.tokenizer
+        self._negations = frozenset(lexicon.negations)
+        self._modifier = lexicon.modifier
+        
+        self._word_ids = {}
+        polarity, subjectivity, intensity, is_modifier = [], [], [], []
+        for word, senses in dict.items(lexicon):
+            if None not in senses:
+                continue
+            p, s, i = senses[None]
+            self._word_ids[word] = len(polarity)
+            polarity.append(p)
+            subjectivity.append(s)
+            intensity.append(i)
+            is_modifier.append(any(pos in senses for pos in lexicon.modifiers))
+        self._polarity = polarity
+        self._subjectivity = subjectivity
+        self._intensity = intensity
+        self._polarity_array = np.array(polarity, dtype=np.float64)
+        self._subjectivity_array = np.array(subjectivity, dtype=np.float64)
+        self._is_modifier = is_modifier
+        
+        # Pattern checks the emoticon groups in order and stops at the first match
+        self._emoticons = {}
+        for (_, p), group in EMOTICONS.items():
+            for emoticon in group:
+                self._emoticons.setdefault(emoticon.lower(), p)
+        
+        self._special_words = frozenset(
+            [word for word, word_id in self._word_ids.items() if is_modifier[word_id]] +
+            list(self._negations) + ['!', '(!)']
+        )
+
+    def tokenize(self, text):
+        """
+        Lowercased tokens exactly as pattern assesses them.
+        
+        Args:
+            text: Text string
+        
+        Returns:
+            list: Tokens
+        """
+        return [w.lower() for w in " ".join(self._tokenizer(text)).split()]
+
+    def score(self, text):
+        """
+        Args:
+            text: Text string to analyze
+        
+        Returns:
+            tuple: (polarity, subjectivity), as TextBlob(text).sentiment
+        """
+        return self.score_batch([text])[0]
+
+    def score_batch(self, texts):
+        """
+        Score many texts at once.
+        
+        Args:
+            texts: List of text strings
+        
+        Returns:
+            list: (polarity, subjectivity) tuple for each text, in input order
+        """
+        results = [None] * len(texts)
+        row_ids, word_ids = [], []
+        simple_rows = []
+        for index, text in enumerate(texts):
+            tokens = self.tokenize(text)
+            if self._is_order_dependent(tokens):
+                results[index] = self._score_sequential(tokens)
+                continue
+            row = len(simple_rows)
+            simple_rows.append(index)
+            for w in tokens:
+                word_id = self._word_ids.get(w)
+                if word_id is not None:
+                    row_ids.append(row)
+                    word_ids.append(word_id)
+        
+        if simple_rows:
+            row_ids = np.array(row_ids, dtype=np.intp)
+            word_ids = np.array(word_ids, dtype=np.intp)
+            n_rows = len(simple_rows)
+            counts = np.bincount(row_ids, minlength=n_rows)
+            polarity_sums = np.bincount(row_ids, weights=self._polarity_array[word_ids], minlength=n_rows)
+            subjectivity_sums = np.bincount(row_ids, weights=self._subjectivity_array[word_ids], minlength=n_rows)
+            denominators = np.maximum(counts, 1)
+            polarities = (polarity_sums / denominators).tolist()
+            subjectivities = (subjectivity_sums / denominators).tolist()
+            for row, index in enumerate(simple_rows):
+                results[index] = (polarities[row], subjectivities[row])
+        return results
+
+    def _is_order_dependent(self, tokens):
+        special = self._special_words
+        for w in tokens:
+            if w in special or w in self._emoticons:
+                return True
+        return False
+
+    def _score_sequential(self, tokens):
+        """Port of pattern's Sentiment.assessments for untagged tokens, averaged as in Sentiment.__call__."""
+        a = []
+        m = None  # Preceding modifier
+        n = None  # Preceding negation
+        for w in tokens:
+            word_id = self._word_ids.get(w)
+            if word_id is not None:
+                p = self._polarity[word_id]
+                s = self._subjectivity[word_id]
+                i = self._intensity[word_id]
+                if m is None:
+                    a.append([p, s, i, 1])
+                else:
+                    a[-1][0] = max(-1.0, min(p * a[-1][2], +1.0))
+                    a[-1][1] = max(-1.0, min(s * a[-1][2], +1.0))
+                    a[-1][2] = i
+                if n is not None:
+                    a[-1][2] = 1.0 / a[-1][2]
+                    a[-1][3] = -1
+                m = None
+                n = None
+                if self._is_modifier[word_id]:
+                    m = w
+                if w in self._negations:
+                    n = w
+            else:
+                if w in self._negations:
+                    n = w
+                elif n and len(w.strip("'")) > 1:
+                    n = None
+                if n is not None and m is not None and self._modifier(m):
+                    a[-1][3] = -1
+                    n = None
+                elif m and len(w) > 2:
+                    m = None
+                if w == "!" and len(a) > 0:
+                    a[-1][0] = max(-1.0, min(a[-1][0] * 1.25, +1.0))
+                if w == "(!)":
+                    a.append([0.0, 1.0, 1.0, 1])
+                if w.isalpha() is False and len(w) <= 5 and w not in PUNCTUATION:
+                    p = self._emoticons.get(w)
+                    if p is not None:
+                        a.append([p, 1.0, 1.0, 1])
+        
+        polarity_sum = 0
+        subjectivity_sum = 0
+        for p, s, _, negated in a:
+            polarity_sum += 1 * (p * -0.5 if negated < 0 else p)
+            subjectivity_sum += 1 * s
+        count = float(len(a) or 1)
+        return polarity_sum / count, subjectivity_sum / count
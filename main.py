@@ -1,52 +1,52 @@
+import argparse
 import os
-from analyzer import compute_tension_and_assertiveness
-from tki_mapper import map_tki_style
-from ai_resolution import generate_resolution
+import instrumentation
+from analyzer import CASCADE_AUDIO_BOUNDS, FULL_AUDIO_BOUNDS
+from pipeline import analyze_conversation
+from feature_cache import FeatureCache
 from input2 import SAMPLE_CONVERSATION
 
 
-def analyze_conversation(conversation):
-    """
-    Analyze a full conversation and return analysis results.
-    
-    Args:
-        conversation: List of dicts with 'person', 'text', and 'audio' keys
-        
-    Returns:
-        list: Analysis results for each turn
-    """
-    conversation_analysis = []
-    
-    for i, turn in enumerate(conversation, 1):
-        print(f"Turn {i}: {turn['person']}")
-        
-        tension, assertiveness = compute_tension_and_assertiveness(
-            turn['text'], 
-            turn['audio']
-        )
-        
-        style = map_tki_style(tension, assertiveness)
-        
-        print(f"→ TENSION: {tension}, ASSERTIVENESS: {assertiveness}")
-        print(f"→ TKI STYLE: {style}")
-        print("-" * 70)
-        
-        conversation_analysis.append({
-            'person': turn['person'],
-            'text': turn['text'],
-            'tension': tension,
-            'assertiveness': assertiveness,
-            'style': style
-        })
-    
-    return conversation_analysis
-
-
 def main():
     """Main execution function."""
+    parser = argparse.ArgumentParser(description="TKI conflict style analysis of the sample conversation.")
+    parser.add_argument('--text-only', action='store_true',
+                        help="Score the text alone; the audio stack (librosa) is never imported")
+    parser.add_argument('--analysis-only', action='store_true',
+                        help="Skip the AI resolution; the Gemini SDK is never imported")
+    parser.add_argument('--cascade', action='store_true',
+                        help="Skip audio analysis of turns whose text settles the style within TKI_CASCADE_BOUNDS "
+                             "(required; there are no default bounds)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Analyze turns in this many worker processes (default: serially)")
+    parser.add_argument('--chunksize', type=int, default=1, help="Turns handed to a worker at a time")
+    args = parser.parse_args()
+    if args.cascade and CASCADE_AUDIO_BOUNDS == FULL_AUDIO_BOUNDS:
+        parser.error("--cascade needs calibrated TKI_CASCADE_BOUNDS (see benchmark.py --cascade); "
+                     "over the full score range no turn can be skipped")
+    
+    # Show the analysis as console output, optionally also logging structured events
+    sink = instrumentation.ConsoleSink()
+    events_log = os.getenv('TKI_EVENTS_LOG')
+    if events_log:
+        sink = instrumentation.MultiSink(sink, instrumentation.JsonLinesSink(events_log))
+    instrumentation.configure(sink)
+    
+    # Analyze conversation, reusing cached prosody features across runs
+    cache = None if args.text_only else FeatureCache()
+    conversation_analysis = analyze_conversation(
+        SAMPLE_CONVERSATION,
+        cache=cache,
+        workers=args.workers,
+        chunksize=max(args.chunksize, 1),
+        text_only=args.text_only,
+        audio_bounds=CASCADE_AUDIO_BOUNDS if args.cascade else None
+    )
+    if cache is not None:
+        cache.close()
     
-    # Analyze conversation
-    conversation_analysis = analyze_conversation(SAMPLE_CONVERSATION)
+    if args.analysis_only:
+        return
     
     # Generate AI resolution
     print("\n" + "=" * 70)
@@ -61,6 +61,8 @@ def main():
         print("Example: export GOOGLE_API_KEY='your-api-key-here'")
         print("Or get one from: https://makersuite.google.com/app/apikey")
     else:
+        # Imported only when a resolution is requested; the Gemini SDK is slow to load
+        from ai_resolution import generate_resolution
         resolution = generate_resolution(conversation_analysis, api_key)
         print(resolution)
 
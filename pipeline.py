@@ -0,0 +1,195 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import instrumentation
+from analyzer import compute_tension_and_assertiveness
+from tki_mapper import map_tki_style
+
+
+def analyze_turn(turn, cache=None, text_only=False, audio_bounds=None):
+    """
+    Analyze a single conversation turn.
+    
+    Args:
+        turn: Dict with 'person', 'text', and 'audio' keys
+        cache: Optional FeatureCache so unchanged audio is not decoded again
+        text_only: Score the text alone, without loading the audio stack
+        audio_bounds: Cascade bounds; skip the audio when the text settles the style
+            (see compute_tension_and_assertiveness)
+    
+    Returns:
+        dict: person, text, tension, assertiveness and style for the turn, and
+        audio_skipped, True when the cascade skipped the audio and the
+        scores are estimates
+    """
+    tension, assertiveness, audio_skipped = compute_tension_and_assertiveness(
+        turn['text'], 
+        turn['audio'],
+        cache=cache,
+        text_only=text_only,
+        audio_bounds=audio_bounds,
+        return_skipped=True
+    )
+    
+    style = map_tki_style(tension, assertiveness)
+    
+    return {
+        'person': turn['person'],
+        'text': turn['text'],
+        'tension': tension,
+        'assertiveness': assertiveness,
+        'style': style,
+        'audio_skipped': audio_skipped
+    }
+
+
+def analyze_conversation(conversation, cache=None, workers=None, chunksize=1, text_only=False, audio_bounds=None,
+                         pool=None):
+    """
+    Analyze a full conversation and return analysis results.
+    
+    With workers or a pool, turns are analyzed in worker processes. Their
+    instrumentation events are sent back and replayed in turn order, so
+    console output and in-memory metrics match a serial run.
+    
+    Args:
+        conversation: List of dicts with 'person', 'text', and 'audio' keys
+        cache: Optional FeatureCache so unchanged audio is not decoded again
+        workers: Number of worker processes; None or 1 analyzes turns serially.
+            The pool is kept and reused by later calls with the same workers and cache
+        chunksize: Number of turns handed to a worker at a time
+        text_only: Score the text alone, without loading the audio stack
+        audio_bounds: Cascade bounds; skip the audio when the text settles the style
+        pool: Optional process pool made by _process_pool to run the turns on
+            (its workers use the cache it was made with)
+    
+    Returns:
+        list: Analysis results for each turn, in turn order
+    """
+    if pool is None and workers is not None and workers > 1:
+        pool = _shared_process_pool(workers, cache)
+    if pool is not None:
+        analyze = partial(
+            _analyze_turn_recording_events,
+            text_only=text_only,
+            audio_bounds=audio_bounds,
+            record=instrumentation.enabled()
+        )
+        conversation_analysis = []
+        for i, (result, events) in enumerate(pool.map(analyze, conversation, chunksize=chunksize), 1):
+            instrumentation.emit('turn_start', index=i, person=result['person'])
+            instrumentation.replay(events)
+            instrumentation.emit('turn', index=i, **result)
+            conversation_analysis.append(result)
+        return conversation_analysis
+    
+    conversation_analysis = []
+    
+    for i, turn in enumerate(conversation, 1):
+        instrumentation.emit('turn_start', index=i, person=turn['person'])
+        
+        result = analyze_turn(turn, cache=cache, text_only=text_only, audio_bounds=audio_bounds)
+        instrumentation.emit('turn', index=i, **result)
+        
+        conversation_analysis.append(result)
+    
+    return conversation_analysis
+
+
+def analyze_conversations(conversations, cache=None, workers=None, chunksize=1, text_only=False, audio_bounds=None,
+                          pool=None):
+    """
+    Analyze a batch of conversations, one conversation per worker task.
+    
+    Args:
+        conversations: List of conversations (each a list of turn dicts)
+        cache: Optional FeatureCache so unchanged audio is not decoded again
+        workers: Number of worker processes (default: one per CPU); 1 runs serially.
+            The pool is kept and reused by later calls with the same workers and cache
+        chunksize: Number of conversations handed to a worker at a time
+        text_only: Score the text alone, without loading the audio stack
+        audio_bounds: Cascade bounds; skip the audio when the text settles the style
+        pool: Optional process pool made by _process_pool to run the conversations on
+    
+    Returns:
+        list: Analysis results for each conversation, in input order
+    """
+    if pool is None:
+        workers = workers or os.cpu_count()
+        if workers <= 1:
+            return [
+                analyze_conversation(conversation, cache=cache, text_only=text_only, audio_bounds=audio_bounds)
+                for conversation in conversations
+            ]
+        pool = _shared_process_pool(workers, cache)
+    
+    analyze = partial(
+        _analyze_conversation_recording_events,
+        text_only=text_only,
+        audio_bounds=audio_bounds,
+        record=instrumentation.enabled()
+    )
+    analyses = []
+    for conversation_analysis, events in pool.map(analyze, conversations, chunksize=chunksize):
+        instrumentation.replay(events)
+        analyses.append(conversation_analysis)
+    return analyses
+
+
+# Per-process cache handle, set once by the pool initializer
+_worker_cache = None
+
+# Pool reused by calls that pass workers but no pool, and the (workers, cache) it was made for
+_shared_pool = None
+_shared_pool_settings = None
+
+
+def _process_pool(workers, cache):
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(cache, instrumentation.get_sink())
+    )
+
+
+def _shared_process_pool(workers, cache):
+    global _shared_pool, _shared_pool_settings
+    if _shared_pool is None or _shared_pool_settings[0] != workers or _shared_pool_settings[1] is not cache:
+        if _shared_pool is not None:
+            _shared_pool.shutdown()
+        _shared_pool = _process_pool(workers, cache)
+        _shared_pool_settings = (workers, cache)
+    return _shared_pool
+
+
+def _init_worker(cache, sink):
+    global _worker_cache
+    _worker_cache = cache
+    instrumentation.configure(sink)
+
+
+def _analyze_turn_in_worker(turn, text_only=False, audio_bounds=None):
+    return analyze_turn(turn, cache=_worker_cache, text_only=text_only, audio_bounds=audio_bounds)
+
+
+def _analyze_conversation_in_worker(conversation, text_only=False, audio_bounds=None):
+    return analyze_conversation(conversation, cache=_worker_cache, text_only=text_only, audio_bounds=audio_bounds)
+
+
+def _analyze_turn_recording_events(turn, text_only=False, audio_bounds=None, record=False):
+    return _recording_events(record, _analyze_turn_in_worker, turn, text_only, audio_bounds)
+
+
+def _analyze_conversation_recording_events(conversation, text_only=False, audio_bounds=None, record=False):
+    return _recording_events(record, _analyze_conversation_in_worker, conversation, text_only, audio_bounds)
+
+
+def _recording_events(record, function, *args):
+    """Run function with its events kept for the parent process (or dropped), returning (result, events)."""
+    buffer = instrumentation.EventBuffer() if record else None
+    previous = instrumentation.configure(buffer)
+    try:
+        return function(*args), buffer.events if record else []
+    finally:
+        instrumentation.configure(previous)
@@ -0,0 +1,157 @@
+import argparse
+import json
+
+import numpy as np
+
+import instrumentation
+from audio_analyzer import ANALYSIS_SR, frame_lengths
+from audio_loader import load_audio, native_sample_rate
+from pipeline import analyze_conversation
+
+
+DEFAULT_MIN_PAUSE = 0.3
+
+# Frames quieter than this fraction of the mean energy count as pause
+PAUSE_ENERGY_RATIO = 0.2
+
+
+def analyze_recording(audio_path, turns, sr=None, min_pause=DEFAULT_MIN_PAUSE, workers=None):
+    """
+    Analyze a conversation recorded as a single file.
+    
+    The recording is decoded once; each turn is analyzed as a view into the
+    shared buffer, giving the same results as analyzing a file holding just
+    that turn's samples at the same analysis rate. Turns with 'start' and 'end' (seconds) use those
+    bounds; otherwise turn boundaries are found from pauses in the energy
+    envelope (see find_turn_boundaries).
+    
+    Args:
+        audio_path: Path to the recording
+        turns: List of dicts with 'person' and 'text', and optionally 'start' and 'end'
+        sr: Analysis sampling rate (default: audio_analyzer.ANALYSIS_SR)
+        min_pause: Shortest pause (seconds) accepted as a turn boundary
+        workers: Number of worker processes; None or 1 analyzes turns serially
+    
+    Returns:
+        list: Same results as pipeline.analyze_conversation, plus each turn's start and end
+    """
+    with instrumentation.stage('decode'):
+        native_sr = native_sample_rate(audio_path)
+        y, sr = load_audio(audio_path, sr=sr or ANALYSIS_SR)
+    
+    if all('start' in turn and 'end' in turn for turn in turns):
+        spans = [(turn['start'], turn['end']) for turn in turns]
+    else:
+        spans = find_turn_boundaries(y, sr, n_turns=len(turns), min_pause=min_pause, native_sr=native_sr)
+    
+    # The native rate sizes the frames of resampled segments as for the file itself
+    conversation = [
+        {'person': turn['person'], 'text': turn['text'], 'audio': (segment, sr, native_sr)}
+        for turn, segment in zip(turns, segment_views(y, sr, spans))
+    ]
+    results = analyze_conversation(conversation, workers=workers)
+    for result, (start, end) in zip(results, spans):
+        result['start'] = start
+        result['end'] = end
+    return results
+
+
+def segment_views(y, sr, spans):
+    """
+    Slice a signal into turn segments without copying.
+    
+    Args:
+        y: Decoded signal
+        sr: Sampling rate of y
+        spans: List of (start, end) times in seconds
+    
+    Returns:
+        list: Views into y, one per span; sample bounds are the times rounded to the nearest sample
+    """
+    views = []
+    for start, end in spans:
+        first = max(int(round(start * sr)), 0)
+        last = min(int(round(end * sr)), len(y))
+        if last <= first:
+            raise ValueError(f"Empty turn segment {start:.3f}-{end:.3f} s")
+        views.append(y[first:last])
+    return views
+
+
+def find_turn_boundaries(y, sr, n_turns=None, min_pause=DEFAULT_MIN_PAUSE, native_sr=None):
+    """
+    Split a recording into turns at pauses in its RMS energy envelope.
+    
+    Frames whose energy is below PAUSE_ENERGY_RATIO of the mean energy are
+    pauses; runs of at least min_pause seconds are candidate boundaries and
+    each turn change is placed in the middle of its pause. With n_turns, the
+    n_turns - 1 longest pauses are used.
+    
+    Args:
+        y: Decoded signal
+        sr: Sampling rate of y
+        n_turns: Expected number of turns (None uses every long enough pause)
+        min_pause: Shortest pause (seconds) accepted as a turn boundary
+        native_sr: Rate of the recording y was resampled from, if any; frames
+            then span the same time as at the native rate (see frame_lengths)
+    
+    Returns:
+        list: (start, end) times in seconds covering the whole recording
+    
+    Raises:
+        ValueError: If fewer pauses are found than n_turns requires
+    """
+    n_fft, hop_length = frame_lengths(sr, native_sr)
+    rms = _rms_envelope(y, n_fft, hop_length)
+    quiet = rms < rms.mean() * PAUSE_ENERGY_RATIO
+    
+    # Runs of quiet frames as [first, last) frame indices
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], quiet.astype(np.int8), [0]))))
+    runs = edges.reshape(-1, 2)
+    min_frames = min_pause * sr / hop_length
+    # Silence before the first and after the last word separates nothing
+    pauses = [
+        (first, last) for first, last in runs
+        if last - first >= min_frames and first > 0 and last < len(quiet)
+    ]
+    
+    if n_turns is not None:
+        if len(pauses) < n_turns - 1:
+            raise ValueError(
+                f"Found {len(pauses)} pauses of at least {min_pause} s but {n_turns} turns need {n_turns - 1}"
+            )
+        pauses = sorted(sorted(pauses, key=lambda run: run[0] - run[1])[:n_turns - 1])
+    
+    duration = len(y) / sr
+    cuts = [float((first + last) / 2 * hop_length / sr) for first, last in pauses]
+    bounds = [0.0] + cuts + [duration]
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+
+def _rms_envelope(y, n_fft, hop_length):
+    """Per-frame RMS on the analysis frame grid (centered frames, n_fft long, hop_length apart)."""
+    import librosa
+    
+    return librosa.feature.rms(y=y, frame_length=n_fft, hop_length=hop_length)[0]
+
+
+def main():
+    """Analyze one recording against a JSON list of turns."""
+    parser = argparse.ArgumentParser(description="Analyze a single-file conversation recording.")
+    parser.add_argument('audio', help="Recording of the whole conversation")
+    parser.add_argument('turns', help="JSON file with a list of turns: person, text, optional start/end seconds")
+    parser.add_argument('--sr', type=int, default=None, help="Analysis sampling rate (default: native)")
+    parser.add_argument('--min-pause', type=float, default=DEFAULT_MIN_PAUSE)
+    args = parser.parse_args()
+    
+    with open(args.turns) as f:
+        turns = json.load(f)
+    
+    instrumentation.configure(instrumentation.ConsoleSink())
+    results = analyze_recording(args.audio, turns, sr=args.sr, min_pause=args.min_pause)
+    for result in results:
+        print(f"{result['start']:7.2f}-{result['end']:7.2f} s  {result['person']}: {result['style']}")
+
+
+if __name__ == "__main__":
+    main()
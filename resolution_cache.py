@@ -0,0 +1,123 @@
+import argparse
+from collections import OrderedDict
+
+from feature_cache import DEFAULT_CACHE_DIR
+from sqlite_lru import SQLiteLRUCache
+
+
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+class ResolutionCache(SQLiteLRUCache):
+    """
+    Two-level cache of generated resolution texts.
+    
+    Recently used responses are kept in an in-memory LRU in front of a
+    SQLite file next to the feature cache, so a repeated conversation is
+    answered without an API call both within a run and across runs. Keys
+    are fingerprints of the conversation analysis, prompt template and
+    model (see ai_resolution.resolution_key). The least recently used
+    entries on disk are evicted once the stored text exceeds max_bytes.
+    """
+
+    FILENAME = 'resolutions.sqlite3'
+    TABLE = 'resolutions'
+    VALUE_COLUMN = 'text'
+
+    def __init__(self, cache_dir=None, memory_entries=DEFAULT_MEMORY_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            cache_dir: Directory holding the cache database (default: TKI_CACHE_DIR or ~/.cache/tki)
+            memory_entries: Number of responses kept in memory
+            max_bytes: Upper bound on the size of responses stored on disk
+        """
+        super().__init__(cache_dir or DEFAULT_CACHE_DIR, max_bytes)
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+
+    def get(self, key):
+        """
+        Look up a cached response, checking memory before disk.
+        
+        Args:
+            key: Fingerprint from ai_resolution.resolution_key
+        
+        Returns:
+            str or None: Cached resolution text, or None on a miss
+        """
+        text = self._memory.get(key)
+        if text is not None:
+            self._memory.move_to_end(key)
+            return text
+        
+        text = self._lookup(key)
+        if text is not None:
+            self._remember(key, text)
+        return text
+
+    def put(self, key, text):
+        """
+        Store a response in memory and on disk.
+        
+        Args:
+            key: Fingerprint from ai_resolution.resolution_key
+            text: Resolution text
+        """
+        self._remember(key, text)
+        self._store(key, text, len(text.encode('utf-8')))
+
+    def stats(self):
+        """
+        Summarize cache contents.
+        
+        Returns:
+            dict: path, entries, bytes, max_bytes and memory_entries
+        """
+        entries, total = self._totals()
+        return {
+            'path': self.path,
+            'entries': entries,
+            'bytes': total,
+            'max_bytes': self.max_bytes,
+            'memory_entries': len(self._memory)
+        }
+
+    def clear(self):
+        """
+        Remove every cached response.
+        
+        Returns:
+            int: Number of entries removed from disk
+        """
+        self._memory.clear()
+        return self._clear()
+
+    def _remember(self, key, text):
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+
+def main():
+    """Command line entry point to inspect or clear the resolution cache."""
+    parser = argparse.ArgumentParser(description="Inspect or clear the AI resolution response cache.")
+    parser.add_argument('command', choices=['stats', 'clear'])
+    parser.add_argument('--dir', default=None, help="Cache directory (default: TKI_CACHE_DIR or ~/.cache/tki)")
+    args = parser.parse_args()
+    
+    cache = ResolutionCache(args.dir)
+    if args.command == 'stats':
+        stats = cache.stats()
+        print(f"Cache: {stats['path']}")
+        print(f"  Entries: {stats['entries']}")
+        print(f"  Size: {stats['bytes'] / 1024:.1f} KiB of {stats['max_bytes'] / 1024 / 1024:.0f} MiB")
+    else:
+        removed = cache.clear()
+        print(f"Removed {removed} cached resolutions from {cache.path}")
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,470 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from http import HTTPStatus
+
+import instrumentation
+from feature_cache import FeatureCache
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE_SIZE = 32
+DEFAULT_MAX_RESOLUTIONS = 16
+DEFAULT_METRICS_WINDOW = 10000
+MAX_BODY_BYTES = 16 * 1024 * 1024
+RETRY_AFTER_SECONDS = 1
+
+# Limits on the request line and headers, so a slow or broken client cannot hold memory
+_MAX_HEADER_LINE = 8192
+_MAX_HEADERS = 100
+
+
+class HTTPError(Exception):
+    """Request failure reported to the client with an HTTP status and a JSON error body."""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class AnalysisServer:
+    """
+    Local HTTP service scoring turns, conversations and resolution requests.
+    
+    Analysis runs in a pool of worker processes that import librosa and
+    TextBlob and analyze a short synthetic turn once at startup, so requests
+    never pay import or warm-up cost. At most `workers` analyses run at once
+    and at most `queue_size` more wait for a worker; anything beyond that is
+    rejected straight away with 429 and a Retry-After header instead of
+    queueing without bound. Resolution requests share one ResolutionService
+    (and its concurrency limit) and are bounded the same way by
+    max_resolutions.
+    
+    Endpoints (JSON in, JSON out):
+        POST /turn          {"person", "text", "audio"?} -> turn analysis
+        POST /conversation  {"turns": [...]} -> list of turn analyses
+        POST /resolution    {"analysis": [...]} or {"turns": [...]} -> {"resolution": text}
+        GET  /metrics       queue depth, in-flight work and latency percentiles
+        GET  /health        {"status": "ok"}
+    
+    Audio is given as a file path under audio_root, relative paths being
+    resolved against it; paths leading outside it (symbolic links included)
+    are refused with 403, as is any audio when no audio_root is configured.
+    """
+
+    def __init__(self, workers=None, queue_size=DEFAULT_QUEUE_SIZE, cache=None, text_only=False,
+                 api_key=None, max_resolutions=DEFAULT_MAX_RESOLUTIONS, metrics_window=DEFAULT_METRICS_WINDOW,
+                 audio_root=None):
+        """
+        Args:
+            workers: Number of worker processes (default: one per CPU)
+            queue_size: Analyses allowed to wait for a worker before new ones are rejected
+            cache: Optional FeatureCache shared by the workers
+            text_only: Score the text alone; workers never load the audio stack
+            api_key: Google API key for /resolution (None disables the endpoint)
+            max_resolutions: Resolution requests allowed in progress before new ones are rejected
+            metrics_window: Most recent samples kept per latency and queue metric
+            audio_root: Directory that audio paths must lie in (None refuses audio)
+        """
+        self.workers = workers or os.cpu_count()
+        self.queue_size = queue_size
+        self.cache = cache
+        self.text_only = text_only
+        self.api_key = api_key
+        self.max_resolutions = max_resolutions
+        self.audio_root = os.path.realpath(audio_root) if audio_root else None
+        self.metrics = instrumentation.MetricsAggregator(window=metrics_window)
+        self.pending = 0
+        self.resolutions_pending = 0
+        self.started = None
+        self._pool = None
+        self._resolver = None
+        self._server = None
+        self._routes = {
+            ('POST', '/turn'): self._handle_turn,
+            ('POST', '/conversation'): self._handle_conversation,
+            ('POST', '/resolution'): self._handle_resolution,
+            ('GET', '/metrics'): self._handle_metrics,
+            ('GET', '/health'): self._handle_health
+        }
+
+    @property
+    def capacity(self):
+        """Analyses accepted at once: one running per worker plus the queue."""
+        return self.workers + self.queue_size
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Start the worker pool, wait until every worker is warm, and listen for requests.
+        
+        Args:
+            host: Interface to bind
+            port: TCP port (0 picks a free one)
+        
+        Returns:
+            tuple: (host, port) actually bound
+        """
+        instrumentation.configure(self.metrics)
+        loop = asyncio.get_running_loop()
+        with instrumentation.stage('warm_up'):
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.cache, self.text_only)
+            )
+            # Submitting one task per worker at once makes the pool start them all now
+            await asyncio.gather(*[loop.run_in_executor(self._pool, os.getpid) for _ in range(self.workers)])
+            if self.api_key:
+                # The Gemini SDK is slow to import; load it before the first request
+                from ai_resolution import ResolutionService
+                from resolution_cache import ResolutionCache
+                self._resolver = ResolutionService(self.api_key, cache=ResolutionCache())
+        
+        self._server = await asyncio.start_server(self._serve_connection, host, port)
+        self.started = time.time()
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+        if self._resolver is not None and self._resolver.cache is not None:
+            self._resolver.cache.close()
+
+    def queue_depth(self):
+        """Analyses accepted but still waiting for a worker."""
+        return max(self.pending - self.workers, 0)
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Current load (workers, capacity, pending, queue_depth,
+            resolutions_pending, uptime) and the MetricsAggregator summary
+        """
+        return {
+            'workers': self.workers,
+            'capacity': self.capacity,
+            'pending': self.pending,
+            'queue_depth': self.queue_depth(),
+            'resolutions_pending': self.resolutions_pending,
+            'uptime': time.time() - self.started if self.started else 0.0,
+            **self.metrics.summary()
+        }
+
+    async def _serve_connection(self, reader, writer):
+        """Answer requests on one connection until the client closes it or asks to."""
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except HTTPError as e:
+                    await _write_response(writer, e.status, {'error': str(e)}, e.headers, keep_alive=False)
+                    return
+                if request is None:
+                    return
+                method, path, body, keep_alive = request
+                status, payload, headers = await self._dispatch(method, path, body)
+                await _write_response(writer, status, payload, headers, keep_alive)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, path, body):
+        """Route a request to its handler and turn failures into error responses."""
+        handler = self._routes.get((method, path))
+        known_path = any(route_path == path for _, route_path in self._routes)
+        # Metric names come from the routes only, never from arbitrary client paths
+        name = path.strip('/') if known_path else 'other'
+        instrumentation.increment(f'http.{name}.requests')
+        try:
+            if handler is None:
+                if known_path:
+                    raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not supported on {path}")
+                raise HTTPError(HTTPStatus.NOT_FOUND, f"No endpoint at {path}")
+            start = time.perf_counter()
+            payload = await handler(_parse_json(body) if method == 'POST' else None)
+            # Latency of served requests only; rejections would skew it towards zero
+            instrumentation.emit(f'http.{name}', seconds=time.perf_counter() - start)
+            return HTTPStatus.OK, payload, {}
+        except HTTPError as e:
+            instrumentation.increment(f'http.{e.status}')
+            return e.status, {'error': str(e)}, e.headers
+        except Exception as e:
+            instrumentation.increment('http.500')
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"{type(e).__name__}: {e}"}, {}
+
+    async def _handle_turn(self, body):
+        turn = _parse_turn(body, self.audio_root)
+        return await self._run(_analyze_turn_in_worker, turn, self.text_only)
+
+    async def _handle_conversation(self, body):
+        conversation = _parse_conversation(body, self.audio_root)
+        return await self._run(_analyze_conversation_in_worker, conversation, self.text_only)
+
+    async def _handle_resolution(self, body):
+        if self._resolver is None:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "No API key configured; set GOOGLE_API_KEY")
+        if self.resolutions_pending >= self.max_resolutions:
+            instrumentation.increment('rejected.resolution')
+            raise _overloaded(f"{self.resolutions_pending} resolution requests already in progress")
+        
+        self.resolutions_pending += 1
+        try:
+            if isinstance(body, dict) and 'analysis' in body:
+                analysis = body['analysis']
+                if not isinstance(analysis, list) or not all(
+                        isinstance(turn, dict) and {'person', 'text', 'tension', 'assertiveness', 'style'} <= turn.keys()
+                        for turn in analysis):
+                    raise HTTPError(HTTPStatus.BAD_REQUEST,
+                                    "'analysis' must be a list of turns with person, text, tension, assertiveness and style")
+            else:
+                conversation = _parse_conversation(body, self.audio_root)
+                analysis = await self._run(_analyze_conversation_in_worker, conversation, self.text_only)
+            try:
+                resolution = await self._resolver.resolve(analysis)
+            except Exception as e:
+                raise HTTPError(HTTPStatus.BAD_GATEWAY, f"Error generating resolution: {e}")
+            return {'analysis': analysis, 'resolution': resolution}
+        finally:
+            self.resolutions_pending -= 1
+
+    async def _handle_metrics(self, body):
+        return self.snapshot()
+
+    async def _handle_health(self, body):
+        return {'status': 'ok', 'workers': self.workers, 'pending': self.pending}
+
+    async def _run(self, function, *args):
+        """
+        Run an analysis in the worker pool, or reject it when the queue is full.
+        
+        Records how long the work waited for a worker and how long it ran.
+        """
+        if self.pending >= self.capacity:
+            instrumentation.increment('rejected.analysis')
+            raise _overloaded(f"{self.queue_depth()} analyses already queued")
+        
+        self.pending += 1
+        instrumentation.emit('queue', depth=self.queue_depth(), pending=self.pending)
+        try:
+            submitted = time.perf_counter()
+            result, seconds = await asyncio.get_running_loop().run_in_executor(
+                self._pool, partial(_timed, function, *args)
+            )
+            instrumentation.emit('work', wait=max(time.perf_counter() - submitted - seconds, 0.0), service=seconds)
+            return result
+        finally:
+            self.pending -= 1
+
+
+def _overloaded(message):
+    return HTTPError(
+        HTTPStatus.TOO_MANY_REQUESTS,
+        f"Server busy: {message}; retry later",
+        {'Retry-After': str(RETRY_AFTER_SECONDS)}
+    )
+
+
+def _parse_json(body):
+    try:
+        return json.loads(body) if body else None
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid JSON body: {e}")
+
+
+def _parse_turn(turn, audio_root):
+    if not isinstance(turn, dict) or not isinstance(turn.get('person'), str) or not isinstance(turn.get('text'), str):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "A turn needs string 'person' and 'text' fields")
+    audio = turn.get('audio')
+    if audio is not None and not isinstance(audio, str):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "'audio' must be a file path or null")
+    audio = _resolve_audio(audio, audio_root) if audio else None
+    return {'person': turn['person'], 'text': turn['text'], 'audio': audio}
+
+
+def _parse_conversation(body, audio_root):
+    turns = body.get('turns') if isinstance(body, dict) else body
+    if not isinstance(turns, list) or not turns:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Expected a non-empty 'turns' list")
+    return [_parse_turn(turn, audio_root) for turn in turns]
+
+
+def _resolve_audio(audio, audio_root):
+    """Absolute path of a requested audio file, which must lie inside audio_root."""
+    if audio_root is None:
+        raise HTTPError(HTTPStatus.FORBIDDEN, "Audio paths are not accepted; start the server with --audio-root")
+    # realpath follows symbolic links, so a link inside the root cannot point outside it
+    path = os.path.realpath(os.path.join(audio_root, audio))
+    if os.path.commonpath([path, audio_root]) != audio_root:
+        raise HTTPError(HTTPStatus.FORBIDDEN, f"Audio path {audio!r} is outside the audio root")
+    return path
+
+
+async def _read_request(reader):
+    """
+    Read one HTTP/1.1 request.
+    
+    Returns:
+        tuple or None: (method, path, body, keep_alive), or None if the client
+        closed the connection between requests
+    """
+    line = await _read_line(reader)
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode('latin-1').split()
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+    
+    headers = {}
+    while True:
+        line = await _read_line(reader)
+        if line in (b'\r\n', b'\n', b''):
+            break
+        if len(headers) >= _MAX_HEADERS:
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Request headers too large")
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        raise HTTPError(HTTPStatus.LENGTH_REQUIRED, "Chunked bodies are not supported; send Content-Length")
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Body larger than {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length > 0 else b''
+    
+    connection = headers.get('connection', '').lower()
+    keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+    return method.upper(), target.split('?', 1)[0], body, keep_alive
+
+
+async def _read_line(reader):
+    try:
+        line = await reader.readline()
+    except ValueError:
+        # Longer than the stream buffer limit
+        line = None
+    if line is None or len(line) > _MAX_HEADER_LINE:
+        raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Request line or header too long")
+    return line
+
+
+async def _write_response(writer, status, payload, headers, keep_alive):
+    body = json.dumps(payload, default=_to_json).encode('utf-8')
+    status = HTTPStatus(status)
+    head = [
+        f"HTTP/1.1 {status.value} {status.phrase}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}"
+    ]
+    head.extend(f"{name}: {value}" for name, value in headers.items())
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + body)
+    await writer.drain()
+
+
+def _to_json(value):
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def _init_worker(cache, text_only):
+    """Pool initializer: set the worker's cache, then import and exercise the analysis stack."""
+    import pipeline
+    pipeline._init_worker(cache, None)
+    
+    turn = {'person': 'warm-up', 'text': "I think we should talk about the schedule.", 'audio': None}
+    if not text_only:
+        import numpy as np
+        sr = 22050
+        t = np.arange(sr, dtype=np.float32) / sr
+        # One second of a gated 150 Hz tone, enough to run every prosody stage
+        y = (0.3 * np.sin(2 * np.pi * 150 * t) * (np.sin(2 * np.pi * 2 * t) > 0)).astype(np.float32)
+        turn['audio'] = (y, sr)
+    pipeline.analyze_turn(turn, text_only=text_only)
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def _analyze_turn_in_worker(turn, text_only):
+    import pipeline
+    return pipeline._analyze_turn_in_worker(turn, text_only=text_only)
+
+
+def _analyze_conversation_in_worker(conversation, text_only):
+    import pipeline
+    return pipeline._analyze_conversation_in_worker(conversation, text_only=text_only)
+
+
+async def _serve(args):
+    cache = None if args.no_cache or args.text_only else FeatureCache()
+    server = AnalysisServer(
+        workers=args.workers,
+        queue_size=max(args.queue_size, 0),
+        cache=cache,
+        text_only=args.text_only,
+        api_key=os.getenv('GOOGLE_API_KEY'),
+        max_resolutions=max(args.max_resolutions, 1),
+        audio_root=args.audio_root
+    )
+    try:
+        host, port = await server.start(args.host, args.port)
+        warm_up = server.metrics.summary()['timers']['warm_up']['total']
+        print(f"Serving on http://{host}:{port} with {server.workers} warm workers "
+              f"(ready in {warm_up:.1f} s, queue {server.queue_size})", flush=True)
+        if server._resolver is None:
+            print("No GOOGLE_API_KEY set; /resolution is disabled", flush=True)
+        await server.serve_forever()
+    finally:
+        await server.close()
+        if cache is not None:
+            cache.close()
+
+
+def main():
+    """Command line entry point for the local analysis service."""
+    parser = argparse.ArgumentParser(description="Serve TKI analysis over HTTP from a pool of warm workers.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Analyses that may wait for a worker before requests get 429")
+    parser.add_argument('--max-resolutions', type=int, default=DEFAULT_MAX_RESOLUTIONS,
+                        help="Resolution requests in progress before requests get 429")
+    parser.add_argument('--audio-root', default=None,
+                        help="Directory holding the audio files requests may name (default: refuse audio paths)")
+    parser.add_argument('--text-only', action='store_true', help="Score the text alone, skipping audio")
+    parser.add_argument('--no-cache', action='store_true', help="Do not use the prosody feature cache")
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
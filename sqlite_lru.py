@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import time
+
+
+class SQLiteLRUCache:
+    """
+    Base for the on-disk caches: one SQLite table of keyed text values.
+    
+    Reads refresh an entry's access time, and once the stored values
+    exceed max_bytes the least recently used entries are evicted in the
+    same transaction as the write that grew the table. Subclasses name the
+    database file, table and value column, may add their own tables in
+    SCHEMA, and build get/put on _lookup/_store.
+    """
+
+    FILENAME = None
+    TABLE = None
+    VALUE_COLUMN = None
+    # Extra statements run when the database is opened
+    SCHEMA = ""
+
+    def __init__(self, cache_dir, max_bytes):
+        """
+        Args:
+            cache_dir: Directory holding the cache database
+            max_bytes: Upper bound on the size of stored values
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.path = os.path.join(self.cache_dir, self.FILENAME)
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30)
+            self._conn.executescript(f"""
+                CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                    key TEXT PRIMARY KEY,
+                    {self.VALUE_COLUMN} TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS {self.TABLE}_accessed ON {self.TABLE} (accessed);
+            """ + self.SCHEMA)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __getstate__(self):
+        # Connections cannot cross process boundaries; each worker reopens its own
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        return state
+
+    def _lookup(self, key):
+        """Stored value for key, marking it recently used, or None on a miss."""
+        row = self.conn.execute(f"SELECT {self.VALUE_COLUMN} FROM {self.TABLE} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        with self.conn:
+            self.conn.execute(f"UPDATE {self.TABLE} SET accessed = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def _store(self, key, value, size):
+        """Insert or replace a value of the given size in bytes, then evict down to max_bytes."""
+        with self.conn:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO {self.TABLE} (key, {self.VALUE_COLUMN}, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time())
+            )
+            self._evict()
+
+    def _totals(self):
+        """Number of stored entries and their total size in bytes."""
+        return self.conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.TABLE}").fetchone()
+
+    def _clear(self):
+        """Delete every entry; returns the number removed."""
+        with self.conn:
+            return self.conn.execute(f"DELETE FROM {self.TABLE}").rowcount
+
+    def _evict(self):
+        """Drop least recently used entries until the stored size fits max_bytes."""
+        total = self._totals()[1]
+        if total <= self.max_bytes:
+            return
+        
+        evicted = []
+        for key, size in self.conn.execute(f"SELECT key, size FROM {self.TABLE} ORDER BY accessed"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self.conn.executemany(f"DELETE FROM {self.TABLE} WHERE key = ?", evicted)
@@ -0,0 +1,90 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+# Modules whose import dominates startup; reported when a scenario loads them
+HEAVY_MODULES = ['numpy', 'librosa', 'scipy', 'numba', 'soundfile', 'textblob', 'nltk', 'google.genai']
+
+SCENARIOS = {
+    'import main': "import main",
+    'text-only turn': (
+        "import pipeline\n"
+        "pipeline.analyze_turn({'person': 'A', 'text': 'Fine, whatever you say.', 'audio': 'unused.wav'}, text_only=True)"
+    ),
+    'import ai_resolution': "import ai_resolution"
+}
+
+# Run inside the child interpreter around the scenario code
+_CHILD_TEMPLATE = """
+import json, sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{'elapsed': elapsed, 'heavy': heavy}}))
+"""
+
+
+def measure_scenario(code, runs=5):
+    """
+    Time a scenario in fresh interpreters, as a short-lived batch job would see it.
+    
+    Args:
+        code: Python source to run after interpreter startup
+        runs: Number of fresh interpreters to start
+    
+    Returns:
+        dict: median and max 'process' (whole interpreter) and 'code' (scenario only)
+        seconds, plus the heavy modules the scenario loaded
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    child = _CHILD_TEMPLATE.format(code=code, heavy=HEAVY_MODULES)
+    process_times, code_times = [], []
+    heavy = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, '-c', child],
+            cwd=here, capture_output=True, text=True, check=True
+        ).stdout
+        process_times.append(time.perf_counter() - start)
+        result = json.loads(output.strip().splitlines()[-1])
+        code_times.append(result['elapsed'])
+        heavy = result['heavy']
+    return {
+        'process_median': statistics.median(process_times),
+        'process_max': max(process_times),
+        'code_median': statistics.median(code_times),
+        'code_max': max(code_times),
+        'heavy': heavy
+    }
+
+
+def main():
+    """Report cold start cost of the CLI entry points."""
+    parser = argparse.ArgumentParser(description="Cold import / startup time of the analysis entry points.")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters per scenario")
+    parser.add_argument('--audio', default=None, help="Also time scoring one turn with this audio file")
+    args = parser.parse_args()
+    
+    scenarios = dict(SCENARIOS)
+    if args.audio:
+        scenarios['audio turn'] = (
+            "import pipeline\n"
+            f"pipeline.analyze_turn({{'person': 'A', 'text': 'Fine, whatever you say.', 'audio': {args.audio!r}}})"
+        )
+    
+    print(f"{'scenario':<22}{'process p50':>13}{'max':>9}{'code p50':>11}{'max':>9}  heavy modules loaded")
+    for name, code in scenarios.items():
+        result = measure_scenario(code, args.runs)
+        print(f"{name:<22}{result['process_median']:>12.3f}s{result['process_max']:>8.3f}s"
+              f"{result['code_median']:>10.3f}s{result['code_max']:>8.3f}s  {', '.join(result['heavy']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
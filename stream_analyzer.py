@@ -0,0 +1,308 @@
+import argparse
+import socket
+
+import librosa
+import numpy as np
+
+from audio_analyzer import (
+    HOP_LENGTH,
+    N_FFT,
+    PITCH_BACKENDS,
+    ZCR_THRESHOLD,
+    check_pitch_backend,
+    compute_spectral_features,
+    dominant_pitch_track,
+    score_prosody,
+    summarize_prosody
+)
+from tki_mapper import map_tki_style
+
+
+# Seconds of recent audio scored by default; per-frame values older than this are dropped
+DEFAULT_WINDOW_SECONDS = 30.0
+
+
+class StreamingProsodyAnalyzer:
+    """
+    Incremental prosody analysis for live audio.
+    
+    Chunks are framed as they arrive and only the new frames are transformed,
+    so the work per chunk is proportional to the chunk size. Per-frame energy,
+    pitch, ZCR and centroid values of the last window_seconds are retained
+    and reduced to the same statistics as analyze_prosody whenever scores
+    are requested, so memory and scoring work stay bounded however long the
+    stream runs. With window_seconds=None every frame is kept, and after
+    close() the features of a complete stream are identical to
+    extract_prosody_features on the whole signal with piptrack; use
+    BlockProsodyAnalyzer for long recordings instead. The yin backend gates frames against
+    the mean energy of the stream so far rather than of the whole signal,
+    so its pitch statistics only approximate the whole-signal ones.
+    """
+
+    def __init__(self, sr, window_seconds=DEFAULT_WINDOW_SECONDS, channels=1, n_fft=N_FFT, hop_length=HOP_LENGTH,
+                 pitch_backend=None):
+        """
+        Args:
+            sr: Sampling rate of the incoming audio
+            window_seconds: Only score the most recent window (None keeps, and rescores, the whole stream)
+            channels: Number of interleaved channels in byte/int16 input
+            n_fft: Frame length / FFT size
+            hop_length: Number of samples between frames
+            pitch_backend: One of PITCH_BACKENDS (default: PITCH_BACKEND, set by TKI_PITCH_BACKEND)
+        """
+        self.sr = sr
+        self.channels = channels
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.pitch_backend = check_pitch_backend(pitch_backend)
+        self.closed = False
+        self.n_frames = 0
+        self._energy_sum = 0.0
+        
+        window = None if window_seconds is None else max(int(window_seconds * sr / hop_length), 1)
+        self._rms = _FrameSeries(window)
+        self._pitch = _FrameSeries(window)
+        self._zcr = _FrameSeries(window)
+        self._centroid = _FrameSeries(window)
+        
+        # Leading center padding: zeros for the spectral features, and no
+        # crossings, matching the edge padding used for the zero crossing rate
+        self._samples = np.zeros(n_fft // 2, dtype=np.float32)
+        self._crossings = np.zeros(n_fft // 2, dtype=bool)
+        self._last_negative = None
+        self._pending_bytes = b''
+
+    def push(self, chunk):
+        """
+        Add a chunk of audio and analyze every frame it completes.
+        
+        Args:
+            chunk: Raw 16-bit little-endian PCM bytes, or a numpy array of
+                int16 or float samples (shape (n,) or (n, channels))
+        
+        Returns:
+            int: Number of new frames analyzed
+        """
+        if self.closed:
+            raise ValueError("Cannot push audio to a closed stream")
+        samples = self._to_float(chunk)
+        if len(samples) == 0:
+            return 0
+        
+        negative = np.signbit(samples) & (np.abs(samples) > ZCR_THRESHOLD)
+        crossings = np.empty(len(samples), dtype=bool)
+        crossings[0] = self._last_negative is not None and negative[0] != self._last_negative
+        crossings[1:] = negative[1:] != negative[:-1]
+        self._last_negative = negative[-1]
+        
+        self._samples = np.concatenate((self._samples, samples))
+        self._crossings = np.concatenate((self._crossings, crossings))
+        return self._consume()
+
+    def close(self):
+        """
+        Flush the trailing frames at the end of the stream.
+        
+        Returns:
+            int: Number of new frames analyzed
+        """
+        if self.closed:
+            return 0
+        self.closed = True
+        pad = self.n_fft // 2
+        self._samples = np.concatenate((self._samples, np.zeros(pad, dtype=np.float32)))
+        self._crossings = np.concatenate((self._crossings, np.zeros(pad, dtype=bool)))
+        return self._consume()
+
+    def features(self):
+        """
+        Current prosody statistics.
+        
+        Returns:
+            dict or None: Same keys as extract_prosody_features, or None before the first frame
+        """
+        if self.n_frames == 0:
+            return None
+        pitch_track = self._pitch.values()
+        return summarize_prosody(
+            pitch_track[pitch_track > 0],
+            self._rms.values(),
+            self._zcr.values(),
+            self._centroid.values()
+        )
+
+    def scores(self):
+        """
+        Current tension and assertiveness.
+        
+        Returns:
+            tuple: (tension, assertiveness) scores between 0 and 1
+        """
+        features = self.features()
+        if features is None:
+            return 0.0, 0.5
+        return score_prosody(features, debug=False)
+
+    def _to_float(self, chunk):
+        if isinstance(chunk, (bytes, bytearray, memoryview)):
+            data = self._pending_bytes + bytes(chunk)
+            frame_bytes = 2 * self.channels
+            usable = len(data) - len(data) % frame_bytes
+            self._pending_bytes = data[usable:]
+            chunk = np.frombuffer(data[:usable], dtype='<i2').reshape(-1, self.channels)
+        
+        chunk = np.asarray(chunk)
+        if chunk.dtype == np.int16:
+            chunk = chunk.astype(np.float32) / 32768.0
+        chunk = chunk.astype(np.float32, copy=False)
+        if chunk.ndim == 2:
+            chunk = chunk.mean(axis=1, dtype=np.float32) if chunk.shape[1] > 1 else chunk[:, 0]
+        return chunk
+
+    def _consume(self):
+        """Analyze all complete frames in the sample buffer and drop the consumed samples."""
+        if len(self._samples) < self.n_fft:
+            return 0
+        
+        frames = librosa.util.frame(self._samples, frame_length=self.n_fft, hop_length=self.hop_length)
+        crossing_frames = librosa.util.frame(self._crossings, frame_length=self.n_fft, hop_length=self.hop_length)
+        n_frames = frames.shape[1]
+        
+        frame_features = compute_spectral_features(frames, self.sr, pitch=self.pitch_backend == 'piptrack')
+        self._record(
+            frame_features['rms'],
+            self._pitch_track(frame_features, n_frames),
+            # The first sample of a frame never counts as a crossing
+            np.sum(crossing_frames[1:], axis=0) / self.n_fft,
+            frame_features['spectral_centroid']
+        )
+        
+        consumed = n_frames * self.hop_length
+        self._samples = self._samples[consumed:].copy()
+        self._crossings = self._crossings[consumed:].copy()
+        self.n_frames += n_frames
+        return n_frames
+
+    def _pitch_track(self, frame_features, n_frames):
+        """Pitch per new frame (0 when unvoiced) from the configured backend."""
+        if self.pitch_backend == 'piptrack':
+            return dominant_pitch_track(frame_features['pitches'], frame_features['magnitudes'])
+        
+        from pitch_tracker import yin_pitch_track
+        rms = frame_features['rms']
+        self._energy_sum += float(np.sum(rms, dtype=np.float64))
+        # Frame k of the buffer is centered n_fft // 2 samples after its start
+        return yin_pitch_track(
+            self._samples, self.sr, rms, self.hop_length,
+            offset=self.n_fft // 2,
+            energy_mean=self._energy_sum / (self.n_frames + n_frames)
+        )
+
+    def _record(self, rms, pitch_track, zcr, spectral_centroid):
+        """Keep the per-frame values of newly analyzed frames."""
+        self._rms.extend(rms)
+        self._pitch.extend(pitch_track)
+        self._zcr.extend(zcr)
+        self._centroid.extend(spectral_centroid)
+
+
+class _FrameSeries:
+    """Append-only per-frame values, optionally limited to the most recent `window` frames."""
+
+    def __init__(self, window=None):
+        self.window = window
+        self._values = None
+        self._start = 0
+        self._stop = 0
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def extend(self, values):
+        if self._values is None:
+            self._values = np.empty(max(2 * len(values), 1024), dtype=values.dtype)
+        if self._stop + len(values) > len(self._values):
+            # Compact the retained frames to the front, growing only when a window can't fit
+            retained = self.values()
+            size = max(len(self._values), 2 * (len(retained) + len(values)))
+            buffer = np.empty(size, dtype=self._values.dtype)
+            buffer[:len(retained)] = retained
+            self._values, self._start, self._stop = buffer, 0, len(retained)
+        
+        self._values[self._stop:self._stop + len(values)] = values
+        self._stop += len(values)
+        if self.window is not None:
+            self._start = max(self._start, self._stop - self.window)
+
+    def values(self):
+        if self._values is None:
+            return np.empty(0)
+        return self._values[self._start:self._stop]
+
+
+def analyze_stream(chunks, sr, window_seconds=DEFAULT_WINDOW_SECONDS, channels=1, pitch_backend=None):
+    """
+    Score a stream of audio chunks as they arrive.
+    
+    Args:
+        chunks: Iterable of PCM chunks (see StreamingProsodyAnalyzer.push)
+        sr: Sampling rate of the audio
+        window_seconds: Only score the most recent window (None scores the whole stream,
+            at a cost per chunk that grows with its length)
+        channels: Number of interleaved channels in byte/int16 input
+        pitch_backend: One of PITCH_BACKENDS (default: PITCH_BACKEND)
+    
+    Yields:
+        tuple: (tension, assertiveness) after every chunk, and once more after the stream ends
+    """
+    analyzer = StreamingProsodyAnalyzer(sr, window_seconds=window_seconds, channels=channels, pitch_backend=pitch_backend)
+    for chunk in chunks:
+        analyzer.push(chunk)
+        yield analyzer.scores()
+    analyzer.close()
+    yield analyzer.scores()
+
+
+def iter_socket_chunks(sock, chunk_bytes=8192):
+    """
+    Read raw PCM bytes from a connected socket until the peer closes it.
+    
+    Args:
+        sock: Connected socket
+        chunk_bytes: Maximum bytes per chunk
+    
+    Yields:
+        bytes: Received chunks
+    """
+    while True:
+        data = sock.recv(chunk_bytes)
+        if not data:
+            return
+        yield data
+
+
+def main():
+    """Listen on a local port and print live prosody scores for 16-bit PCM sent to it."""
+    parser = argparse.ArgumentParser(description="Live prosody scoring for raw 16-bit PCM over TCP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--sr', type=int, default=16000, help="Sampling rate of the incoming audio")
+    parser.add_argument('--channels', type=int, default=1)
+    parser.add_argument('--window', type=float, default=10.0, help="Seconds of recent audio to score")
+    parser.add_argument('--pitch-backend', choices=PITCH_BACKENDS, default=None,
+                        help="Pitch estimator (default: TKI_PITCH_BACKEND or piptrack)")
+    args = parser.parse_args()
+    
+    with socket.create_server((args.host, args.port)) as server:
+        print(f"Listening for PCM audio on {args.host}:{args.port} ({args.sr} Hz)")
+        conn, address = server.accept()
+        print(f"Connected: {address[0]}:{address[1]}")
+        with conn:
+            chunks = iter_socket_chunks(conn, chunk_bytes=args.sr // 4 * 2 * args.channels)
+            for tension, assertiveness in analyze_stream(chunks, args.sr, args.window, args.channels, args.pitch_backend):
+                style = map_tki_style(tension, assertiveness)
+                print(f"[Live] Tension: {tension:.3f}, Assertiveness: {assertiveness:.3f} → {style}")
+
+
+if __name__ == "__main__":
+    main()
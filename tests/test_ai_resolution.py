@@ -0,0 +1,79 @@
+import asyncio
+
+import ai_resolution
+from resolution_cache import ResolutionCache
+
+
+TURNS = [
+    {'person': 'Person A', 'text': 'We need this done today.', 'tension': 0.6, 'assertiveness': 0.7, 'style': 'Competing'},
+    {'person': 'Person B', 'text': 'Fine, whatever works.', 'tension': 0.3, 'assertiveness': 0.2, 'style': 'Accommodating'}
+]
+
+
+class FakeClient:
+    """Stands in for genai.Client; fails like an httpx pool used from a closed loop."""
+
+    def __init__(self, api_key=None, http_options=None):
+        self.loop = None
+        self.calls = 0
+        self.aio = self
+        self.models = self
+
+    async def generate_content(self, model, contents):
+        loop = asyncio.get_running_loop()
+        if self.loop is None:
+            self.loop = loop
+        elif self.loop is not loop:
+            raise RuntimeError('Event loop is closed')
+        self.calls += 1
+        return type('Response', (), {'text': f"resolution {self.calls}"})()
+
+
+def test_sequential_calls_use_a_client_per_event_loop(monkeypatch):
+    monkeypatch.setattr(ai_resolution.genai, 'Client', FakeClient)
+    service = ai_resolution.ResolutionService('key', max_retries=0)
+    
+    first = asyncio.run(service.resolve(TURNS))
+    second = asyncio.run(service.resolve(TURNS[:1]))
+    
+    assert first == 'resolution 1'
+    assert second == 'resolution 1'
+
+
+def test_generate_resolution_twice_in_one_process(monkeypatch):
+    monkeypatch.setattr(ai_resolution.genai, 'Client', FakeClient)
+    monkeypatch.setattr(ai_resolution, '_services', {'key': ai_resolution.ResolutionService('key', max_retries=0)})
+    
+    assert ai_resolution.generate_resolution(TURNS, 'key') == 'resolution 1'
+    assert ai_resolution.generate_resolution(TURNS[:1], 'key') == 'resolution 1'
+
+
+class EchoClient(FakeClient):
+    """Answers with the prompt it was sent."""
+
+    async def generate_content(self, model, contents):
+        self.calls += 1
+        return type('Response', (), {'text': contents})()
+
+
+def test_builder_settings_key_the_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(ai_resolution.genai, 'Client', EchoClient)
+    service = ai_resolution.ResolutionService('key', max_retries=0, cache=ResolutionCache(str(tmp_path)))
+    turns = [
+        {'person': f"Person {'AB'[i % 2]}", 'text': 'word ' * 40, 'tension': 0.5, 'assertiveness': 0.5, 'style': 'Compromising'}
+        for i in range(12)
+    ]
+    prompts = {}
+    for budget in (None, 200):
+        builder = ai_resolution.PromptBuilder(service.template, budget)
+        builder.extend(turns)
+        prompts[budget] = asyncio.run(service.resolve(turns, builder=builder))
+        assert prompts[budget] == builder.prompt()
+    
+    assert prompts[None] != prompts[200]
+    
+    # A builder with the same settings is answered from the cache
+    builder = ai_resolution.PromptBuilder(service.template, 200)
+    builder.extend(turns)
+    assert asyncio.run(service.resolve(turns, builder=builder)) == prompts[200]
+    assert service.client.calls == 0
@@ -0,0 +1,49 @@
+import json
+
+import numpy as np
+import pytest
+
+from analysis_store import AnalysisStore
+from batch import iter_conversations, run_batch
+from tki_mapper import STYLE_LABELS
+
+
+def _write_conversations(path, conversations):
+    path.write_text(''.join(json.dumps(conversation) + '\n' for conversation in conversations))
+    return str(path)
+
+
+def test_batch_stores_the_conversation_time(tmp_path):
+    source = _write_conversations(tmp_path / 'in.jsonl', [
+        {'id': 'monday', 'recorded_at': '2026-03-02T09:00:00Z', 'turns': [{'person': 'A', 'text': 'Fine.'}]},
+        {'id': 'next-week', 'recorded_at': 1773302400, 'turns': [{'person': 'A', 'text': 'No way!'}]},
+        {'id': 'undated', 'turns': [{'person': 'B', 'text': 'Sure.'}]}
+    ])
+    assert [recorded_at for _, _, recorded_at in iter_conversations(source)] == [1772442000.0, 1773302400, None]
+    
+    store = AnalysisStore(str(tmp_path / 'store.sqlite3'))
+    run_batch(source, str(tmp_path / 'out.jsonl'), text_only=True, store=store)
+    
+    weeks = store.weekly_averages(until=1780000000)
+    assert [(row['week'], row['turns']) for row in weeks] == [('2026-03-02', 1), ('2026-03-09', 1)]
+    
+    # The records carry the time, so importing the output gives the same weeks
+    imported = AnalysisStore(str(tmp_path / 'imported.sqlite3'))
+    imported.import_jsonl(str(tmp_path / 'out.jsonl'))
+    assert imported.weekly_averages(until=1780000000) == weeks
+
+
+def test_invalid_conversation_time_names_the_line(tmp_path):
+    source = _write_conversations(tmp_path / 'in.jsonl', [{'id': 'x', 'recorded_at': 'last tuesday', 'turns': []}])
+    with pytest.raises(ValueError, match='in.jsonl:1'):
+        list(iter_conversations(source))
+
+
+def test_style_filter_accepts_numpy_integers(tmp_path):
+    store = AnalysisStore(str(tmp_path / 'store.sqlite3'))
+    style = STYLE_LABELS[2]
+    store.add_conversation('c', [{'person': 'A', 'text': 'x', 'tension': 0.5, 'assertiveness': 0.5, 'style': style}],
+                           recorded_at=0)
+    
+    for value in (style, 2, np.int64(2), np.int32(2)):
+        assert [turn['style'] for turn in store.find_turns(style=value)] == [style]
@@ -0,0 +1,152 @@
+import librosa
+import numpy as np
+import pytest
+import soundfile as sf
+
+from audio_analyzer import (
+    HOP_LENGTH,
+    N_FFT,
+    _longest_terminated_run,
+    compute_frame_features,
+    dominant_pitch_track,
+    extract_file_features,
+    frame_lengths,
+    summarize_prosody
+)
+from benchmark import measure_sample_rate_drift, synthesize_speech
+from block_analyzer import _TerminatedRuns
+
+
+def reference_pitch_values(pitches, magnitudes):
+    """The original per-frame loop: pitch of the strongest bin, voiced frames only."""
+    pitch_values = []
+    for t in range(pitches.shape[1]):
+        index = magnitudes[:, t].argmax()
+        pitch = pitches[index, t]
+        if pitch > 0:
+            pitch_values.append(pitch)
+    return np.array(pitch_values)
+
+
+def reference_sustained_frames(values, threshold):
+    """The original streak loop, which only records a streak once it is broken."""
+    sustained_energy_frames = 0
+    current_streak = 0
+    for val in values:
+        if val > threshold:
+            current_streak += 1
+        else:
+            sustained_energy_frames = max(sustained_energy_frames, current_streak)
+            current_streak = 0
+    return sustained_energy_frames
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_dominant_pitch_track_matches_the_frame_loop(seed):
+    sr = (16000, 22050, 44100, 48000)[seed]
+    y = synthesize_speech(3.0, sr, 0.1 + 0.2 * seed, seed=seed)
+    frame_features = compute_frame_features(y, sr)
+    pitches, magnitudes = frame_features['pitches'], frame_features['magnitudes']
+    
+    pitch_track = dominant_pitch_track(pitches, magnitudes)
+    assert len(pitch_track) == pitches.shape[1]
+    assert np.array_equal(pitch_track[pitch_track > 0], reference_pitch_values(pitches, magnitudes))
+
+
+def test_dominant_pitch_track_breaks_ties_like_argmax():
+    pitches = np.array([[100.0, 0.0, 120.0], [200.0, 0.0, 240.0]])
+    magnitudes = np.array([[1.0, 0.0, 2.0], [1.0, 0.0, 2.0]])
+    
+    assert np.array_equal(dominant_pitch_track(pitches, magnitudes), [100.0, 0.0, 120.0])
+    assert np.array_equal(reference_pitch_values(pitches, magnitudes), [100.0, 120.0])
+
+
+@pytest.mark.parametrize('mask, expected', [
+    ([], 0),
+    ([True, True, True], 0),
+    ([False, False], 0),
+    ([True, False], 1),
+    ([False, True, True, False, True], 2),
+    # Longest run is still open at the last frame, so only the shorter one counts
+    ([True, False, True, True, True], 1),
+    ([True, True, False, True, True, True, True], 2)
+])
+def test_longest_terminated_run_edge_cases(mask, expected):
+    mask = np.array(mask, dtype=bool)
+    assert _longest_terminated_run(mask) == expected
+    assert reference_sustained_frames(mask, 0) == expected
+
+
+def test_longest_terminated_run_matches_the_streak_loop_on_random_masks():
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        mask = rng.random(rng.integers(1, 200)) < rng.uniform(0.1, 0.95)
+        expected = reference_sustained_frames(mask, 0)
+        assert _longest_terminated_run(mask) == expected
+        
+        # The block-wise analyzer sees the same frames in pieces
+        runs = _TerminatedRuns()
+        for piece in np.array_split(mask, rng.integers(1, 6)):
+            runs.update(piece)
+        assert runs.longest == expected
+
+
+def test_sustained_energy_ratio_matches_the_streak_loop():
+    y = synthesize_speech(5.0, 22050, 0.3, seed=9)
+    frame_features = compute_frame_features(y, 22050)
+    rms = frame_features['rms']
+    features = summarize_prosody(np.empty(0), rms, frame_features['zcr'], frame_features['spectral_centroid'])
+    
+    assert features['sustained_energy_ratio'] == reference_sustained_frames(rms, np.mean(rms) * 1.5) / len(rms)
+
+
+@pytest.mark.parametrize('sr, seconds, n_fft, hop_length', [
+    (22050, 3.0, N_FFT, HOP_LENGTH),
+    (16000, 2.3, *frame_lengths(16000, 44100)),
+    (8000, 0.1, N_FFT, HOP_LENGTH)
+])
+def test_frame_features_match_the_librosa_feature_calls(sr, seconds, n_fft, hop_length):
+    y = synthesize_speech(seconds, sr, 0.3, seed=5).astype(np.float32)
+    # Exact zeros, where the zero crossing threshold matters
+    y[len(y) // 3:len(y) // 2] = 0.0
+    
+    features = compute_frame_features(y, sr, n_fft, hop_length)
+    pitches, magnitudes = librosa.piptrack(y=y, sr=sr, n_fft=n_fft, hop_length=hop_length)
+    
+    np.testing.assert_array_equal(features['pitches'], pitches)
+    np.testing.assert_array_equal(features['magnitudes'], magnitudes)
+    np.testing.assert_array_equal(
+        features['rms'], librosa.feature.rms(y=y, frame_length=n_fft, hop_length=hop_length)[0]
+    )
+    np.testing.assert_array_equal(
+        features['zcr'], librosa.feature.zero_crossing_rate(y, frame_length=n_fft, hop_length=hop_length)[0]
+    )
+    np.testing.assert_array_equal(
+        features['spectral_centroid'],
+        librosa.feature.spectral_centroid(y=y, sr=sr, n_fft=n_fft, hop_length=hop_length)[0]
+    )
+
+
+def test_frame_lengths_keep_the_frame_duration():
+    assert frame_lengths(None, 44100) == (N_FFT, HOP_LENGTH)
+    assert frame_lengths(22050, 22050) == (N_FFT, HOP_LENGTH)
+    
+    n_fft, hop_length = frame_lengths(16000, 22050)
+    assert n_fft / 16000 == pytest.approx(N_FFT / 22050, rel=0.01)
+    assert hop_length / 16000 == pytest.approx(HOP_LENGTH / 22050, rel=0.01)
+
+
+def test_reduced_analysis_rate_drift_stays_small(tmp_path):
+    rows = measure_sample_rate_drift('quick', 16000, corpus_dir=str(tmp_path))
+    
+    assert len(rows) == 3
+    assert max(row['tension_drift'] for row in rows) < 0.05
+    assert max(row['assertiveness_drift'] for row in rows) < 0.01
+    assert not any(row['style_changed'] for row in rows)
+
+
+def test_reduced_rate_of_a_native_rate_file_changes_nothing(tmp_path):
+    path = str(tmp_path / 'speech.wav')
+    sf.write(path, synthesize_speech(3.0, 16000, 0.3, seed=11), 16000, subtype='PCM_16')
+    
+    assert extract_file_features(path, 16000) == extract_file_features(path)
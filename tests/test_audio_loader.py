@@ -0,0 +1,69 @@
+import os
+
+import librosa
+import numpy as np
+import pytest
+import soundfile as sf
+
+import audio_loader
+from audio_loader import DecodedAudioCache, load_audio, read_wav
+
+
+@pytest.fixture
+def stereo_wav(tmp_path):
+    rng = np.random.default_rng(1)
+    path = str(tmp_path / 'stereo.wav')
+    sf.write(path, rng.uniform(-0.8, 0.8, (22050, 2)), 22050, subtype='PCM_16')
+    return path
+
+
+@pytest.mark.parametrize('subtype', ['PCM_16', 'PCM_32', 'FLOAT'])
+def test_read_wav_matches_librosa(tmp_path, subtype):
+    rng = np.random.default_rng(2)
+    path = str(tmp_path / f"{subtype}.wav")
+    sf.write(path, rng.uniform(-0.8, 0.8, 8000), 16000, subtype=subtype)
+    
+    y, sr = read_wav(path)
+    expected, expected_sr = librosa.load(path, sr=None)
+    assert sr == expected_sr
+    assert y.dtype == np.float32
+    assert np.array_equal(y, expected)
+
+
+def test_load_audio_mixes_and_resamples_like_librosa(stereo_wav):
+    y, sr = load_audio(stereo_wav, sr=16000)
+    expected, _ = librosa.load(stereo_wav, sr=16000)
+    assert sr == 16000
+    assert np.array_equal(y, expected)
+
+
+def test_decode_cache_hits_after_a_put(tmp_path, stereo_wav):
+    cache = DecodedAudioCache(str(tmp_path / 'decoded'))
+    assert cache.get(stereo_wav, None) is None
+    
+    y, sr = load_audio(stereo_wav, decode_cache=cache)
+    cached_y, cached_sr = cache.get(stereo_wav, None)
+    assert cached_sr == sr
+    assert np.array_equal(cached_y, y)
+
+
+def test_decode_cache_treats_a_concurrently_evicted_file_as_a_miss(tmp_path, stereo_wav, monkeypatch):
+    cache = DecodedAudioCache(str(tmp_path / 'decoded'))
+    load_audio(stereo_wav, decode_cache=cache)
+    
+    def evicted(path, *args):
+        raise FileNotFoundError(path)
+    
+    monkeypatch.setattr(audio_loader.os, 'utime', evicted)
+    assert cache.get(stereo_wav, None) is None
+
+
+def test_decode_cache_eviction_skips_files_removed_by_other_workers(tmp_path, stereo_wav, monkeypatch):
+    cache = DecodedAudioCache(str(tmp_path / 'decoded'), max_bytes=0)
+    gone = os.path.join(cache.cache_dir, 'gone-22050.npy')
+    real_glob = audio_loader.glob.glob
+    monkeypatch.setattr(audio_loader.glob, 'glob', lambda pattern: real_glob(pattern) + [gone])
+    
+    load_audio(stereo_wav, decode_cache=cache)
+    assert real_glob(os.path.join(cache.cache_dir, '*.npy')) == []
+    cache.clear()
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+import batch
+from batch import iter_conversations, run_batch
+
+CONVERSATIONS = [
+    {'id': f"c{i}", 'turns': [
+        {'person': 'Person A', 'text': text},
+        {'person': 'Person B', 'text': 'Let us work through it together.'}
+    ]}
+    for i, text in enumerate([
+        'This is unacceptable!', 'Fine, go ahead.', 'I refuse to discuss it.', 'Could we compromise?',
+        'Whatever you think.'
+    ])
+]
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'conversations.jsonl'
+    path.write_text(''.join(json.dumps(conversation) + '\n' for conversation in CONVERSATIONS))
+    return str(path)
+
+
+@pytest.fixture
+def clean_output(source, tmp_path):
+    output = str(tmp_path / 'clean.jsonl')
+    run_batch(source, output, text_only=True)
+    with open(output, 'rb') as f:
+        return f.read()
+
+
+def interrupted_run(source, output, monkeypatch, after_turns):
+    """A run that dies while analyzing, leaving a half written record behind."""
+    calls = []
+    analyze_turn = batch.analyze_turn
+
+    def failing_analyze_turn(*args, **kwargs):
+        calls.append(None)
+        if len(calls) > after_turns:
+            raise KeyboardInterrupt
+        return analyze_turn(*args, **kwargs)
+    
+    with monkeypatch.context() as patch:
+        patch.setattr(batch, 'analyze_turn', failing_analyze_turn)
+        with pytest.raises(KeyboardInterrupt):
+            run_batch(source, output, text_only=True)
+    with open(output, 'ab') as f:
+        f.write(b'{"conversation_id": "c2", "tu')
+
+
+def test_resume_continues_after_the_last_checkpoint(source, clean_output, tmp_path, monkeypatch):
+    output = str(tmp_path / 'out.jsonl')
+    interrupted_run(source, output, monkeypatch, after_turns=5)
+    
+    summary = run_batch(source, output, text_only=True)
+    assert summary == {'resumed_from': 2, 'conversations': 3, 'turns': 6}
+    with open(output, 'rb') as f:
+        assert f.read() == clean_output
+    
+    # A finished run resumes to nothing
+    assert run_batch(source, output, text_only=True) == {'resumed_from': 5, 'conversations': 0, 'turns': 0}
+
+
+def test_checkpoint_settings_must_match(source, clean_output, tmp_path, monkeypatch):
+    output = str(tmp_path / 'out.jsonl')
+    interrupted_run(source, output, monkeypatch, after_turns=3)
+    
+    with pytest.raises(ValueError, match='--restart'):
+        run_batch(source, output, text_only=False)
+    
+    summary = run_batch(source, output, text_only=True, restart=True)
+    assert summary['resumed_from'] == 0 and summary['conversations'] == 5
+    with open(output, 'rb') as f:
+        assert f.read() == clean_output
+
+
+def test_workers_write_in_input_order(source, clean_output, tmp_path):
+    output = str(tmp_path / 'out.jsonl')
+    run_batch(source, output, workers=2, window=3, text_only=True, checkpoint_every=2)
+    with open(output, 'rb') as f:
+        assert f.read() == clean_output
+    with open(output + '.checkpoint') as f:
+        assert json.load(f)['completed'] == 5
+
+
+def test_iter_conversations_reads_lists_and_resolves_audio(tmp_path):
+    (tmp_path / 'audio').mkdir()
+    (tmp_path / 'manifest.jsonl').write_text(
+        json.dumps([{'person': 'A', 'text': 'Hi.', 'audio': 'audio/hi.wav'}]) + '\n\n'
+        + json.dumps({'id': 7, 'turns': [{'person': 'B', 'text': 'Hello.', 'audio': ''}]}) + '\n'
+    )
+    
+    conversations = list(iter_conversations(str(tmp_path)))
+    assert conversations == [
+        ('1', [{'person': 'A', 'text': 'Hi.', 'audio': str(tmp_path / 'audio' / 'hi.wav')}], None),
+        ('7', [{'person': 'B', 'text': 'Hello.', 'audio': None}], None)
+    ]
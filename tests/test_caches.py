@@ -0,0 +1,56 @@
+import pickle
+
+import numpy as np
+
+from feature_cache import FeatureCache
+from resolution_cache import ResolutionCache
+
+
+def test_feature_cache_round_trips_dtypes(tmp_path):
+    cache = FeatureCache(str(tmp_path))
+    features = {'pitch_std': np.float32(12.5), 'energy_mean': np.float64(0.1), 'pause_count': 3}
+    cache.put('key', features)
+    
+    cached = cache.get('key')
+    assert cached == features
+    assert {name: type(value) for name, value in cached.items()} == {'pitch_std': np.float32, 'energy_mean': np.float64, 'pause_count': np.int64}
+    assert cache.get('other') is None
+
+
+def test_feature_cache_evicts_least_recently_used(tmp_path):
+    cache = FeatureCache(str(tmp_path), max_bytes=50)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, {'value': np.float64(1.0)})
+        cache.get('a')
+    
+    assert cache.get('a') is not None
+    assert cache.get('b') is None
+    assert cache.stats()['bytes'] <= 50
+
+
+def test_resolution_cache_survives_reopening(tmp_path):
+    cache = ResolutionCache(str(tmp_path), memory_entries=1)
+    cache.put('a', 'first')
+    cache.put('b', 'second')
+    assert cache.stats()['memory_entries'] == 1
+    
+    reopened = pickle.loads(pickle.dumps(cache))
+    assert reopened.get('a') == 'first'
+    assert reopened.clear() == 2
+    assert reopened.get('b') is None
+
+
+def test_feature_cache_forgets_oldest_file_digests(tmp_path):
+    cache = FeatureCache(str(tmp_path / 'cache'), max_files=2)
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"{i}.wav"
+        path.write_bytes(bytes([i]) * 16)
+        paths.append(str(path))
+        cache.key_for(paths[-1], {})
+    
+    known = [row[0] for row in cache.conn.execute("SELECT path FROM files ORDER BY rowid")]
+    assert known == paths[1:]
+    assert cache.stats()['known_files'] == 2
+    # A forgotten file is hashed again and gets the same key
+    assert cache.key_for(paths[0], {'sr': 1}) == FeatureCache(str(tmp_path / 'other')).key_for(paths[0], {'sr': 1})
@@ -0,0 +1,71 @@
+import json
+import sqlite3
+
+import pytest
+
+from analysis_store import AnalysisStore
+from analyzer import FULL_AUDIO_BOUNDS, cascade_style, compute_tension_and_assertiveness
+from batch import run_batch
+from pipeline import analyze_turn
+
+# A single point: the text alone always settles the style
+POINT_BOUNDS = ((0.5, 0.5), (0.5, 0.5))
+
+TURN = {'person': 'Person A', 'text': 'This is completely unacceptable, fix it now!', 'audio': 'missing.wav'}
+
+
+def test_full_range_never_skips():
+    for text_tension in (0.0, 0.5, 1.0):
+        for text_assertiveness in (0.0, 0.5, 1.0):
+            assert cascade_style(text_tension, text_assertiveness, FULL_AUDIO_BOUNDS) is None
+
+
+def test_skipped_turns_are_flagged():
+    result = analyze_turn(TURN, audio_bounds=POINT_BOUNDS)
+    assert result['audio_skipped'] is True
+    
+    tension, assertiveness, skipped = compute_tension_and_assertiveness(
+        TURN['text'], None, audio_bounds=POINT_BOUNDS, return_skipped=True
+    )
+    assert not skipped
+    assert analyze_turn(TURN, text_only=True)['audio_skipped'] is False
+
+
+def test_batch_records_and_store_keep_the_flag(tmp_path):
+    source = tmp_path / 'conversations.jsonl'
+    source.write_text(json.dumps({'id': 'c1', 'turns': [TURN, {**TURN, 'audio': None}]}) + '\n')
+    output = str(tmp_path / 'out.jsonl')
+    store = AnalysisStore(str(tmp_path / 'store.sqlite3'))
+    
+    run_batch(str(source), output, store=store, audio_bounds=POINT_BOUNDS)
+    
+    records = [json.loads(line) for line in open(output)]
+    assert [record['audio_skipped'] for record in records] == [True, False]
+    assert [turn['audio_skipped'] for turn in store.find_turns()] == [True, False]
+    
+    # Resuming with different cascade bounds is refused
+    with pytest.raises(ValueError):
+        run_batch(str(source), output, audio_bounds=((0.4, 0.6), (0.4, 0.6)))
+
+
+def test_store_adds_the_flag_to_an_existing_database(tmp_path):
+    path = str(tmp_path / 'old.sqlite3')
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE conversations (id INTEGER PRIMARY KEY, external_id TEXT NOT NULL UNIQUE, recorded_at REAL NOT NULL);
+        CREATE TABLE turns (
+            id INTEGER PRIMARY KEY, conversation_id INTEGER NOT NULL REFERENCES conversations (id) ON DELETE CASCADE,
+            turn_index INTEGER NOT NULL, speaker TEXT NOT NULL, text TEXT NOT NULL, tension REAL NOT NULL,
+            assertiveness REAL NOT NULL, style_code INTEGER NOT NULL, recorded_at REAL NOT NULL, features TEXT,
+            UNIQUE (conversation_id, turn_index)
+        );
+        INSERT INTO conversations VALUES (1, 'old', 0);
+        INSERT INTO turns VALUES (1, 1, 1, 'A', 'hi', 0.1, 0.2, 0, 0, NULL);
+    """)
+    conn.commit()
+    conn.close()
+    
+    store = AnalysisStore(path)
+    assert store.find_turns()[0]['audio_skipped'] is False
+    store.add_conversation('new', [{**analyze_turn(TURN, audio_bounds=POINT_BOUNDS)}], recorded_at=1)
+    assert [turn['audio_skipped'] for turn in store.find_turns()] == [False, True]
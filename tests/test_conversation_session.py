@@ -0,0 +1,117 @@
+import os
+
+import numpy as np
+
+import instrumentation
+from benchmark import synthesize_speech
+from conversation_session import ConversationSession, turn_fingerprint
+from pipeline import analyze_conversation
+
+SR = 16000
+
+TURNS = [
+    {'person': 'Person A', 'text': 'This is completely unacceptable, fix it now!',
+     'audio': (synthesize_speech(2.0, SR, 0.2, seed=1), SR)},
+    {'person': 'Person B', 'text': 'I understand. Could we look at the options together?',
+     'audio': (synthesize_speech(2.0, SR, 0.3, seed=2), SR)},
+    {'person': 'Person A', 'text': 'Fine, but I need an answer today.', 'audio': None},
+    {'person': 'Person B', 'text': 'You will have one by noon.', 'audio': None}
+]
+
+
+def counted(session, turns):
+    """Run session.update and return its counters."""
+    aggregator = instrumentation.MetricsAggregator()
+    previous = instrumentation.configure(aggregator)
+    try:
+        session.update(turns)
+    finally:
+        instrumentation.configure(previous)
+    return aggregator.counters
+
+
+def test_fingerprint_follows_the_analysis_inputs(tmp_path):
+    turn = TURNS[0]
+    assert turn_fingerprint(turn) == turn_fingerprint({**turn, 'audio': (turn['audio'][0].copy(), SR)})
+    assert turn_fingerprint(turn) != turn_fingerprint({**turn, 'text': turn['text'] + ' '})
+    assert turn_fingerprint(turn) != turn_fingerprint({**turn, 'person': 'Person B'})
+    assert turn_fingerprint(turn) != turn_fingerprint({**turn, 'audio': (turn['audio'][0], 22050)})
+    
+    samples = turn['audio'][0].copy()
+    samples[100] += 0.01
+    assert turn_fingerprint(turn) != turn_fingerprint({**turn, 'audio': (samples, SR)})
+    
+    # Files are identified by path, size and modification time, without being read
+    path = tmp_path / 'turn.wav'
+    path.write_bytes(b'RIFF0000')
+    file_turn = {**turn, 'audio': str(path)}
+    before = turn_fingerprint(file_turn)
+    assert turn_fingerprint(file_turn) == before
+    os.utime(path, ns=(0, 0))
+    assert turn_fingerprint(file_turn) != before
+    assert turn_fingerprint({**turn, 'audio': str(tmp_path / 'missing.wav')}) != before
+
+
+def test_update_reuses_unchanged_turns():
+    session = ConversationSession()
+    counters = counted(session, TURNS[:2])
+    assert counters['session.turns_analyzed'] == 2 and 'session.turns_reused' not in counters
+    
+    # Resending the history only analyzes the new turns
+    counters = counted(session, TURNS)
+    assert counters['session.turns_analyzed'] == 2
+    assert counters['session.turns_reused'] == 2
+    assert session.results == analyze_conversation(TURNS)
+
+
+def test_edits_and_removals_rebuild_statistics():
+    session = ConversationSession()
+    session.update(TURNS)
+    
+    edited = [dict(turn) for turn in TURNS]
+    edited[1]['text'] = 'This is ridiculous, I refuse!'
+    counters = counted(session, edited)
+    assert counters['session.turns_analyzed'] == 1
+    assert counters['session.turns_reused'] == 3
+    assert session.results == analyze_conversation(edited)
+    assert session.speakers == _fresh(edited).speakers
+    
+    session.update(edited[:3])
+    assert session.results == analyze_conversation(edited[:3])
+    assert session.speakers == _fresh(edited[:3]).speakers
+
+
+def test_speaker_statistics_match_the_results():
+    session = _fresh(TURNS)
+    for person in ('Person A', 'Person B'):
+        turns = [result for result in session.results if result['person'] == person]
+        tensions = np.array([result['tension'] for result in turns])
+        stats = session.speakers[person]
+        
+        assert stats['turns'] == len(turns)
+        assert np.isclose(stats['tension_mean'], tensions.mean())
+        assert np.isclose(stats['tension_slope'], np.polyfit(np.arange(1, len(turns) + 1), tensions, 1)[0])
+        assert stats['last_style'] == turns[-1]['style']
+        assert sum(stats['styles'].values()) == len(turns)
+
+
+def test_materially_changed():
+    session = _fresh(TURNS[:2])
+    assert session.materially_changed()
+    session.mark_resolved('Talk it through.')
+    assert not session.materially_changed()
+    
+    # A repeat of the speaker's style and tension changes nothing of substance
+    session.update(TURNS[:2] + [TURNS[0]])
+    assert not session.materially_changed(tension_change=1.0)
+    assert session.materially_changed(max_unresolved_turns=1)
+    
+    # Editing an earlier turn always calls for a new resolution
+    session.update([{**TURNS[0], 'text': 'Thanks, that works.'}] + TURNS[1:2] + [TURNS[0]])
+    assert session.materially_changed(tension_change=1.0)
+
+
+def _fresh(turns):
+    session = ConversationSession()
+    session.update(turns)
+    return session
@@ -0,0 +1,90 @@
+import random
+from collections import OrderedDict
+
+import pytest
+from textblob import TextBlob
+from textblob._text import EMOTICONS
+from textblob.en import sentiment as pattern_sentiment
+
+import text_analyzer
+from lexicon_sentiment import LexiconSentiment
+from text_analyzer import analyze_sentiment_batch
+
+TEXTS = [
+    "",
+    "I love this plan.",
+    "This is a terrible, awful idea.",
+    # Negation
+    "This is not good.",
+    "I don't think that is helpful at all.",
+    "Never a dull moment, no bad news.",
+    # Intensifiers, alone and stacked, before and after negation
+    "That is very good.",
+    "That is really very extremely bad.",
+    "Not very happy with this.",
+    "Very not happy with this.",
+    "very",
+    # Exclamation
+    "This is great!",
+    "Unacceptable!!! Fix it now!",
+    "Wow (!) that was quick",
+    # Emoticons
+    "Sure :)",
+    "Fine :-( whatever",
+    "Ok <3 XD",
+    "Thanks :P but no :(",
+    # Case, punctuation and unknown words
+    "GREAT work, Awesome results; BAD timing...",
+    "Asdf qwerty zxcv.",
+    "This is completely unacceptable, fix it now!",
+    "I understand your frustration. Let us find a solution that works for both of us.",
+]
+
+
+def random_texts(count, seed=3):
+    """Lexicon words mixed with negations, modifiers, exclamations, emoticons and filler."""
+    len(pattern_sentiment)
+    words = sorted(word for word, senses in dict.items(pattern_sentiment) if None in senses)
+    specials = ['not', 'no', 'never', "n't", "don't", 'very', 'really', 'extremely', 'too', 'so', '!', '(!)']
+    emoticons = sorted(emoticon for group in EMOTICONS.values() for emoticon in group)
+    fillers = ['the', 'plan', 'we', 'it', 'is', ',', '.', '?']
+    rng = random.Random(seed)
+    texts = []
+    for index in range(count):
+        # Every other text leaves out the specials and emoticons, so most of those take the vectorized path
+        weights = [5, 3, 1, 3] if index % 2 else [5, 0, 0, 3]
+        tokens = []
+        for _ in range(rng.randint(1, 15)):
+            pool = rng.choices([words, specials, emoticons, fillers], weights=weights)[0]
+            token = rng.choice(pool)
+            if rng.random() < 0.2:
+                token = token.upper()
+            tokens.append(token)
+        texts.append(' '.join(tokens))
+    return texts
+
+
+@pytest.fixture
+def empty_memo(monkeypatch):
+    # Results are memoized by text, whichever backend computed them
+    monkeypatch.setattr(text_analyzer, '_sentiment_memo', OrderedDict())
+
+
+def test_lexicon_reproduces_textblob_polarity_and_subjectivity():
+    texts = TEXTS + random_texts(2000)
+    expected = [tuple(TextBlob(text).sentiment) for text in texts]
+    assert LexiconSentiment().score_batch(texts) == expected
+    assert [LexiconSentiment().score(text) for text in TEXTS] == expected[:len(TEXTS)]
+
+
+def test_lexicon_backend_scores_like_textblob(empty_memo, monkeypatch):
+    texts = TEXTS + random_texts(500, seed=5)
+    lexicon_scores = analyze_sentiment_batch(texts, backend='lexicon')
+    
+    monkeypatch.setattr(text_analyzer, '_sentiment_memo', OrderedDict())
+    assert lexicon_scores == analyze_sentiment_batch(texts, backend='textblob')
+
+
+def test_unknown_backend_is_rejected(empty_memo):
+    with pytest.raises(ValueError):
+        analyze_sentiment_batch(["Something new."], backend='vader')
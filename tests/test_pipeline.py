@@ -0,0 +1,87 @@
+import pytest
+
+import instrumentation
+import pipeline
+from benchmark import synthesize_speech
+from pipeline import analyze_conversation, analyze_conversations
+
+
+class ListSink:
+    def __init__(self):
+        self.events = []
+
+    def handle(self, event):
+        self.events.append(event)
+
+
+@pytest.fixture
+def conversation():
+    return [
+        {'person': 'Person A', 'text': 'This is completely unacceptable!', 'audio': (synthesize_speech(2.0, 16000, 0.2, seed=1), 16000)},
+        {'person': 'Person B', 'text': 'I understand, let us find a way.', 'audio': (synthesize_speech(2.0, 16000, 0.3, seed=2), 16000)},
+        {'person': 'Person A', 'text': 'Fine, what do you suggest?', 'audio': (synthesize_speech(2.0, 16000, 0.4, seed=3), 16000)}
+    ]
+
+
+def recorded(function, *args, **kwargs):
+    sink = ListSink()
+    previous = instrumentation.configure(sink)
+    try:
+        result = function(*args, **kwargs)
+    finally:
+        instrumentation.configure(previous)
+    return result, [(event['type'], event['name'], event.get('index')) for event in sink.events]
+
+
+def turns_of(events):
+    """Event names grouped by the turn they were recorded in; memo counters depend on the process and are left out."""
+    turns = []
+    for kind, name, index in events:
+        if name == 'turn_start':
+            turns.append([])
+        if kind != 'counter':
+            turns[-1].append((name, index))
+    return turns
+
+
+def test_workers_emit_events_in_serial_order(conversation):
+    serial, serial_events = recorded(analyze_conversation, conversation)
+    parallel, parallel_events = recorded(analyze_conversation, conversation, workers=2)
+    
+    assert parallel == serial
+    serial_turns, parallel_turns = turns_of(serial_events), turns_of(parallel_events)
+    assert [turn[0] for turn in parallel_turns] == [('turn_start', i) for i in (1, 2, 3)]
+    assert [turn[-1] for turn in parallel_turns] == [('turn', i) for i in (1, 2, 3)]
+    # Each turn's worker timers are replayed between its turn_start and turn
+    for serial_turn, parallel_turn in zip(serial_turns, parallel_turns):
+        names = {name for name, _ in parallel_turn}
+        assert {'stft', 'pitch', 'fusion'} <= names <= {name for name, _ in serial_turn} | {'keyword'}
+
+
+def test_worker_timers_reach_the_metrics_aggregator(conversation):
+    aggregator = instrumentation.MetricsAggregator()
+    previous = instrumentation.configure(aggregator)
+    try:
+        analyze_conversations([conversation, conversation[:1]], workers=2)
+    finally:
+        instrumentation.configure(previous)
+    
+    summary = aggregator.summary()
+    assert summary['timers']
+    assert summary['values']['turn.tension']['count'] == 4
+
+
+def test_worker_pool_is_reused(conversation):
+    analyze_conversation(conversation, workers=2)
+    pool = pipeline._shared_pool
+    analyze_conversation(conversation, workers=2)
+    assert pipeline._shared_pool is pool
+    
+    analyze_conversation(conversation, workers=3)
+    assert pipeline._shared_pool is not pool
+
+
+def test_explicit_pool_is_used(conversation):
+    with pipeline._process_pool(2, None) as pool:
+        results = analyze_conversation(conversation, pool=pool)
+    assert results == analyze_conversation(conversation)
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+import audio_analyzer
+from audio_analyzer import HOP_LENGTH, compute_frame_features, extract_file_features, extract_prosody_features
+from benchmark import synthesize_speech
+from block_analyzer import extract_prosody_features_blockwise
+from pitch_tracker import yin_pitch_track, yin_pitch_values
+from stream_analyzer import StreamingProsodyAnalyzer
+
+
+SR = 22050
+
+
+def _tone(f0, duration=1.0, sr=SR):
+    t = np.arange(int(duration * sr)) / sr
+    return (0.5 * sum(np.sin(2 * np.pi * k * f0 * t) / k for k in range(1, 5))).astype(np.float32)
+
+
+@pytest.mark.parametrize('f0', [85.0, 140.0, 220.0, 410.0])
+def test_yin_finds_the_fundamental_of_a_harmonic_tone(f0):
+    y = _tone(f0)
+    rms = compute_frame_features(y, SR, pitch=False)['rms']
+    pitch = yin_pitch_values(y, SR, rms, HOP_LENGTH)
+    
+    # Every frame but the half-empty edge frames is voiced, and within 1% of f0
+    assert len(pitch) >= len(rms) - 4
+    assert np.median(np.abs(pitch - f0)) < 0.01 * f0
+
+
+def test_yin_leaves_out_silence_and_noise():
+    rng = np.random.default_rng(0)
+    y = np.concatenate([_tone(150.0), np.zeros(SR, dtype=np.float32), rng.normal(0, 0.3, SR).astype(np.float32)])
+    rms = compute_frame_features(y, SR, pitch=False)['rms']
+    track = yin_pitch_track(y, SR, rms, HOP_LENGTH)
+    
+    frames_per_second = SR / HOP_LENGTH
+    assert np.all(track[int(1.2 * frames_per_second):int(1.8 * frames_per_second)] == 0)
+    assert np.mean(track[int(2.2 * frames_per_second):] > 0) < 0.1
+    assert np.array_equal(yin_pitch_values(y, SR, rms, HOP_LENGTH), track[track > 0])
+
+
+def test_yin_pitch_spread_matches_the_synthesized_contour():
+    y, true_pitch = synthesize_speech(4.0, SR, 0.3, seed=3, return_pitch=True)
+    features = extract_prosody_features(y, SR, pitch_backend='yin')
+    
+    assert abs(features['pitch_std'] - np.std(true_pitch[true_pitch > 0])) < 3.0
+
+
+def test_streaming_yin_follows_whole_signal_yin():
+    y = synthesize_speech(6.0, SR, 0.3, seed=5)
+    whole = extract_prosody_features(y, SR, pitch_backend='yin')
+    
+    analyzer = StreamingProsodyAnalyzer(SR, window_seconds=None, pitch_backend='yin')
+    for start in range(0, len(y), 3000):
+        analyzer.push(y[start:start + 3000])
+    analyzer.close()
+    streamed = analyzer.features()
+    
+    assert streamed['pitch_std'] == pytest.approx(whole['pitch_std'], rel=0.02)
+    for name in ('energy_mean', 'silence_ratio', 'zcr', 'spectral_centroid'):
+        assert streamed[name] == pytest.approx(whole[name], rel=1e-5)
+
+
+def test_long_files_use_the_configured_backend(tmp_path, monkeypatch):
+    y = synthesize_speech(6.0, SR, 0.3, seed=7)
+    path = str(tmp_path / 'long.wav')
+    sf.write(path, y, SR, subtype='FLOAT')
+    whole = {backend: extract_prosody_features(y, SR, pitch_backend=backend) for backend in ('piptrack', 'yin')}
+    
+    monkeypatch.setattr(audio_analyzer, 'BLOCKWISE_MIN_SECONDS', 1)
+    monkeypatch.setattr(audio_analyzer, 'PITCH_BACKEND', 'yin')
+    blockwise = extract_file_features(path)
+    
+    assert blockwise['pitch_std'] == pytest.approx(whole['yin']['pitch_std'], rel=0.02)
+    assert extract_prosody_features_blockwise(path, block_seconds=1.0, pitch_backend='piptrack') == pytest.approx(whole['piptrack'])
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        StreamingProsodyAnalyzer(SR, pitch_backend='crepe')
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+from audio_loader import load_audio
+from benchmark import synthesize_speech
+from pipeline import analyze_turn
+from recording_analyzer import analyze_recording, find_turn_boundaries, segment_views
+
+SR = 16000
+
+# Turn lengths and the silences between them, in seconds
+TURN_SECONDS = (2.0, 3.0, 2.5)
+GAP_SECONDS = 1.0
+
+
+def conversation_signal():
+    """Three speech-like turns separated by silences; returns the signal and each silence's middle."""
+    pieces, gap_middles, t = [], [], 0.0
+    for i, seconds in enumerate(TURN_SECONDS):
+        if i:
+            pieces.append(np.zeros(int(GAP_SECONDS * SR), dtype=np.float32))
+            gap_middles.append(t + GAP_SECONDS / 2)
+            t += GAP_SECONDS
+        pieces.append(synthesize_speech(seconds, SR, 0.05, seed=20 + i).astype(np.float32))
+        t += seconds
+    return np.concatenate(pieces), gap_middles
+
+
+def test_segment_views_share_the_signal():
+    y = np.arange(SR * 2, dtype=np.float32)
+    first, second = segment_views(y, SR, [(0.0, 0.5), (0.50003, 3.0)])
+    
+    assert np.shares_memory(first, y) and np.shares_memory(second, y)
+    assert len(first) == SR // 2
+    # Bounds round to the nearest sample and clip to the signal
+    assert second[0] == SR // 2 and second[-1] == y[-1]
+    with pytest.raises(ValueError):
+        segment_views(y, SR, [(1.0, 1.0)])
+
+
+def test_turn_boundaries_fall_in_the_silences():
+    y, gap_middles = conversation_signal()
+    spans = find_turn_boundaries(y, SR, n_turns=3)
+    
+    assert len(spans) == 3
+    assert spans[0][0] == 0.0 and spans[-1][1] == pytest.approx(len(y) / SR)
+    for (_, cut), (next_start, _), middle in zip(spans, spans[1:], gap_middles):
+        assert cut == next_start
+        assert abs(cut - middle) < 0.1
+    
+    with pytest.raises(ValueError):
+        find_turn_boundaries(y, SR, n_turns=10)
+
+
+def test_recording_matches_per_turn_files(tmp_path):
+    y, _ = conversation_signal()
+    path = str(tmp_path / 'recording.wav')
+    sf.write(path, y, SR, subtype='FLOAT')
+    turns = [
+        {'person': 'Person A', 'text': 'This is completely unacceptable!'},
+        {'person': 'Person B', 'text': 'I hear you, let us sort it out.'},
+        {'person': 'Person A', 'text': 'Alright, what do you propose?'}
+    ]
+    
+    results = analyze_recording(path, turns)
+    
+    decoded, sr = load_audio(path)
+    segments = segment_views(decoded, sr, [(result['start'], result['end']) for result in results])
+    for i, (turn, result, segment) in enumerate(zip(turns, results, segments)):
+        # The audio counts, so matching the per-file result means the right samples were analyzed
+        assert result['tension'] != analyze_turn({**turn, 'audio': None})['tension']
+        turn_path = str(tmp_path / f"turn{i}.wav")
+        sf.write(turn_path, segment, sr, subtype='FLOAT')
+        expected = analyze_turn({**turn, 'audio': turn_path})
+        assert {key: result[key] for key in expected} == expected
+    
+    # Explicit bounds are used as given
+    timed = [{**turn, 'start': result['start'], 'end': result['end']} for turn, result in zip(turns, results)]
+    assert analyze_recording(path, timed) == results
+
+
+def test_resampled_recording_matches_per_turn_files(tmp_path, monkeypatch):
+    native_sr = 44100
+    y = np.concatenate([
+        synthesize_speech(seconds, native_sr, 0.05, seed=30 + i).astype(np.float32)
+        for i, seconds in enumerate((2.0, 2.5, 3.0))
+    ])
+    path = str(tmp_path / 'recording.wav')
+    sf.write(path, y, native_sr, subtype='FLOAT')
+    turns = [
+        {'person': 'Person A', 'text': 'We need to talk about the deadline.', 'start': 0.0, 'end': 2.0},
+        {'person': 'Person B', 'text': 'Sure, what is on your mind?', 'start': 2.0, 'end': 4.5},
+        {'person': 'Person A', 'text': 'It is not going to work like this.', 'start': 4.5, 'end': 7.5}
+    ]
+    
+    results = analyze_recording(path, turns, sr=16000)
+    
+    # Each turn as its own file at the native rate, decoded at the same analysis rate
+    monkeypatch.setattr('audio_analyzer.ANALYSIS_SR', 16000)
+    segments = segment_views(y, native_sr, [(turn['start'], turn['end']) for turn in turns])
+    for i, (turn, segment) in enumerate(zip(turns, segments)):
+        turn_path = str(tmp_path / f"turn{i}.wav")
+        sf.write(turn_path, segment, native_sr, subtype='FLOAT')
+        expected = analyze_turn({'person': turn['person'], 'text': turn['text'], 'audio': turn_path})
+        assert {key: results[i][key] for key in expected} == expected
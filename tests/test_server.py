@@ -0,0 +1,162 @@
+import asyncio
+import json
+import time
+
+import soundfile as sf
+
+import instrumentation
+import server
+from benchmark import synthesize_speech
+from pipeline import analyze_turn
+from server import AnalysisServer
+
+TURN = {'person': 'Person A', 'text': 'This is completely unacceptable, fix it now!'}
+
+
+def slow_turn(turn, text_only):
+    """Stands in for the worker's turn analysis, taking as many seconds as the text says."""
+    time.sleep(float(turn['text']))
+    return {'person': turn['person'], 'slept': float(turn['text'])}
+
+
+async def request(port, method, path, body=None, raw=None):
+    """Send one request on its own connection; returns (status, headers, decoded JSON body)."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    if raw is None:
+        data = b'' if body is None else (body if isinstance(body, bytes) else json.dumps(body).encode('utf-8'))
+        raw = (f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(data)}\r\n"
+               f"Connection: close\r\n\r\n").encode('latin-1') + data
+    writer.write(raw)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    
+    head, _, payload = response.partition(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    headers = dict(line.split(': ', 1) for line in lines[1:])
+    return int(lines[0].split()[1]), headers, json.loads(payload)
+
+
+def serve(test, **options):
+    """Run test(server, port) against a server listening on a free port."""
+    async def run():
+        analysis_server = AnalysisServer(**{'workers': 1, 'text_only': True, **options})
+        # The server reports to its own metrics; other tests should not see them
+        previous = instrumentation.get_sink()
+        try:
+            _, port = await analysis_server.start(port=0)
+            return await test(analysis_server, port)
+        finally:
+            await analysis_server.close()
+            instrumentation.configure(previous)
+    return asyncio.run(run())
+
+
+def test_turn_and_conversation_are_analyzed():
+    async def test(analysis_server, port):
+        status, _, result = await request(port, 'POST', '/turn', TURN)
+        assert status == 200
+        assert result == json.loads(json.dumps(analyze_turn({**TURN, 'audio': None}, text_only=True), default=float))
+        
+        status, _, results = await request(port, 'POST', '/conversation', {'turns': [TURN, TURN]})
+        assert status == 200 and results == [result, result]
+        
+        status, _, health = await request(port, 'GET', '/health')
+        assert status == 200 and health['status'] == 'ok'
+    serve(test)
+
+
+def test_saturated_queue_is_rejected_with_retry_after(monkeypatch):
+    monkeypatch.setattr(server, '_analyze_turn_in_worker', slow_turn)
+
+    async def test(analysis_server, port):
+        # One running and one queued fill a single worker with a queue of one
+        accepted = [
+            asyncio.create_task(request(port, 'POST', '/turn', {'person': 'A', 'text': '0.5'}))
+            for _ in range(2)
+        ]
+        while analysis_server.pending < 2:
+            await asyncio.sleep(0.01)
+        assert analysis_server.queue_depth() == 1
+        
+        status, headers, error = await request(port, 'POST', '/turn', {'person': 'A', 'text': '0'})
+        assert status == 429
+        assert headers['Retry-After'] == str(server.RETRY_AFTER_SECONDS)
+        assert 'busy' in error['error']
+        
+        for status, _, result in await asyncio.gather(*accepted):
+            assert status == 200 and result['slept'] == 0.5
+        assert analysis_server.pending == 0
+        
+        # Capacity is free again once the accepted work is done
+        status, _, _ = await request(port, 'POST', '/turn', {'person': 'A', 'text': '0'})
+        assert status == 200
+        
+        _, _, metrics = await request(port, 'GET', '/metrics')
+        assert metrics['counters']['rejected.analysis'] == 1
+        assert metrics['counters']['http.429'] == 1
+        assert metrics['values']['queue.depth']['max'] == 1
+    serve(test, queue_size=1)
+
+
+def test_malformed_requests_get_400():
+    async def test(analysis_server, port):
+        for body in (b'{not json', {'person': 'A'}, {'person': 'A', 'text': 'Hi', 'audio': 3}, {'turns': []}):
+            path = '/conversation' if isinstance(body, dict) and 'turns' in body else '/turn'
+            status, _, error = await request(port, 'POST', path, body)
+            assert status == 400 and error['error']
+        
+        status, _, _ = await request(port, None, None, raw=b'NONSENSE\r\n\r\n')
+        assert status == 400
+        status, _, _ = await request(port, 'GET', '/turn')
+        assert status == 405
+        status, _, _ = await request(port, 'GET', '/nowhere')
+        assert status == 404
+        
+        _, _, metrics = await request(port, 'GET', '/metrics')
+        assert metrics['counters']['http.400'] == 4
+        assert 'http.nowhere.requests' not in metrics['counters']
+    serve(test)
+
+
+def test_metrics_report_load_and_latency():
+    async def test(analysis_server, port):
+        for _ in range(3):
+            await request(port, 'POST', '/turn', TURN)
+        status, _, metrics = await request(port, 'GET', '/metrics')
+        
+        assert status == 200
+        assert metrics['workers'] == 1 and metrics['capacity'] == 1 + server.DEFAULT_QUEUE_SIZE
+        assert metrics['pending'] == 0 and metrics['queue_depth'] == 0
+        assert metrics['uptime'] > 0
+        assert metrics['counters']['http.turn.requests'] == 3
+        assert metrics['values']['http.turn.seconds']['count'] == 3
+        assert metrics['values']['work.service']['count'] == 3
+        assert metrics['timers']['warm_up']['count'] == 1
+    serve(test)
+
+
+def test_audio_paths_are_confined_to_the_audio_root(tmp_path):
+    root = tmp_path / 'audio'
+    root.mkdir()
+    sf.write(str(root / 'turn.wav'), synthesize_speech(2.0, 16000, 0.2, seed=4), 16000)
+    outside = tmp_path / 'secret.wav'
+    outside.write_bytes(b'')
+    (root / 'link.wav').symlink_to(outside)
+
+    async def test(analysis_server, port):
+        status, _, result = await request(port, 'POST', '/turn', {**TURN, 'audio': 'turn.wav'})
+        assert status == 200
+        assert result['tension'] == analyze_turn({**TURN, 'audio': str(root / 'turn.wav')})['tension']
+        
+        for audio in (str(outside), '../secret.wav', 'link.wav'):
+            status, _, error = await request(port, 'POST', '/turn', {**TURN, 'audio': audio})
+            assert status == 403, audio
+    serve(test, text_only=False, audio_root=str(root))
+
+    async def without_root(analysis_server, port):
+        status, _, _ = await request(port, 'POST', '/turn', {**TURN, 'audio': str(root / 'turn.wav')})
+        assert status == 403
+        status, _, _ = await request(port, 'POST', '/turn', {**TURN, 'audio': None})
+        assert status == 200
+    serve(without_root)
@@ -0,0 +1,46 @@
+import numpy as np
+
+from audio_analyzer import HOP_LENGTH, extract_prosody_features
+from benchmark import synthesize_speech
+from stream_analyzer import DEFAULT_WINDOW_SECONDS, StreamingProsodyAnalyzer, analyze_stream
+
+
+SR = 16000
+
+
+def _chunks(y, size=4000):
+    return [y[start:start + size] for start in range(0, len(y), size)]
+
+
+def test_whole_stream_matches_whole_signal_analysis():
+    y = synthesize_speech(8.0, SR, 0.3, seed=1)
+    analyzer = StreamingProsodyAnalyzer(SR, window_seconds=None)
+    for chunk in _chunks(y):
+        analyzer.push(chunk)
+    analyzer.close()
+    
+    assert analyzer.features() == extract_prosody_features(y, SR, pitch_backend='piptrack')
+
+
+def test_int16_bytes_are_decoded_like_floats():
+    y = synthesize_speech(2.0, SR, 0.3, seed=2)
+    pcm = np.round(np.clip(y, -1, 1 - 1 / 32768) * 32768).astype('<i2')
+    from_bytes = list(analyze_stream([pcm[i:i + 999].tobytes() for i in range(0, len(pcm), 999)], SR))
+    from_floats = list(analyze_stream(_chunks(pcm.astype(np.float32) / 32768.0, 999), SR))
+    assert from_bytes == from_floats
+
+
+def test_default_window_bounds_retained_frames():
+    window_frames = int(DEFAULT_WINDOW_SECONDS * SR / HOP_LENGTH)
+    y = synthesize_speech(10.0, SR, 0.3, seed=3)
+    analyzer = StreamingProsodyAnalyzer(SR)
+    
+    # Two minutes of audio keep at most one window of per-frame values, in a bounded buffer
+    capacities = []
+    for _ in range(12):
+        for chunk in _chunks(y):
+            analyzer.push(chunk)
+        capacities.append(len(analyzer._rms._values))
+    assert len(analyzer._rms) == window_frames
+    assert capacities[-1] == capacities[len(capacities) // 2]
+
@@ -0,0 +1,123 @@
+import random
+
+import pytest
+
+from text_analyzer import (
+    ACCEPTANCE_KEYWORDS,
+    ASSERTIVE_CONTEXT_KEYWORDS,
+    ASSERTIVE_KEYWORDS,
+    COLLABORATIVE_KEYWORDS,
+    KEYWORD_MATCHER,
+    RESISTANCE_KEYWORDS,
+    STRONG_AVOIDANCE_KEYWORDS,
+    WEAK_AVOIDANCE_KEYWORDS,
+    detect_patterns
+)
+
+CORPUS = [
+    "",
+    "OK",
+    "Okay, LET'S DO it. Sounds good!",
+    # Overlapping keywords: 'let us see' / 'let us', 'i understand' / 'understand', 'postponed' / 'postpone'
+    "Let us see if we can find a solution. I understand.",
+    "It was postponed twice, we need to schedule it today.",
+    "Can we discuss this later? I'm busy right now.",
+    "can we, can we, CAN WE",
+    # Keywords inside longer words: 'nowhere' holds 'no' and 'now', 'cannot' holds 'not'
+    "Nowhere near done, I cannot accept notes like these.",
+    "Unacceptable! I refuse, that's wrong and it's not fine.",
+    "thank you\tthanks\nthat works for me",
+    "I don't think so, however it doesn't matter.",
+    "We must work together; both of us need help, mutual empathy.",
+    "Let's see... the delay is a problem, an issue, an argument.",
+    "Absolutely perfect, exactly, great, good, certainly, alright, sure.",
+    "Busy.Busy.BUSY later?later?",
+    "agreed  agree   agreeable",
+    "i accept,accepted:acceptable",
+    "Delay it again? No, immediately, ASAP, it's urgent!",
+    "Already delayed, we insist and demand, we require it now.",
+    "That's fine, no problem, makes sense, I appreciate it.",
+    # Unicode whitespace splits words, and case folding can change the length of the text
+    "OKAY\u00a0FINE\u2003but\u3000NO",
+    "\u0130 UNDERSTAND, STRASSE \u1e9e",
+]
+
+
+def reference_counts(text):
+    """The original checks: distinct keywords in the text, or distinct words containing a keyword."""
+    text_lower = text.lower()
+    words = set(text_lower.split())
+    return {
+        'acceptance': sum(1 for word in words if any(kw in word for kw in ACCEPTANCE_KEYWORDS)),
+        'resistance': sum(1 for word in words if any(kw in word for kw in RESISTANCE_KEYWORDS)),
+        'assertive': sum(1 for word in words if any(kw in word for kw in ASSERTIVE_KEYWORDS)),
+        'collaborative': sum(1 for kw in COLLABORATIVE_KEYWORDS if kw in text_lower),
+        'strong_avoidance': sum(1 for kw in STRONG_AVOIDANCE_KEYWORDS if kw in text_lower),
+        'weak_avoidance': sum(1 for kw in WEAK_AVOIDANCE_KEYWORDS if kw in text_lower),
+        'assertive_context': sum(1 for kw in ASSERTIVE_CONTEXT_KEYWORDS if kw in text_lower)
+    }
+
+
+def reference_patterns(text):
+    """The original detect_compliance, detect_collaboration and detect_avoidance."""
+    counts = reference_counts(text)
+    text_lower = text.lower()
+    
+    if counts['acceptance'] > 0 and counts['resistance'] == 0:
+        compliance = min(0.9 + (counts['acceptance'] * 0.05), 1.0)
+    elif counts['resistance'] > 0 or counts['assertive'] > 1:
+        compliance = 0.1
+    else:
+        compliance = 0.5
+    
+    collaboration = 0.9 if counts['collaborative'] >= 2 else 0.7 if counts['collaborative'] == 1 else 0.0
+    
+    strong_count, weak_count = counts['strong_avoidance'], counts['weak_avoidance']
+    if 'postponed' in text_lower or 'delay' in text_lower:
+        if any(word in text_lower for word in {'twice', 'already', 'schedule', 'today', 'need'}):
+            weak_count = 0
+    if strong_count >= 2:
+        avoidance = 0.95
+    elif strong_count >= 1:
+        avoidance = 0.80
+    elif weak_count > 0:
+        avoidance = 0.30
+    else:
+        avoidance = 0.0
+    return compliance, collaboration, avoidance
+
+
+def random_texts(count, seed=7):
+    """Keywords and their pieces glued with spaces, punctuation and other words in random case."""
+    keywords = sorted(
+        ACCEPTANCE_KEYWORDS | COLLABORATIVE_KEYWORDS | ASSERTIVE_KEYWORDS | RESISTANCE_KEYWORDS
+        | STRONG_AVOIDANCE_KEYWORDS | WEAK_AVOIDANCE_KEYWORDS | ASSERTIVE_CONTEXT_KEYWORDS
+    )
+    fillers = ['the', 'plan', 'meeting', 'we', 'it', 'un', 'ness', 'ed', 'ly', 's']
+    separators = [' ', '  ', '', ', ', '. ', '? ', '!', '\t', '\n', '-', "'"]
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        pieces = []
+        for _ in range(rng.randint(1, 12)):
+            piece = rng.choice(keywords) if rng.random() < 0.6 else rng.choice(fillers)
+            if rng.random() < 0.2:
+                cut = rng.randint(0, len(piece))
+                piece = piece[:cut] if rng.random() < 0.5 else piece[cut:]
+            if rng.random() < 0.3:
+                piece = piece.upper() if rng.random() < 0.5 else piece.title()
+            pieces.append(piece + rng.choice(separators))
+        texts.append(''.join(pieces))
+    return texts
+
+
+@pytest.mark.parametrize('text', CORPUS)
+def test_keyword_counts_match_the_reference_scan(text):
+    assert KEYWORD_MATCHER.count(text.lower()) == reference_counts(text)
+    assert detect_patterns(text) == reference_patterns(text)
+
+
+def test_patterns_match_the_reference_scan_on_random_texts():
+    for text in random_texts(3000):
+        assert KEYWORD_MATCHER.count(text.lower()) == reference_counts(text), text
+        assert detect_patterns(text) == reference_patterns(text), text
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+import analyzer
+import audio_analyzer
+from analyzer import compute_tension_and_assertiveness, fuse_scores
+from tki_mapper import DEFAULT_THRESHOLDS, STYLE_LABELS, map_tki_style, map_tki_styles, style_labels
+
+
+def edge_values():
+    """Every threshold exactly and its neighbouring doubles, plus the ends and points between."""
+    values = {0.0, 1.0}
+    for value in DEFAULT_THRESHOLDS.values():
+        values.update((value, np.nextafter(value, 0.0), np.nextafter(value, 1.0)))
+    cuts = sorted(values)
+    values.update((low + high) / 2 for low, high in zip(cuts, cuts[1:]))
+    return np.array(sorted(values))
+
+
+def test_vectorized_styles_match_the_scalar_mapping():
+    values = edge_values()
+    tension, assertiveness = (grid.ravel() for grid in np.meshgrid(values, values))
+    
+    codes = map_tki_styles(tension, assertiveness)
+    expected = [map_tki_style(t, a) for t, a in zip(tension.tolist(), assertiveness.tolist())]
+    
+    assert codes.dtype == np.int8
+    assert codes.tolist() == [STYLE_LABELS.index(label) for label in expected]
+    assert style_labels(codes).tolist() == expected
+    # Every style is reached
+    assert set(codes.tolist()) == set(range(len(STYLE_LABELS)))
+
+
+def test_vectorized_styles_keep_the_shape():
+    tension = np.array([[0.8, 0.2], [0.5, 0.7]])
+    assertiveness = np.array([[0.7, 0.3], [0.5, 0.4]])
+    codes = map_tki_styles(tension, assertiveness)
+    assert codes.shape == (2, 2)
+    assert style_labels(codes)[1, 1] == map_tki_style(0.7, 0.4)
+
+
+def test_fusion_matches_the_scalar_scores(monkeypatch):
+    rng = np.random.default_rng(1)
+    steps = np.round(np.arange(0.0, 1.0001, 0.005), 3)
+    # Round-number scores land on rounding ties, random ones anywhere
+    scores = np.concatenate([
+        rng.choice(steps, size=(4000, 4)),
+        rng.random((4000, 4))
+    ])
+    
+    pending = []
+    monkeypatch.setattr(analyzer, 'analyze_sentiment', lambda text: pending[0][:2])
+    monkeypatch.setattr(audio_analyzer, 'analyze_prosody', lambda audio_path, cache=None: pending[0][2:])
+    expected = []
+    for row in scores.tolist():
+        pending[:] = [row]
+        expected.append(compute_tension_and_assertiveness('text', 'audio.wav'))
+    
+    tension, assertiveness = fuse_scores(scores[:, 0], scores[:, 1], scores[:, 2], scores[:, 3])
+    assert list(zip(tension.tolist(), assertiveness.tolist())) == expected
+    
+    codes = map_tki_styles(tension, assertiveness)
+    assert style_labels(codes).tolist() == [map_tki_style(t, a) for t, a in expected]
+
+
+# Fused values just below or exactly on a rounding tie
+@pytest.mark.parametrize('value', [0.995, 0.125, 0.135, 0.285, 0.9949999])
+def test_fusion_rounds_like_round(value):
+    tension, _ = fuse_scores([value], [0.0], [value], [0.0])
+    assert tension[0] == round(analyzer.TEXT_WEIGHT * value + analyzer.AUDIO_WEIGHT * value, 2)
@@ -1,4 +1,7 @@
-from textblob import TextBlob
+from collections import OrderedDict
+
+import instrumentation
+
 
 
 # Compliance patterns - indicate accepting/accommodating behavior
@@ -30,6 +33,149 @@ RESISTANCE_KEYWORDS = {
     'issue', 'wrong', 'busy', 'later', 'delay', 'postpone'
 }
 
+# Avoidance indicators, matched anywhere in the text
+STRONG_AVOIDANCE_KEYWORDS = {'can we discuss', 'can we', 'later?', 'busy right now', 'busy'}
+
+# Weak avoidance indicators (but could be assertive context)
+WEAK_AVOIDANCE_KEYWORDS = {'postponed', 'delay'}
+
+# Words that turn a mention of postponement into a complaint or demand
+ASSERTIVE_CONTEXT_KEYWORDS = {'twice', 'already', 'schedule', 'today', 'need'}
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton that counts keyword hits for several categories in one scan.
+    
+    Phrase categories count the distinct keywords found anywhere in the text.
+    Word categories count the distinct whitespace-separated words that
+    contain at least one of their keywords, so only keywords without spaces
+    can match them.
+    """
+
+    def __init__(self, phrase_categories, word_categories):
+        """
+        Args:
+            phrase_categories: Dict of category name to keyword set, matched against the whole text
+            word_categories: Dict of category name to keyword set, matched inside single words
+        """
+        self.phrase_names = list(phrase_categories)
+        self.word_names = list(word_categories)
+        
+        # keyword -> (phrase category bitmask, word category bitmask)
+        masks = {}
+        for bit, name in enumerate(self.phrase_names):
+            for kw in phrase_categories[name]:
+                phrase_mask, word_mask = masks.get(kw, (0, 0))
+                masks[kw] = (phrase_mask | 1 << bit, word_mask)
+        for bit, name in enumerate(self.word_names):
+            for kw in word_categories[name]:
+                if kw.split() != [kw]:
+                    continue
+                phrase_mask, word_mask = masks.get(kw, (0, 0))
+                masks[kw] = (phrase_mask, word_mask | 1 << bit)
+        
+        self.keywords = list(masks)
+        self._phrase_masks = [masks[kw][0] for kw in self.keywords]
+        self._word_masks = [masks[kw][1] for kw in self.keywords]
+        self._build_automaton()
+
+    def _build_automaton(self):
+        goto = [{}]
+        outputs = [[]]
+        for index, kw in enumerate(self.keywords):
+            state = 0
+            for ch in kw:
+                if ch not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            outputs[state].append(index)
+        
+        # Breadth-first: fail links, inherited outputs and a full transition table
+        fail = [0] * len(goto)
+        transitions = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = list(goto[0].values())
+        for state in queue:
+            transitions[state] = dict(transitions[fail[state]])
+            for ch, child in goto[state].items():
+                fail[child] = transitions[fail[state]].get(ch, 0) if state else 0
+                outputs[child] = outputs[child] + outputs[fail[child]]
+                transitions[state][ch] = child
+                queue.append(child)
+        
+        self._transitions = transitions
+        self._outputs = [tuple(out) for out in outputs]
+
+    def count(self, text):
+        """
+        Count keyword hits per category.
+        
+        Args:
+            text: Lowercased text to scan
+            
+        Returns:
+            dict: Category name to hit count, for phrase and word categories
+        """
+        transitions = self._transitions
+        outputs = self._outputs
+        word_masks = self._word_masks
+        
+        found = set()
+        flagged_words = {}
+        word_start = 0
+        word_flags = 0
+        state = 0
+        for i, ch in enumerate(text):
+            if ch.isspace():
+                if word_flags:
+                    flagged_words[text[word_start:i]] = word_flags
+                    word_flags = 0
+                word_start = i + 1
+            state = transitions[state].get(ch, 0)
+            for index in outputs[state]:
+                found.add(index)
+                word_flags |= word_masks[index]
+        if word_flags:
+            flagged_words[text[word_start:]] = word_flags
+        
+        counts = {}
+        for bit, name in enumerate(self.phrase_names):
+            counts[name] = sum(1 for index in found if self._phrase_masks[index] >> bit & 1)
+        for bit, name in enumerate(self.word_names):
+            counts[name] = sum(1 for flags in flagged_words.values() if flags >> bit & 1)
+        return counts
+
+
+KEYWORD_MATCHER = KeywordMatcher(
+    phrase_categories={
+        'collaborative': COLLABORATIVE_KEYWORDS,
+        'strong_avoidance': STRONG_AVOIDANCE_KEYWORDS,
+        'weak_avoidance': WEAK_AVOIDANCE_KEYWORDS,
+        'assertive_context': ASSERTIVE_CONTEXT_KEYWORDS
+    },
+    word_categories={
+        'acceptance': ACCEPTANCE_KEYWORDS,
+        'resistance': RESISTANCE_KEYWORDS,
+        'assertive': ASSERTIVE_KEYWORDS
+    }
+)
+
+
+def detect_patterns(text):
+    """
+    Compute compliance, collaboration and avoidance scores from a single keyword scan.
+    
+    Args:
+        text: Text string to analyze
+        
+    Returns:
+        tuple: (compliance, collaboration, avoidance) scores between 0 and 1
+    """
+    counts = KEYWORD_MATCHER.count(text.lower())
+    return _compliance_score(counts), _collaboration_score(counts), _avoidance_score(counts)
+
 
 def detect_compliance(text):
     """
@@ -41,24 +187,7 @@ def detect_compliance(text):
     Returns:
         float: Compliance score (0-1), higher = more accepting
     """
-    text_lower = text.lower()
-    words = set(text_lower.split())
-    
-    # Count acceptance vs resistance keywords
-    acceptance_count = sum(1 for word in words if any(kw in word for kw in ACCEPTANCE_KEYWORDS))
-    resistance_count = sum(1 for word in words if any(kw in word for kw in RESISTANCE_KEYWORDS))
-    assertive_count = sum(1 for word in words if any(kw in word for kw in ASSERTIVE_KEYWORDS))
-    
-    # If acceptance keywords present and no resistance, high compliance
-    if acceptance_count > 0 and resistance_count == 0:
-        compliance = min(0.9 + (acceptance_count * 0.05), 1.0)
-    # If resistance/assertive keywords present, low compliance
-    elif resistance_count > 0 or assertive_count > 1:
-        compliance = 0.1
-    else:
-        compliance = 0.5
-    
-    return compliance
+    return _compliance_score(KEYWORD_MATCHER.count(text.lower()))
 
 
 def detect_collaboration(text):
@@ -69,35 +198,27 @@ def detect_collaboration(text):
     Returns:
         float: Collaboration score (0-1), higher = more collaborative
     """
-    text_lower = text.lower()
-    
-    collab_count = sum(1 for kw in COLLABORATIVE_KEYWORDS if kw in text_lower)
-    
-    if collab_count >= 2:
-        return 0.9  # Strong collaboration signal
-    elif collab_count == 1:
-        return 0.7
-    else:
-        return 0.0
+    return _collaboration_score(KEYWORD_MATCHER.count(text.lower()))
 
 
-def detect_compliance(text):
+def detect_avoidance(text):
     """
-    Detect if text shows compliance/acceptance patterns.
+    Detect if text shows avoidance/withdrawal patterns (asking to postpone, delay, etc).
     
     Args:
         text: Text string to analyze
         
     Returns:
-        float: Compliance score (0-1), higher = more accepting
+        float: Avoidance score (0-1), higher = more avoiding
     """
-    text_lower = text.lower()
-    words = set(text_lower.split())
-    
+    return _avoidance_score(KEYWORD_MATCHER.count(text.lower()))
+
+
+def _compliance_score(counts):
     # Count acceptance vs resistance keywords
-    acceptance_count = sum(1 for word in words if any(kw in word for kw in ACCEPTANCE_KEYWORDS))
-    resistance_count = sum(1 for word in words if any(kw in word for kw in RESISTANCE_KEYWORDS))
-    assertive_count = sum(1 for word in words if any(kw in word for kw in ASSERTIVE_KEYWORDS))
+    acceptance_count = counts['acceptance']
+    resistance_count = counts['resistance']
+    assertive_count = counts['assertive']
     
     # If acceptance keywords present and no resistance, high compliance
     if acceptance_count > 0 and resistance_count == 0:
@@ -111,33 +232,25 @@ def detect_compliance(text):
     return compliance
 
 
-def detect_avoidance(text):
-    """
-    Detect if text shows avoidance/withdrawal patterns (asking to postpone, delay, etc).
+def _collaboration_score(counts):
+    collab_count = counts['collaborative']
     
-    Args:
-        text: Text string to analyze
-        
-    Returns:
-        float: Avoidance score (0-1), higher = more avoiding
-    """
-    text_lower = text.lower()
-    
-    # Strong avoidance indicators
-    strong_avoidance = {'can we discuss', 'can we', 'later?', 'busy right now', 'busy'}
-    strong_count = sum(1 for kw in strong_avoidance if kw in text_lower)
-    
-    # Weak avoidance indicators (but could be assertive context)
-    weak_avoidance = {'postponed', 'delay'}
-    weak_count = sum(1 for kw in weak_avoidance if kw in text_lower)
+    if collab_count >= 2:
+        return 0.9  # Strong collaboration signal
+    elif collab_count == 1:
+        return 0.7
+    else:
+        return 0.0
+
+
+def _avoidance_score(counts):
+    strong_count = counts['strong_avoidance']
+    weak_count = counts['weak_avoidance']
     
     # If speaker is saying they want to postpone (weak), it's avoidance
     # If speaker is complaining about postponement (weak), it's assertive
-    if 'postponed' in text_lower or 'delay' in text_lower:
-        # Check if complaining or demanding action (assertive context)
-        assertive_words = {'twice', 'already', 'schedule', 'today', 'need'}
-        if any(word in text_lower for word in assertive_words):
-            weak_count = 0  # This is assertive, not avoidant
+    if weak_count > 0 and counts['assertive_context'] > 0:
+        weak_count = 0  # This is assertive, not avoidant
     
     # Combine scores
     if strong_count >= 2:
@@ -150,6 +263,14 @@ def detect_avoidance(text):
         return 0.0
 
 
+# Number of distinct utterances whose text scores are memoized
+SENTIMENT_CACHE_SIZE = 65536
+
+_sentiment_memo = OrderedDict()
+_pattern_sentiment = None
+_lexicon_backend = None
+
+
 def analyze_sentiment(text):
     """
     Analyze text sentiment to determine tension and assertiveness.
@@ -160,18 +281,68 @@ def analyze_sentiment(text):
     Returns:
         tuple: (tension, assertiveness) scores between 0 and 1
     """
-    blob = TextBlob(text)
-    polarity = blob.sentiment.polarity
-    subjectivity = blob.sentiment.subjectivity
+    scores = _memo_get(text)
+    if scores is None:
+        instrumentation.increment('sentiment_memo.miss')
+        with instrumentation.stage('sentiment'):
+            polarity, subjectivity = _get_pattern_sentiment()(text)
+        scores = _memo_put(text, _score_text(text, polarity, subjectivity))
+    else:
+        instrumentation.increment('sentiment_memo.hit')
+    
+    instrumentation.emit('sentiment', **scores)
+    
+    return min(scores['tension'], 1.0), scores['assertiveness']
+
+
+def analyze_sentiment_batch(texts, backend='textblob'):
+    """
+    Analyze many texts at once, scoring each distinct utterance only once.
+    
+    Args:
+        texts: List of text strings
+        backend: 'textblob' (pattern analyzer per text) or 'lexicon' (vectorized
+            lexicon lookups with identical results)
+        
+    Returns:
+        list: (tension, assertiveness) tuple for each text, in input order
+    """
+    results = {}
+    missing = []
+    for text in dict.fromkeys(texts):
+        scores = _memo_get(text)
+        if scores is None:
+            missing.append(text)
+        else:
+            results[text] = scores
     
+    instrumentation.increment('sentiment_memo.hit', len(results))
+    instrumentation.increment('sentiment_memo.miss', len(missing))
+    
+    if missing:
+        with instrumentation.stage('sentiment'):
+            if backend == 'lexicon':
+                sentiments = _get_lexicon_backend().score_batch(missing)
+            elif backend == 'textblob':
+                pattern_sentiment = _get_pattern_sentiment()
+                sentiments = [pattern_sentiment(text) for text in missing]
+            else:
+                raise ValueError(f"Unknown sentiment backend: {backend}")
+        for text, (polarity, subjectivity) in zip(missing, sentiments):
+            results[text] = _memo_put(text, _score_text(text, polarity, subjectivity))
+    
+    return [(min(results[text]['tension'], 1.0), results[text]['assertiveness']) for text in texts]
+
+
+def _score_text(text, polarity, subjectivity):
+    """Combine sentiment with keyword patterns into the text tension/assertiveness scores."""
     # Tension from sentiment (negative = tense)
     sentiment_tension = 1 - ((polarity + 1) / 2)
     sentiment_tension += subjectivity * 0.2
     
     # Get compliance, collaboration, and avoidance scores
-    compliance = detect_compliance(text)
-    collaboration = detect_collaboration(text)
-    avoidance = detect_avoidance(text)
+    with instrumentation.stage('keyword'):
+        compliance, collaboration, avoidance = detect_patterns(text)
     
     if collaboration > 0.6:
         # Collaborative/empathetic tone - moderate to low assertiveness
@@ -186,9 +357,44 @@ def analyze_sentiment(text):
         # Default: neutral to assertive
         text_assertiveness = 0.65
     
-    print(f"    [Sentiment]")
-    print(f"      Polarity: {polarity:.2f}, Subjectivity: {subjectivity:.2f}")
-    print(f"    [Compliance] Score: {compliance:.3f}, [Avoidance] Score: {avoidance:.3f}, [Collaboration] Score: {collaboration:.3f}")
-    print(f"    [Text] Tension: {sentiment_tension:.3f}, Assertiveness: {text_assertiveness:.3f}")
-    
-    return min(sentiment_tension, 1.0), text_assertiveness
\ No newline at end of file
+    return {
+        'polarity': polarity,
+        'subjectivity': subjectivity,
+        'compliance': compliance,
+        'collaboration': collaboration,
+        'avoidance': avoidance,
+        'tension': sentiment_tension,
+        'assertiveness': text_assertiveness
+    }
+
+
+def _memo_get(text):
+    scores = _sentiment_memo.get(text)
+    if scores is not None:
+        _sentiment_memo.move_to_end(text)
+    return scores
+
+
+def _memo_put(text, scores):
+    _sentiment_memo[text] = scores
+    if len(_sentiment_memo) > SENTIMENT_CACHE_SIZE:
+        _sentiment_memo.popitem(last=False)
+    return scores
+
+
+def _get_pattern_sentiment():
+    # The pattern analyzer behind TextBlob(text).sentiment, called without building a
+    # TextBlob; imported on first use since loading TextBlob dominates startup time
+    global _pattern_sentiment
+    if _pattern_sentiment is None:
+        from textblob.en import sentiment
+        _pattern_sentiment = sentiment
+    return _pattern_sentiment
+
+
+def _get_lexicon_backend():
+    global _lexicon_backend
+    if _lexicon_backend is None:
+        from lexicon_sentiment import LexiconSentiment
+        _lexicon_backend = LexiconSentiment()
+    return _lexicon_backend
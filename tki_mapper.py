@@ -1,4 +1,34 @@
-def map_tki_style(tension, assertiveness):
+# Integer style codes returned by map_tki_styles; STYLE_LABELS[code] is the description
+COMPETING = 0
+COLLABORATING = 1
+COMPROMISING = 2
+AVOIDING = 3
+ACCOMMODATING = 4
+
+STYLE_LABELS = (
+    "Competing (assertive, high tension)",
+    "Collaborating (assertive, constructive)",
+    "Compromising (moderate assertiveness/tension)",
+    "Avoiding (withdrawal, anxious)",
+    "Accommodating (yielding, low tension)"
+)
+
+# Style boundaries shared by map_tki_style and map_tki_styles
+DEFAULT_THRESHOLDS = {
+    'competing_assertiveness': 0.60,
+    'competing_tension': 0.75,
+    'collaborating_assertiveness': 0.50,
+    'collaborating_tension': 0.65,
+    'compromising_assertiveness': 0.45,
+    'compromising_assertiveness_max': 0.60,
+    'compromising_tension': 0.50,
+    'low_assertiveness': 0.45,
+    'low_assertiveness_tension': 0.55,
+    'fallback_assertiveness': 0.55
+}
+
+
+def map_tki_style(tension, assertiveness, thresholds=DEFAULT_THRESHOLDS):
     """
     Map tension and assertiveness scores to TKI conflict styles.
     
@@ -8,35 +38,117 @@ def map_tki_style(tension, assertiveness):
     Args:
         tension: Tension score (0-1)
         assertiveness: Assertiveness score (0-1)
-        
+        thresholds: Style boundaries (see DEFAULT_THRESHOLDS)
+    
     Returns:
         str: TKI conflict style description
     """
+    t = thresholds
+    
     # Competing: High assertiveness + High tension
-    if assertiveness >= 0.60 and tension >= 0.75:
-        return "Competing (assertive, high tension)"
+    if assertiveness >= t['competing_assertiveness'] and tension >= t['competing_tension']:
+        return STYLE_LABELS[COMPETING]
     
     # Collaborating: Medium-high assertiveness + Low tension
-    if assertiveness >= 0.50 and tension < 0.65:
-        return "Collaborating (assertive, constructive)"
+    if assertiveness >= t['collaborating_assertiveness'] and tension < t['collaborating_tension']:
+        return STYLE_LABELS[COLLABORATING]
     
     # Compromising: Medium assertiveness + Medium tension
-    if assertiveness >= 0.45 and assertiveness < 0.60 and tension >= 0.50:
-        return "Compromising (moderate assertiveness/tension)"
+    if (assertiveness >= t['compromising_assertiveness'] and assertiveness < t['compromising_assertiveness_max']
+            and tension >= t['compromising_tension']):
+        return STYLE_LABELS[COMPROMISING]
     
     # Avoiding: Low assertiveness + High tension
-    if assertiveness < 0.45 and tension >= 0.55:
-        return "Avoiding (withdrawal, anxious)"
+    if assertiveness < t['low_assertiveness'] and tension >= t['low_assertiveness_tension']:
+        return STYLE_LABELS[AVOIDING]
     
     # Accommodating: Low assertiveness + Low tension
-    if assertiveness < 0.45 and tension < 0.55:
-        return "Accommodating (yielding, low tension)"
+    if assertiveness < t['low_assertiveness'] and tension < t['low_assertiveness_tension']:
+        return STYLE_LABELS[ACCOMMODATING]
     
     # Default fallback based on assertiveness
-    if assertiveness >= 0.55:
-        return "Collaborating (assertive, constructive)"
+    if assertiveness >= t['fallback_assertiveness']:
+        return STYLE_LABELS[COLLABORATING]
     else:
-        return "Accommodating (yielding, low tension)"
+        return STYLE_LABELS[ACCOMMODATING]
+
+
+def map_tki_styles(tension, assertiveness, thresholds=DEFAULT_THRESHOLDS):
+    """
+    Vectorized map_tki_style over arrays of scores.
+    
+    Args:
+        tension: Array of tension scores (0-1)
+        assertiveness: Array of assertiveness scores (0-1), same shape
+        thresholds: Style boundaries (see DEFAULT_THRESHOLDS)
+    
+    Returns:
+        np.ndarray: int8 style codes; STYLE_LABELS[code] is the description
+    """
+    import numpy as np
+    
+    tension = np.asarray(tension)
+    assertiveness = np.asarray(assertiveness)
+    t = thresholds
+    
+    # Same checks as map_tki_style; np.select takes the first condition that holds
+    low_assertiveness = assertiveness < t['low_assertiveness']
+    conditions = [
+        (assertiveness >= t['competing_assertiveness']) & (tension >= t['competing_tension']),
+        (assertiveness >= t['collaborating_assertiveness']) & (tension < t['collaborating_tension']),
+        (assertiveness >= t['compromising_assertiveness']) & (assertiveness < t['compromising_assertiveness_max'])
+        & (tension >= t['compromising_tension']),
+        low_assertiveness & (tension >= t['low_assertiveness_tension']),
+        low_assertiveness & (tension < t['low_assertiveness_tension']),
+        assertiveness >= t['fallback_assertiveness']
+    ]
+    choices = [COMPETING, COLLABORATING, COMPROMISING, AVOIDING, ACCOMMODATING, COLLABORATING]
+    return np.select(conditions, choices, default=ACCOMMODATING).astype(np.int8)
+
+
+def style_labels(codes):
+    """
+    Args:
+        codes: Array of style codes from map_tki_styles
+    
+    Returns:
+        np.ndarray: Style description for each code
+    """
+    import numpy as np
+    
+    return np.asarray(STYLE_LABELS)[codes]
+
+
+def styles_in_range(tension_range, assertiveness_range, thresholds=DEFAULT_THRESHOLDS):
+    """
+    Every style map_tki_style can return for scores inside a rectangle.
+    
+    The styles are constant between consecutive thresholds on each axis,
+    so evaluating one point per cell the rectangle overlaps covers it
+    exactly. Keys ending in '_tension' are tension thresholds; the others
+    are assertiveness thresholds.
+    
+    Args:
+        tension_range: (low, high) tension, both inclusive
+        assertiveness_range: (low, high) assertiveness, both inclusive
+        thresholds: Style boundaries (see DEFAULT_THRESHOLDS)
+    
+    Returns:
+        set: Style descriptions
+    """
+    tension_cuts = [value for key, value in thresholds.items() if key.endswith('_tension')]
+    assertiveness_cuts = [value for key, value in thresholds.items() if not key.endswith('_tension')]
+    return {
+        map_tki_style(tension, assertiveness, thresholds)
+        for tension in _cell_points(tension_range, tension_cuts)
+        for assertiveness in _cell_points(assertiveness_range, assertiveness_cuts)
+    }
+
+
+def _cell_points(value_range, cuts):
+    # A threshold belongs to the cell above it, since every check is value >= threshold
+    low, high = value_range
+    return [low] + sorted(set(cut for cut in cuts if low < cut <= high))
 
 
 def debug_tki_mapping(tension, assertiveness):